@@ -1,7 +1,12 @@
 from fastapi import APIRouter, Request, status
 from fastapi.responses import JSONResponse
 
-from app.db.tortoise import db_check
+from app.db.pool import get_pool_stats
+from app.db.tortoise import db_check, replicas_check
+from app.services.dto_cache import get_dto_cache
+from app.services.outbox.outbox_service import get_webhook_dispatcher
+from app.services.review_stream.review_stream_service import get_review_broker
+from app.services.users.users_service import get_activity_buffer
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -27,9 +32,40 @@ async def healthz() -> dict[str, str]:
 @router.get("/ready", status_code=status.HTTP_200_OK)
 async def ready() -> JSONResponse:
     db_ok = await db_check()
+    # Без реплик сервис работает, чтения уходят на primary
+    replicas = await replicas_check()
     status_code = status.HTTP_200_OK if db_ok else status.HTTP_503_SERVICE_UNAVAILABLE
+    dependencies = {"database": "ready" if db_ok else "unavailable"}
+    for name, ok in replicas.items():
+        dependencies[name] = "ready" if ok else "unavailable"
     body = {
-        "status": "ready" if db_ok else "degraded",
-        "dependencies": {"database": "ready" if db_ok else "unavailable"},
+        "status": "ready" if db_ok and all(replicas.values()) else "degraded",
+        "dependencies": dependencies,
     }
     return JSONResponse(body, status_code=status_code)
+
+
+@router.get("/cache", status_code=status.HTTP_200_OK)
+async def cache_stats() -> dict[str, dict[str, int]]:
+    return {name: stats.to_dict() for name, stats in get_dto_cache().stats().items()}
+
+
+@router.get("/pool", status_code=status.HTTP_200_OK)
+async def pool_stats() -> dict[str, float]:
+    stats = get_pool_stats()
+    return stats.to_dict() if stats else {}
+
+
+@router.get("/writes", status_code=status.HTTP_200_OK)
+async def write_buffer_stats() -> dict[str, dict[str, int]]:
+    return {"user_activity": get_activity_buffer().stats().to_dict()}
+
+
+@router.get("/webhooks", status_code=status.HTTP_200_OK)
+async def webhook_stats() -> dict[str, int]:
+    return get_webhook_dispatcher().stats().to_dict()
+
+
+@router.get("/streams", status_code=status.HTTP_200_OK)
+async def stream_stats() -> dict[str, int]:
+    return get_review_broker().stats().to_dict()
@@ -1,7 +1,13 @@
 from fastapi import APIRouter, status
 
+from app.common.responses import DtoRoute
+from app.services.pull_requests.pull_requests_batch_service import PullRequestBatchService
 from app.services.pull_requests.pull_requests_service import PullRequestService
 from app.services.pull_requests.schemas import (
+    PullRequestBatchCreate,
+    PullRequestBatchMerge,
+    PullRequestBatchReassign,
+    PullRequestBatchResponse,
     PullRequestCreate,
     PullRequestMerge,
     PullRequestReassign,
@@ -9,7 +15,7 @@ from app.services.pull_requests.schemas import (
     PullRequestResponse,
 )
 
-router = APIRouter(prefix="/pullRequest", tags=["PullRequests"])
+router = APIRouter(prefix="/pullRequest", tags=["PullRequests"], route_class=DtoRoute)
 
 
 @router.post(
@@ -20,7 +26,7 @@ router = APIRouter(prefix="/pullRequest", tags=["PullRequests"])
 )
 async def create_pull_request(payload: PullRequestCreate) -> PullRequestResponse:
     pr = await PullRequestService.create_pull_request(payload)
-    return PullRequestResponse(pr=await PullRequestService.to_dto(pr))
+    return PullRequestResponse(pr=pr)
 
 
 @router.post(
@@ -49,3 +55,40 @@ async def reassign_pull_request(
     return PullRequestReassignResponse(
         pr=await PullRequestService.to_dto(pr), replaced_by=replaced_by
     )
+
+
+@router.post(
+    "/batchCreate",
+    response_model=PullRequestBatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Создать pull request'ы пакетом",
+)
+async def batch_create_pull_requests(payload: PullRequestBatchCreate) -> PullRequestBatchResponse:
+    results = await PullRequestBatchService.create_pull_requests(payload.items)
+    return PullRequestBatchResponse(results=results)
+
+
+@router.post(
+    "/batchMerge",
+    response_model=PullRequestBatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Смержить pull request'ы пакетом",
+)
+async def batch_merge_pull_requests(payload: PullRequestBatchMerge) -> PullRequestBatchResponse:
+    results = await PullRequestBatchService.merge_pull_requests(
+        [item.pull_request_id for item in payload.items]
+    )
+    return PullRequestBatchResponse(results=results)
+
+
+@router.post(
+    "/batchReassign",
+    response_model=PullRequestBatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Переназначить ревьюверов пакетом",
+)
+async def batch_reassign_pull_requests(
+    payload: PullRequestBatchReassign,
+) -> PullRequestBatchResponse:
+    results = await PullRequestBatchService.reassign_pull_requests(payload.items)
+    return PullRequestBatchResponse(results=results)
@@ -0,0 +1,58 @@
+from uuid import UUID
+
+from fastapi import APIRouter, status
+
+from app.common.responses import DtoRoute
+from app.services.stats.schemas import (
+    PullRequestStatsResponse,
+    StatsResponse,
+    TeamStatsResponse,
+    UserStatsResponse,
+)
+from app.services.stats.stats_service import StatsService
+from app.services.teams.teams_service import TeamService
+from app.services.users.users_service import UserService
+
+router = APIRouter(prefix="/stats", tags=["Stats"], route_class=DtoRoute)
+
+
+@router.get(
+    "",
+    response_model=StatsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Общая статистика назначений и распределение нагрузки",
+)
+async def get_stats() -> StatsResponse:
+    return await StatsService.get_stats()
+
+
+@router.get(
+    "/teams/{team_id}",
+    response_model=TeamStatsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Статистика команды",
+)
+async def get_team_stats(team_id: UUID) -> TeamStatsResponse:
+    await TeamService.get_team_dto(team_id)
+    return await StatsService.get_team_stats(team_id)
+
+
+@router.get(
+    "/users/{user_id}",
+    response_model=UserStatsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Статистика пользователя",
+)
+async def get_user_stats(user_id: UUID) -> UserStatsResponse:
+    await UserService.get_user_dto(user_id)
+    return await StatsService.get_user_stats(user_id)
+
+
+@router.get(
+    "/pullRequests/{pull_request_id}",
+    response_model=PullRequestStatsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Статистика pull request",
+)
+async def get_pull_request_stats(pull_request_id: UUID) -> PullRequestStatsResponse:
+    return await StatsService.get_pull_request_stats(pull_request_id)
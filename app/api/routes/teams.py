@@ -1,17 +1,30 @@
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Query, status
+from fastapi import APIRouter, Query, Request, status
+from fastapi.responses import StreamingResponse
 
+from app.common.ndjson import NDJSON_MEDIA_TYPE, ndjson_stream, parse_ndjson
+from app.common.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    Cursor,
+)
+from app.common.responses import DtoRoute
 from app.services.team_members.team_members_service import TeamMemberService
 from app.services.teams.schemas import (
     TeamCreate,
+    TeamDeactivate,
+    TeamDeactivationResult,
     TeamDto,
+    TeamImportResult,
     TeamMembersUpdate,
+    TeamPage,
     TeamResponse,
 )
 from app.services.teams.teams_service import TeamService
 
-router = APIRouter(prefix="/team", tags=["Teams"])
+router = APIRouter(prefix="/team", tags=["Teams"], route_class=DtoRoute)
 
 
 @router.post(
@@ -21,17 +34,27 @@ router = APIRouter(prefix="/team", tags=["Teams"])
     summary="Создать команду",
 )
 async def create_team(payload: TeamCreate) -> TeamResponse:
-    team = await TeamService.create_team(payload)
-    try:
-        if payload.members:
-            await TeamMemberService.update_or_create_members(team.id, payload.members)
-    except Exception:
-        await TeamService.delete_team(team.id)
-        raise
-
+    team = await TeamService.create_team_with_members(payload)
     return TeamResponse(team=await TeamService.to_dto(team))
 
 
+@router.post(
+    "/import",
+    response_model=TeamImportResult,
+    status_code=status.HTTP_200_OK,
+    summary="Импортировать команды из NDJSON",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def import_teams(request: Request) -> TeamImportResult:
+    payloads = parse_ndjson(await request.body(), TeamCreate)
+    return await TeamService.import_teams(payloads)
+
+
 @router.get(
     "/get",
     response_model=TeamDto,
@@ -39,19 +62,33 @@ async def create_team(payload: TeamCreate) -> TeamResponse:
     summary="Получить команду по названию",
 )
 async def get_team_by_name(team_name: str = Query(..., alias="team_name")) -> TeamDto:
-    team = await TeamService.get_team_by_name(team_name)
-    return await TeamService.to_dto(team)
+    return await TeamService.get_team_dto_by_name(team_name)
 
 
 @router.get(
     "",
-    response_model=list[TeamDto],
+    response_model=TeamPage,
     status_code=status.HTTP_200_OK,
-    summary="Получить все команды",
+    summary="Получить команды постранично",
 )
-async def get_teams() -> list[TeamDto]:
-    teams = await TeamService.get_teams()
-    return await TeamService.to_dtos(teams)
+async def get_teams(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    response_format: Literal["json", "ndjson"] = Query("json", alias="format"),
+) -> TeamPage | StreamingResponse:
+    page_cursor = Cursor.decode(cursor) if cursor else None
+
+    if response_format == "ndjson":
+        return StreamingResponse(
+            ndjson_stream(TeamService.iter_team_dtos(page_cursor)),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    teams, next_cursor = await TeamService.get_teams_page(limit, page_cursor)
+    return TeamPage(
+        items=await TeamService.to_dtos(teams),
+        next_cursor=next_cursor.encode() if next_cursor else None,
+    )
 
 
 @router.get(
@@ -61,8 +98,29 @@ async def get_teams() -> list[TeamDto]:
     summary="Получить команду по id",
 )
 async def get_team(team_id: UUID) -> TeamDto:
+    return await TeamService.get_team_dto(team_id)
+
+
+@router.post(
+    "/deactivate",
+    response_model=TeamDeactivationResult,
+    status_code=status.HTTP_200_OK,
+    summary="Деактивировать команду по названию и переназначить её ревью",
+)
+async def deactivate_team_by_name(payload: TeamDeactivate) -> TeamDeactivationResult:
+    team = await TeamService.get_team_by_name(payload.team_name)
+    return await TeamService.deactivate_team(team)
+
+
+@router.post(
+    "/{team_id}/deactivate",
+    response_model=TeamDeactivationResult,
+    status_code=status.HTTP_200_OK,
+    summary="Деактивировать команду и переназначить её ревью",
+)
+async def deactivate_team(team_id: UUID) -> TeamDeactivationResult:
     team = await TeamService.get_team(team_id)
-    return await TeamService.to_dto(team)
+    return await TeamService.deactivate_team(team)
 
 
 @router.delete(
@@ -82,8 +140,7 @@ async def delete_team(team_id: UUID) -> None:
 )
 async def add_team_members(team_id: UUID, payload: TeamMembersUpdate) -> TeamDto:
     await TeamMemberService.add_team_members(team_id, payload.user_ids)
-    team = await TeamService.get_team(team_id)
-    return await TeamService.to_dto(team)
+    return await TeamService.get_team_dto(team_id)
 
 
 @router.delete(
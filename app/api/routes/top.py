@@ -1,9 +1,10 @@
 from fastapi import APIRouter
 
-from . import health, pull_requests, teams, users
+from . import health, pull_requests, stats, teams, users
 
 api_router = APIRouter()
 api_router.include_router(health.router)
 api_router.include_router(teams.router)
 api_router.include_router(users.router)
 api_router.include_router(pull_requests.router)
+api_router.include_router(stats.router)
@@ -1,18 +1,33 @@
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Query, status
+from fastapi import APIRouter, Header, Query, status
+from fastapi.responses import StreamingResponse
 
+from app.common.ndjson import NDJSON_MEDIA_TYPE, ndjson_stream
+from app.common.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    Cursor,
+)
+from app.common.responses import DtoRoute
+from app.common.sse import SSE_HEADERS, SSE_MEDIA_TYPE
+from app.models.pull_requests import PRStatus
 from app.services.pull_requests.pull_requests_service import PullRequestService
+from app.services.review_stream.review_stream_service import ReviewStreamService
 from app.services.users.schemas import (
+    UserBatchResponse,
+    UserBatchSetIsActive,
     UserCreate,
     UserDto,
+    UserPage,
     UserResponse,
     UserReviewsResponse,
     UserSetIsActive,
 )
 from app.services.users.users_service import UserService
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=DtoRoute)
 
 
 @router.post(
@@ -22,8 +37,17 @@ router = APIRouter(prefix="/users", tags=["Users"])
     summary="Установить флаг активности пользователя",
 )
 async def set_user_is_active(payload: UserSetIsActive) -> UserResponse:
-    user = await UserService.set_user_is_active(payload)
-    return UserResponse(user=await UserService.to_dto(user))
+    return UserResponse(user=await UserService.set_user_is_active(payload))
+
+
+@router.post(
+    "/batchSetIsActive",
+    response_model=UserBatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Установить флаг активности пользователей пакетом",
+)
+async def batch_set_users_is_active(payload: UserBatchSetIsActive) -> UserBatchResponse:
+    return UserBatchResponse(results=await UserService.set_users_is_active(payload.items))
 
 
 @router.get(
@@ -34,11 +58,43 @@ async def set_user_is_active(payload: UserSetIsActive) -> UserResponse:
 )
 async def get_user_reviews(
     user_id: UUID = Query(..., alias="user_id"),
+    pr_status: Literal["OPEN", "MERGED"] | None = Query(None, alias="status"),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
 ) -> UserReviewsResponse:
-    prs = await PullRequestService.get_pull_requests_for_reviewer(user_id)
+    summary = await PullRequestService.get_reviewer_summary(user_id)
+    prs, next_cursor = await PullRequestService.get_pull_requests_for_reviewer(
+        user_id,
+        status=PRStatus(pr_status) if pr_status else None,
+        limit=limit,
+        cursor=Cursor.decode(cursor) if cursor else None,
+    )
     return UserReviewsResponse(
         user_id=user_id,
-        pull_requests=await PullRequestService.to_short_dtos(prs),
+        pull_requests=prs,
+        summary=summary,
+        next_cursor=next_cursor.encode() if next_cursor else None,
+    )
+
+
+@router.get(
+    "/{user_id}/reviews/stream",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Поток назначений на ревью (Server-Sent Events)",
+)
+async def stream_user_reviews(
+    user_id: UUID,
+    last_event_id: str | None = Query(None),
+    last_event_id_header: str | None = Header(None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    # Проверка до начала потока, чтобы вернуть 404, а не пустой поток
+    await UserService.get_user_dto(user_id)
+    resume_from = last_event_id_header or last_event_id
+    return StreamingResponse(
+        ReviewStreamService.stream(user_id, Cursor.decode(resume_from) if resume_from else None),
+        media_type=SSE_MEDIA_TYPE,
+        headers=SSE_HEADERS,
     )
 
 
@@ -60,18 +116,33 @@ async def create_user(payload: UserCreate) -> UserDto:
     summary="Получить пользователя по id",
 )
 async def get_user(user_id: UUID) -> UserDto:
-    user = await UserService.get_user(user_id)
-    return await UserService.to_dto(user)
+    return await UserService.get_user_dto(user_id)
 
 
 @router.get(
     "",
+    response_model=UserPage,
     status_code=status.HTTP_200_OK,
-    summary="Получить всех пользователей",
+    summary="Получить пользователей постранично",
 )
-async def get_users() -> list[UserDto]:
-    users = await UserService.get_users()
-    return await UserService.to_dtos(users)
+async def get_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    response_format: Literal["json", "ndjson"] = Query("json", alias="format"),
+) -> UserPage | StreamingResponse:
+    page_cursor = Cursor.decode(cursor) if cursor else None
+
+    if response_format == "ndjson":
+        return StreamingResponse(
+            ndjson_stream(UserService.iter_user_dtos(page_cursor)),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    users, next_cursor = await UserService.get_users_page(limit, page_cursor)
+    return UserPage(
+        items=users,
+        next_cursor=next_cursor.encode() if next_cursor else None,
+    )
 
 
 @router.delete(
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+from app.common.errors.base import ServiceError
+
+MAX_BATCH_SIZE = 1000
+
+
+class BatchItemError(BaseModel):
+    code: str
+    message: str
+
+    @classmethod
+    def from_error(cls, exc: ServiceError) -> "BatchItemError":
+        return cls(code=exc.code, message=exc.message)
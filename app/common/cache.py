@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class AsyncTTLCache(Generic[K, V]):
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        on_remove: Callable[[K, V], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._on_remove = on_remove
+        self._clock = clock
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._inflight: dict[K, asyncio.Task[V]] = {}
+        self._stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self._lookup(key) is not None
+
+    async def get_or_load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        entry = self._lookup(key)
+        if entry is not None:
+            self._stats.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self._stats.misses += 1
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._on_loaded, key))
+        else:
+            self._stats.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def invalidate(self, key: K) -> None:
+        # Загрузка, начатая до инвалидации, не должна попасть в кэш
+        self._inflight.pop(key, None)
+        entry = self._data.pop(key, None)
+        self._stats.invalidations += 1
+        if entry is not None:
+            self._removed(key, entry[1])
+
+    def invalidate_inflight(self) -> None:
+        self._inflight.clear()
+
+    def clear(self) -> None:
+        self._inflight.clear()
+        entries, self._data = self._data, OrderedDict()
+        self._stats.invalidations += len(entries)
+        for key, (_, value) in entries.items():
+            self._removed(key, value)
+
+    def stats(self) -> CacheStats:
+        self._stats.size = len(self._data)
+        return CacheStats(**asdict(self._stats))
+
+    def _lookup(self, key: K) -> tuple[float, V] | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        if entry[0] <= self._clock():
+            del self._data[key]
+            self._removed(key, entry[1])
+            return None
+
+        self._data.move_to_end(key)
+        return entry
+
+    def _on_loaded(self, key: K, task: asyncio.Task[V]) -> None:
+        if self._inflight.get(key) is not task:
+            if not task.cancelled():
+                task.exception()
+            return
+
+        del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        self._store(key, task.result())
+
+    def _store(self, key: K, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+
+        previous = self._data.pop(key, None)
+        if previous is not None:
+            self._removed(key, previous[1])
+
+        self._data[key] = (self._clock() + self.ttl, value)
+        while len(self._data) > self.maxsize:
+            evicted_key, (_, evicted_value) = self._data.popitem(last=False)
+            self._stats.evictions += 1
+            self._removed(evicted_key, evicted_value)
+
+    def _removed(self, key: K, value: V) -> None:
+        if self._on_remove is not None:
+            self._on_remove(key, value)
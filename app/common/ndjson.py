@@ -0,0 +1,37 @@
+from typing import AsyncIterator, Iterable, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from app.common.errors.base import ServiceError
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+SCHEMA = TypeVar("SCHEMA", bound=BaseModel)
+
+
+class InvalidNdjsonError(ServiceError):
+    default_message = "Некорректная строка NDJSON"
+    default_status_code = 400
+    default_code = "INVALID_NDJSON"
+
+
+async def ndjson_stream(batches: AsyncIterator[Iterable[BaseModel]]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        chunk = "".join(f"{item.model_dump_json()}\n" for item in batch)
+        if chunk:
+            yield chunk.encode()
+
+
+def parse_ndjson(body: bytes, schema: type[SCHEMA]) -> list[SCHEMA]:
+    items = []
+    for line_number, line in enumerate(body.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            items.append(schema.model_validate_json(line))
+        except ValidationError as exc:
+            raise InvalidNdjsonError(
+                f"Некорректная строка NDJSON {line_number}",
+                extra={"line": line_number, "reason": exc.errors()[0]["msg"]},
+            ) from exc
+    return items
@@ -0,0 +1,89 @@
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, TypeVar
+from uuid import UUID
+
+from tortoise.expressions import Q
+from tortoise.models import Model
+from tortoise.queryset import QuerySet
+
+from app.common.errors.base import ServiceError
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+MODEL = TypeVar("MODEL", bound=Model)
+
+
+class InvalidCursorError(ServiceError):
+    default_message = "Некорректный курсор пагинации"
+    default_status_code = 400
+    default_code = "INVALID_CURSOR"
+
+
+@dataclass(frozen=True)
+class Cursor:
+    created_at: datetime
+    id: UUID
+
+    def encode(self) -> str:
+        raw = f"{self.created_at.isoformat()}|{self.id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, value: str) -> "Cursor":
+        try:
+            raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+            created_at, id_ = raw.split("|", 1)
+            return cls(created_at=datetime.fromisoformat(created_at), id=UUID(id_))
+        except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+            raise InvalidCursorError(extra={"cursor": value}) from exc
+
+    @classmethod
+    def from_model(cls, instance: Model) -> "Cursor":
+        return cls(created_at=instance.created_at, id=instance.id)
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> "Cursor":
+        return cls(created_at=row["created_at"], id=row["id"])
+
+
+async def fetch_page(
+    queryset: QuerySet[MODEL],
+    limit: int,
+    cursor: Cursor | None = None,
+    fields: dict[str, str] | None = None,
+) -> tuple[list[Any], Cursor | None]:
+    # С fields строки читаются через values() без создания моделей; поля id и created_at
+    # нужны в проекции для курсора
+    if cursor:
+        # Отдельное условие created_at >= ... даёт индексу (created_at, id) точку входа
+        queryset = queryset.filter(
+            Q(created_at__gte=cursor.created_at),
+            Q(created_at__gt=cursor.created_at) | Q(id__gt=cursor.id),
+        )
+
+    queryset = queryset.order_by("created_at", "id").limit(limit + 1)
+    rows = await (queryset.values(**fields) if fields else queryset)
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, Cursor.from_row(rows[-1]) if fields else Cursor.from_model(rows[-1])
+
+
+async def iterate_pages(
+    queryset: QuerySet[MODEL],
+    batch_size: int = STREAM_BATCH_SIZE,
+    cursor: Cursor | None = None,
+    fields: dict[str, str] | None = None,
+) -> AsyncIterator[list[Any]]:
+    while True:
+        rows, cursor = await fetch_page(queryset, batch_size, cursor, fields)
+        if rows:
+            yield rows
+        if cursor is None:
+            return
@@ -0,0 +1,92 @@
+import asyncio
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Generic, Hashable, Iterator, TypeVar
+
+KEY = TypeVar("KEY", bound=Hashable)
+MESSAGE = TypeVar("MESSAGE")
+
+
+@dataclass
+class PubSubStats:
+    subscribers: int = 0
+    published: int = 0
+    dropped: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class Subscription(Generic[MESSAGE]):
+    def __init__(self, maxsize: int) -> None:
+        self._queue: asyncio.Queue[MESSAGE] = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, message: MESSAGE) -> bool:
+        # Публикующий никогда не ждёт медленного подписчика: при полной очереди сообщение
+        # отбрасывается, а подписчик узнаёт о пропуске по флагу overflowed
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+        return True
+
+    async def wait(self, timeout: float) -> list[MESSAGE] | None:
+        # Всё накопленное одной пачкой; None, если за timeout ничего не пришло
+        if self._queue.empty():
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+            messages = [first]
+        else:
+            messages = []
+
+        while not self._queue.empty():
+            messages.append(self._queue.get_nowait())
+        self.overflowed = False
+        return messages
+
+
+class PubSub(Generic[KEY, MESSAGE]):
+    # Шина внутри процесса: у каждого подписчика своя ограниченная очередь
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._subscriptions: dict[KEY, set[Subscription[MESSAGE]]] = {}
+        self._stats = PubSubStats()
+
+    @contextmanager
+    def subscribe(self, key: KEY) -> Iterator[Subscription[MESSAGE]]:
+        subscription: Subscription[MESSAGE] = Subscription(self.queue_size)
+        self._subscriptions.setdefault(key, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._subscriptions.get(key, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(key, None)
+
+    def publish(self, key: KEY, message: MESSAGE) -> int:
+        return self._deliver(self._subscriptions.get(key, ()), message)
+
+    def publish_all(self, message: MESSAGE) -> int:
+        return sum(
+            self._deliver(subscriptions, message)
+            for subscriptions in list(self._subscriptions.values())
+        )
+
+    def stats(self) -> PubSubStats:
+        subscribers = sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+        return PubSubStats(**{**asdict(self._stats), "subscribers": subscribers})
+
+    def _deliver(self, subscriptions, message: MESSAGE) -> int:
+        delivered = 0
+        for subscription in list(subscriptions):
+            if subscription.offer(message):
+                delivered += 1
+            else:
+                self._stats.dropped += 1
+        self._stats.published += delivered
+        return delivered
@@ -0,0 +1,32 @@
+from functools import wraps
+from typing import Any, Callable
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+
+class JsonResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content, by_alias=True)
+        return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+
+
+class DtoRoute(APIRoute):
+    # DTO уже провалидированы при сборке в сервисах. Если эндпоинт вернул ровно response_model,
+    # повторная валидация FastAPI и json.dumps не нужны: pydantic-core пишет байты сразу
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        endpoint = getattr(endpoint, "__dto_endpoint__", endpoint)
+
+        @wraps(endpoint)
+        async def send_dto(*args: Any, **values: Any) -> Any:
+            result = await endpoint(*args, **values)
+            if type(result) is self.response_model:
+                return JsonResponse(result, status_code=self.status_code or 200)
+            return result
+
+        send_dto.__dto_endpoint__ = endpoint
+        super().__init__(path, send_dto, **kwargs)
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from typing import Protocol
+from uuid import UUID
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL_SECONDS = 600.0
+HEADERS = {"Content-Type": "application/json"}
+
+
+@dataclass(frozen=True)
+class WebhookDelivery:
+    id: UUID
+    event_id: UUID
+    payload: str
+    attempts: int
+
+
+@dataclass
+class WebhookStats:
+    batches: int = 0
+    delivered: int = 0
+    retried: int = 0
+    failed: int = 0
+    in_flight: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class WebhookOutbox(Protocol):
+    async def acquire_slot(self, target: str, limit: int, lease_seconds: float) -> UUID | None: ...
+
+    async def release_slot(self, lease_id: UUID) -> None: ...
+
+    async def claim(
+        self, target: str, limit: int, lease_seconds: float
+    ) -> list[WebhookDelivery]: ...
+
+    async def mark_delivered(self, ids: list[UUID]) -> None: ...
+
+    async def mark_retry(
+        self, ids: list[UUID], error: str, delay_seconds: float, max_attempts: int
+    ) -> int: ...
+
+    async def purge_delivered(self, retention_seconds: float) -> int: ...
+
+
+class WebhookDispatcher:
+    # На каждого получателя concurrency_per_target воркеров: каждый берёт в аренду пачку
+    # событий, отправляет её одним POST и отмечает результат. Медленный получатель не
+    # задерживает остальных, а после ошибки его воркеры ждут backoff. Пачку отправляет
+    # только воркер со слотом получателя, поэтому concurrency_per_target ограничивает
+    # отправки суммарно по всем процессам, а не в каждом
+    def __init__(
+        self,
+        outbox: WebhookOutbox,
+        targets: list[str],
+        batch_size: int,
+        concurrency_per_target: int,
+        timeout_seconds: float,
+        poll_interval_seconds: float,
+        lease_seconds: float,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+        max_attempts: int,
+        retention_seconds: float,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.outbox = outbox
+        self.targets = targets
+        self.batch_size = batch_size
+        self.concurrency_per_target = concurrency_per_target
+        self.timeout_seconds = timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.lease_seconds = lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._paused_until: dict[str, float] = {}
+        self._tasks: list[asyncio.Task[None]] = []
+        self._stats = WebhookStats()
+
+    def start(self) -> None:
+        if self._tasks or not self.targets:
+            return
+
+        self._wakeup = asyncio.Event()
+        for target in self.targets:
+            for _ in range(self.concurrency_per_target):
+                self._tasks.append(asyncio.create_task(self._run(target), name="webhook-worker"))
+        self._tasks.append(asyncio.create_task(self._purge(), name="webhook-purge"))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def stats(self) -> WebhookStats:
+        return WebhookStats(**asdict(self._stats))
+
+    async def deliver_once(self, target: str) -> int:
+        lease_id = await self.outbox.acquire_slot(
+            target, self.concurrency_per_target, self.lease_seconds
+        )
+        if lease_id is None:
+            return 0
+        try:
+            return await self._deliver_batch(target)
+        finally:
+            await self.outbox.release_slot(lease_id)
+
+    async def _deliver_batch(self, target: str) -> int:
+        deliveries = await self.outbox.claim(target, self.batch_size, self.lease_seconds)
+        if not deliveries:
+            return 0
+
+        ids = [delivery.id for delivery in deliveries]
+        # payload уже сериализован при записи, пачка собирается без повторной сериализации
+        body = b'{"events":[' + b",".join(d.payload.encode() for d in deliveries) + b"]}"
+
+        self._stats.in_flight += 1
+        try:
+            error = await self._post(target, body)
+        finally:
+            self._stats.in_flight -= 1
+
+        if error is None:
+            await self.outbox.mark_delivered(ids)
+            self._paused_until.pop(target, None)
+            self._stats.batches += 1
+            self._stats.delivered += len(ids)
+            return len(ids)
+
+        delay = self._backoff(max(delivery.attempts for delivery in deliveries))
+        failed = await self.outbox.mark_retry(ids, error, delay, self.max_attempts)
+        self._paused_until[target] = time.monotonic() + delay
+        self._stats.retried += len(ids) - failed
+        self._stats.failed += failed
+        logger.warning(
+            "Вебхук %s не доставлен (%s): %d событий, повтор через %.1f с, %d исчерпали попытки",
+            target,
+            error,
+            len(ids),
+            delay,
+            failed,
+        )
+        return len(ids)
+
+    async def _post(self, target: str, body: bytes) -> str | None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout_seconds, transport=self._transport
+            )
+        try:
+            response = await self._client.post(target, content=body, headers=HEADERS)
+        except httpx.HTTPError as exc:
+            return f"{type(exc).__name__}: {exc}"
+        if response.is_success:
+            return None
+        return f"HTTP {response.status_code}"
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** max(attempts - 1, 0))
+        # Разброс, чтобы воркеры не повторяли запросы к получателю одновременно
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _run(self, target: str) -> None:
+        while True:
+            pause = self._paused_until.get(target, 0.0) - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+
+            try:
+                claimed = await self.deliver_once(target)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ошибка отправки вебхуков на %s", target)
+                claimed = 0
+
+            if claimed < self.batch_size:
+                await self._wait()
+
+    async def _wait(self) -> None:
+        if self._wakeup is None:
+            await asyncio.sleep(self.poll_interval_seconds)
+            return
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval_seconds)
+        self._wakeup.clear()
+
+    async def _purge(self) -> None:
+        while True:
+            try:
+                deleted = await self.outbox.purge_delivered(self.retention_seconds)
+                if deleted:
+                    logger.info("Удалено %s доставленных событий outbox", deleted)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ошибка очистки outbox")
+            await asyncio.sleep(PURGE_INTERVAL_SECONDS)
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Generic, Hashable, Mapping, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class WriteBehindStats:
+    queued: int = 0
+    coalesced: int = 0
+    flushes: int = 0
+    written: int = 0
+    failed: int = 0
+    pending: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class WriteBehindBuffer(Generic[K, V]):
+    # Изменения копятся не дольше delay секунд, повторные записи по ключу схлопываются
+    # в последнее значение, пачка пишется одним вызовом write. Результат put завершается,
+    # когда пачка с этим значением записана
+    def __init__(
+        self,
+        write: Callable[[dict[K, V]], Awaitable[None]],
+        delay: float,
+        max_pending: int,
+    ) -> None:
+        self._write = write
+        self.delay = delay
+        self.max_pending = max_pending
+        self._pending: dict[K, V] = {}
+        self._batch: asyncio.Future[None] | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task[None]] = set()
+        self._lock = asyncio.Lock()
+        self._stats = WriteBehindStats()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, key: K, value: V) -> asyncio.Future[None]:
+        return self.put_many({key: value})
+
+    def put_many(self, values: Mapping[K, V]) -> asyncio.Future[None]:
+        if self._batch is None:
+            loop = asyncio.get_running_loop()
+            self._batch = loop.create_future()
+            self._timer = loop.call_later(self.delay, self._schedule_flush)
+        batch = self._batch
+
+        for key, value in values.items():
+            if key in self._pending:
+                self._stats.coalesced += 1
+            self._pending[key] = value
+            self._stats.queued += 1
+
+        if len(self._pending) >= self.max_pending:
+            self._schedule_flush()
+        return batch
+
+    async def flush(self) -> None:
+        # Пачки пишутся по одной, иначе более старое значение могло бы записаться последним
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, {}
+            batch, self._batch = self._batch, None
+            if not pending:
+                if batch is not None and not batch.done():
+                    batch.set_result(None)
+                return
+
+            try:
+                await self._write(pending)
+            except Exception as exc:
+                self._stats.failed += len(pending)
+                logger.exception("Ошибка отложенной записи %s изменений", len(pending))
+                if batch is not None and not batch.done():
+                    batch.set_exception(exc)
+                    # Пачку могли не ждать (режим без подтверждения), ошибка уже в журнале
+                    batch.exception()
+                return
+
+            self._stats.flushes += 1
+            self._stats.written += len(pending)
+            if batch is not None and not batch.done():
+                batch.set_result(None)
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> WriteBehindStats:
+        self._stats.pending = len(self._pending)
+        return WriteBehindStats(**asdict(self._stats))
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.ensure_future(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
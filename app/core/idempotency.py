@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import logging
+import time
+from contextlib import suppress
+from typing import Awaitable, Callable
+
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.common.cache import AsyncTTLCache
+from app.common.errors.base import ServiceError
+from app.common.responses import JsonResponse
+from app.services.idempotency.errors import (
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyInvalidError,
+    IdempotencyKeyReusedError,
+)
+from app.services.idempotency.idempotency_service import IdempotencyRecord, IdempotencyService
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL_SECONDS = 0.05
+LEASE_RENEW_FRACTION = 1 / 3
+
+_IDEMPOTENCY_KEY_HEADER_RAW = IDEMPOTENCY_KEY_HEADER.lower().encode("latin-1")
+
+
+class IdempotencyMiddleware:
+    # Первый ответ на ключ сохраняется в БД и в ограниченном кэше воркера. Повторы в том же
+    # воркере ждут выполняющийся запрос через кэш, повторы в других воркерах опрашивают БД
+    def __init__(
+        self,
+        app: ASGIApp,
+        ttl_seconds: float,
+        lease_seconds: float,
+        wait_seconds: float,
+        cache_max_entries: int,
+    ) -> None:
+        self.app = app
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self.cache: AsyncTTLCache[str, IdempotencyRecord] = AsyncTTLCache(
+            cache_max_entries, ttl_seconds
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        key = _get_idempotency_key(scope)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        executed = False
+
+        async def execute(body: bytes, fingerprint: str) -> IdempotencyRecord:
+            nonlocal executed
+            executed = True
+            return await self._execute(scope, receive, key, body, fingerprint)
+
+        try:
+            if not key or len(key) > MAX_KEY_LENGTH:
+                raise IdempotencyKeyInvalidError(extra={"max_length": MAX_KEY_LENGTH})
+
+            body = await _read_body(receive)
+            fingerprint = _fingerprint(scope, body)
+            record = await self.cache.get_or_load(
+                key, lambda: self._load(key, fingerprint, lambda: execute(body, fingerprint))
+            )
+            if record.fingerprint != fingerprint:
+                raise IdempotencyKeyReusedError()
+        except ServiceError as exc:
+            response = JsonResponse(exc.to_dict(), status_code=exc.status_code)
+            await response(scope, receive, send)
+            return
+
+        if record.status_code is not None and record.status_code >= 500:
+            self.cache.invalidate(key)
+
+        response = Response(
+            record.body,
+            status_code=record.status_code or 200,
+            media_type=record.content_type,
+        )
+        if not executed:
+            response.headers[REPLAYED_HEADER] = "true"
+        await response(scope, receive, send)
+
+    async def _load(
+        self,
+        key: str,
+        fingerprint: str,
+        execute: Callable[[], Awaitable[IdempotencyRecord]],
+    ) -> IdempotencyRecord:
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            if await IdempotencyService.claim(key, fingerprint, self.lease_seconds):
+                return await execute()
+
+            record = await IdempotencyService.get(key)
+            if record is not None:
+                if record.fingerprint != fingerprint:
+                    raise IdempotencyKeyReusedError()
+                if record.completed:
+                    return record
+
+            if time.monotonic() >= deadline:
+                raise IdempotencyKeyInProgressError()
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+    async def _execute(
+        self, scope: Scope, receive: Receive, key: str, body: bytes, fingerprint: str
+    ) -> IdempotencyRecord:
+        pending = [{"type": "http.request", "body": body, "more_body": False}]
+        status_code = 500
+        content_type: str | None = None
+        chunks: list[bytes] = []
+
+        async def replay_body() -> Message:
+            if pending:
+                return pending.pop()
+            return await receive()
+
+        async def capture(message: Message) -> None:
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name == b"content-type":
+                        content_type = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        heartbeat = asyncio.create_task(self._heartbeat(key, fingerprint))
+        try:
+            await self.app(scope, replay_body, capture)
+        except BaseException:
+            await IdempotencyService.release(key, fingerprint)
+            raise
+        finally:
+            heartbeat.cancel()
+            with suppress(asyncio.CancelledError):
+                await heartbeat
+
+        record = IdempotencyRecord(
+            fingerprint=fingerprint,
+            status_code=status_code,
+            content_type=content_type,
+            body=b"".join(chunks).decode("utf-8"),
+        )
+        # Ошибку сервера повтор может не получить, ключ освобождается для новой попытки
+        if status_code >= 500:
+            await IdempotencyService.release(key, fingerprint)
+        else:
+            await IdempotencyService.complete(key, record, self.ttl_seconds)
+        return record
+
+    async def _heartbeat(self, key: str, fingerprint: str) -> None:
+        # Аренда продлевается, пока запрос выполняется: долгая запись (импорт команд,
+        # batchCreate) не должна отдать ключ повтору из другого воркера
+        while True:
+            await asyncio.sleep(self.lease_seconds * LEASE_RENEW_FRACTION)
+            try:
+                if not await IdempotencyService.extend(key, fingerprint, self.lease_seconds):
+                    logger.warning("Аренда ключа идемпотентности %s потеряна", key)
+                    return
+            except Exception:
+                logger.exception("Ошибка продления аренды ключа идемпотентности %s", key)
+
+
+async def purge_expired_keys(interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            deleted = await IdempotencyService.purge_expired()
+            if deleted:
+                logger.info("Удалено истёкших ключей идемпотентности: %s", deleted)
+        except Exception:
+            logger.exception("Ошибка удаления истёкших ключей идемпотентности")
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _fingerprint(scope: Scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    digest.update(scope["method"].encode("latin-1"))
+    digest.update(b"\0")
+    digest.update(scope["path"].encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(scope.get("query_string", b""))
+    digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _get_idempotency_key(scope: Scope) -> str | None:
+    for name, value in scope["headers"]:
+        if name == _IDEMPOTENCY_KEY_HEADER_RAW:
+            return value.decode("latin-1").strip()
+    return None
@@ -0,0 +1,156 @@
+import os
+import time
+from re import Pattern
+from typing import Any, Sequence
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.instrumentation import track_queries
+
+METRICS_PATH = "/metrics"
+UNMATCHED_ROUTE = "<unmatched>"
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "Количество HTTP-запросов",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP-запросы в обработке",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Количество запросов к БД на один HTTP-запрос",
+    ["method", "route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_duration_seconds",
+    "Суммарное время запросов к БД на один HTTP-запрос",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+class RouteMetrics:
+    def __init__(self, method: str, route: str) -> None:
+        self.method = method
+        self.route = route
+        self.in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        self.latency = REQUEST_LATENCY.labels(method, route)
+        self.db_queries = REQUEST_DB_QUERIES.labels(method, route)
+        self.db_time = REQUEST_DB_TIME.labels(method, route)
+        self._requests: dict[int, Any] = {}
+
+    def requests(self, status_code: int) -> Any:
+        counter = self._requests.get(status_code)
+        if counter is None:
+            counter = REQUESTS.labels(self.method, self.route, str(status_code))
+            self._requests[status_code] = counter
+        return counter
+
+
+class MetricsMiddleware:
+    # labels() берёт блокировку и ищет серию в словаре, поэтому серии маршрутов кэшируются,
+    # а маршрут определяется по заранее сгруппированным по методу регуляркам
+    def __init__(self, app: ASGIApp, routes: Sequence[BaseRoute]) -> None:
+        self.app = app
+        self.routes = routes
+        self._route_table: dict[str, list[tuple[Pattern[str], str]]] | None = None
+        self._metrics: dict[tuple[str, str], RouteMetrics] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        # Шаблон маршрута вместо пути, чтобы id не раздували число серий
+        metrics = self._route_metrics(scope["method"], self._match_route(scope))
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.in_progress.inc()
+        started = time.perf_counter()
+        try:
+            with track_queries() as queries:
+                await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_progress.dec()
+            metrics.requests(status_code).inc()
+            metrics.latency.observe(elapsed)
+            metrics.db_queries.observe(queries.count)
+            metrics.db_time.observe(queries.seconds)
+
+    def _route_metrics(self, method: str, route: str) -> RouteMetrics:
+        metrics = self._metrics.get((method, route))
+        if metrics is None:
+            metrics = RouteMetrics(method, route)
+            self._metrics[(method, route)] = metrics
+        return metrics
+
+    def _match_route(self, scope: Scope) -> str:
+        if self._route_table is None:
+            self._route_table = self._build_route_table()
+
+        path = scope["path"]
+        for pattern, template in self._route_table.get(scope["method"], ()):
+            if pattern.match(path):
+                return template
+        return UNMATCHED_ROUTE
+
+    def _build_route_table(self) -> dict[str, list[tuple[Pattern[str], str]]]:
+        table: dict[str, list[tuple[Pattern[str], str]]] = {}
+        for route in self.routes:
+            pattern = getattr(route, "path_regex", None)
+            methods = getattr(route, "methods", None)
+            if pattern is None or not methods:
+                continue
+            for method in methods:
+                table.setdefault(method, []).append((pattern, route.path))
+        return table
+
+
+def metrics_endpoint(request: Request) -> Response:
+    registry = REGISTRY
+    if os.getenv(MULTIPROC_DIR_ENV):
+        # Каждый воркер uvicorn пишет свои значения в файлы, собираем их при чтении
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_dead() -> None:
+    if os.getenv(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,53 +1,60 @@
 import logging
+import math
+import time
 import uuid
 
-from fastapi import Request, Response
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request
+from starlette.datastructures import MutableHeaders
+from starlette.requests import cookie_parser
 from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.common.errors.base import ServiceError
+from app.common.responses import JsonResponse
+from app.db.instrumentation import track_queries
+from app.db.replicas import REPLICA_ERRORS, get_replica_set, replica_reads
 
 logger = logging.getLogger(__name__)
 
+REQUEST_ID_HEADER = "X-Request-ID"
+_REQUEST_ID_HEADER_RAW = REQUEST_ID_HEADER.lower().encode("latin-1")
+READ_YOUR_WRITES_COOKIE = "read_your_writes_until"
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes-Until"
+_READ_YOUR_WRITES_HEADER_RAW = READ_YOUR_WRITES_HEADER.lower().encode("latin-1")
+READ_METHODS = frozenset({"GET", "HEAD"})
 
-class ServiceErrorMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app) -> None:
-        super().__init__(app)
 
-    async def dispatch(self, request: Request, call_next) -> JSONResponse | Response:
-        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
-        request.state.request_id = request_id
+class ServiceErrorMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-        try:
-            response = await call_next(request)
-
-        except ServiceError as exc:
-            logger.warning(
-                "ServiceError: %s %s -> %s (%s) extra=%s request_id=%s",
-                request.method,
-                request.url.path,
-                exc.status_code,
-                exc.message,
-                exc.extra,
-                request_id,
-            )
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-            content = exc.to_dict()
-            return JSONResponse(
-                status_code=exc.status_code,
-                content=jsonable_encoder(content),
-                headers={"X-Request-ID": request_id},
-            )
+        request_id = _get_request_id(scope)
+        scope.setdefault("state", {})["request_id"] = request_id
+        response_started = False
 
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
         except Exception:
             logger.exception(
                 "Неожиданная ошибка %s %s request_id=%s",
-                request.method,
-                request.url.path,
+                scope["method"],
+                scope["path"],
                 request_id,
             )
+            if response_started:
+                raise
 
             content = {
                 "error": {
@@ -55,11 +62,157 @@ class ServiceErrorMiddleware(BaseHTTPMiddleware):
                     "message": "Произошла ошибка",
                 }
             }
-            return JSONResponse(
+            response = JsonResponse(
                 status_code=HTTP_500_INTERNAL_SERVER_ERROR,
-                content=jsonable_encoder(content),
-                headers={"X-Request-ID": request_id},
+                content=content,
+                headers={REQUEST_ID_HEADER: request_id},
             )
+            await response(scope, receive, send)
+
+
+class QueryLogMiddleware:
+    # Отладочный режим: журнал SQL каждого запроса и предупреждение о повторяющихся запросах (N+1)
+    def __init__(self, app: ASGIApp, repeat_threshold: int) -> None:
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries(record=True) as queries:
+            await self.app(scope, receive, send)
+
+        method, path = scope["method"], scope["path"]
+        for sql in queries.statements or ():
+            logger.debug("SQL %s %s: %s", method, path, sql)
+        logger.debug(
+            "%s %s: %d запросов к БД за %.1f мс",
+            method,
+            path,
+            queries.count,
+            queries.seconds * 1000,
+        )
+        for shape, count in queries.repeated(self.repeat_threshold).items():
+            logger.warning("Возможный N+1 в %s %s: %d раз выполнен %s", method, path, count, shape)
+
+
+class ReadRoutingMiddleware:
+    # GET-запросы читают с реплики, кроме окна read-your-writes после записи того же клиента.
+    # Окно хранит клиент: ответ на запись несёт срок в cookie и заголовке, поэтому его видит
+    # любой воркер. Если реплика отказала до начала ответа, запрос повторяется на primary
+    def __init__(self, app: ASGIApp, read_your_writes_seconds: float) -> None:
+        self.app = app
+        self.read_your_writes_seconds = read_your_writes_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] not in READ_METHODS:
+            await self.app(scope, receive, self._send_with_write_mark(send))
+            return
+
+        if _read_your_writes_until(scope) > time.time():
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_tracking_start(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        with replica_reads() as route:
+            try:
+                await self.app(scope, receive, send_tracking_start)
+                return
+            except REPLICA_ERRORS:
+                if route.replica is None or response_started:
+                    raise
+                logger.warning(
+                    "Чтение %s %s с реплики %s не удалось, повтор на primary",
+                    scope["method"],
+                    scope["path"],
+                    route.replica,
+                    exc_info=True,
+                )
+                get_replica_set().mark_down(route.replica)
+
+        await self.app(scope, _replay_empty_body(receive), send)
+
+    def _send_with_write_mark(self, send: Send) -> Send:
+        async def send_with_write_mark(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Абсолютное время, а не счётчик воркера: срок одинаково читается везде
+                until = f"{time.time() + self.read_your_writes_seconds:.3f}"
+                headers = MutableHeaders(scope=message)
+                headers[READ_YOUR_WRITES_HEADER] = until
+                headers.append(
+                    "set-cookie",
+                    f"{READ_YOUR_WRITES_COOKIE}={until}; "
+                    f"Max-Age={math.ceil(self.read_your_writes_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        return send_with_write_mark
+
+
+async def service_error_handler(request: Request, exc: ServiceError) -> JsonResponse:
+    request_id = getattr(request.state, "request_id", None) or str(uuid.uuid4())
+    logger.warning(
+        "ServiceError: %s %s -> %s (%s) extra=%s request_id=%s",
+        request.method,
+        request.url.path,
+        exc.status_code,
+        exc.message,
+        exc.extra,
+        request_id,
+    )
+
+    return JsonResponse(
+        status_code=exc.status_code,
+        content=exc.to_dict(),
+        headers={REQUEST_ID_HEADER: request_id},
+    )
+
+
+def _get_request_id(scope: Scope) -> str:
+    for name, value in scope["headers"]:
+        if name == _REQUEST_ID_HEADER_RAW:
+            return value.decode("latin-1")
+    return str(uuid.uuid4())
+
+
+def _read_your_writes_until(scope: Scope) -> float:
+    # Клиенты без cookie могут вернуть срок из ответа на запись в заголовке
+    value = None
+    for name, raw in scope["headers"]:
+        if name == _READ_YOUR_WRITES_HEADER_RAW:
+            value = raw.decode("latin-1")
+            break
+        if name == b"cookie":
+            value = cookie_parser(raw.decode("latin-1")).get(READ_YOUR_WRITES_COOKIE, value)
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+def _replay_empty_body(receive: Receive) -> Receive:
+    # Тело GET уже могло быть прочитано первой попыткой
+    replayed = False
+
+    async def replay() -> Message:
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return await receive()
 
-        response.headers["X-Request-ID"] = request_id
-        return response
+    return replay
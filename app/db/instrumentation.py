@@ -0,0 +1,119 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Awaitable, Callable, Iterator
+
+from tortoise.backends.asyncpg.client import AsyncpgDBClient
+from tortoise.backends.asyncpg.client import TransactionWrapper as AsyncpgTransactionWrapper
+from tortoise.backends.sqlite.client import SqliteClient, SqliteTransactionWrapper
+
+EXECUTE_METHODS = (
+    "execute_insert",
+    "execute_many",
+    "execute_query",
+    "execute_query_dict",
+    "execute_script",
+)
+CLIENT_CLASSES = (
+    AsyncpgDBClient,
+    AsyncpgTransactionWrapper,
+    SqliteClient,
+    SqliteTransactionWrapper,
+)
+
+
+# Литералы и плейсхолдеры заменяются на ?, списки IN и строки VALUES схлопываются,
+# чтобы запросы, отличающиеся только параметрами, имели одинаковую форму
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|\b\d+(?:\.\d+)?\b")
+_TUPLES = re.compile(r"\((?:\s*\?(?:::\w+)?\s*,?)+\)(?:\s*,\s*\((?:\s*\?(?:::\w+)?\s*,?)+\))*")
+_SPACES = re.compile(r"\s+")
+
+
+class QueryBudgetExceededError(AssertionError):
+    pass
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    statements: list[str] | None = None
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        shapes = Counter(normalize_sql(sql) for sql in self.statements or ())
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+
+# Трекеры могут быть вложены (метрики запроса, журнал запросов, тест), запрос учитывается в каждом
+_current: ContextVar[tuple[QueryStats, ...]] = ContextVar("query_stats", default=())
+# execute_query_dict и обёртки транзакций вызывают другие execute_*, считаем только внешний вызов
+_inside_query: ContextVar[bool] = ContextVar("inside_query", default=False)
+_installed = False
+
+
+def normalize_sql(sql: str) -> str:
+    shape = _LITERALS.sub("?", sql)
+    shape = _TUPLES.sub("(...)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+@contextmanager
+def track_queries(record: bool = False) -> Iterator[QueryStats]:
+    stats = QueryStats(statements=[] if record else None)
+    token = _current.set((*_current.get(), stats))
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    instrument_db_clients()
+    with track_queries(record=True) as stats:
+        yield stats
+
+    if stats.count > limit:
+        statements = "\n".join(stats.statements or ())
+        raise QueryBudgetExceededError(
+            f"Выполнено {stats.count} запросов к БД при лимите {limit}:\n{statements}"
+        )
+
+
+def _instrument(method: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    @wraps(method)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        trackers = _current.get()
+        if not trackers or _inside_query.get():
+            return await method(self, *args, **kwargs)
+
+        token = _inside_query.set(True)
+        started = time.perf_counter()
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            _inside_query.reset(token)
+            for stats in trackers:
+                stats.seconds += elapsed
+                stats.count += 1
+                if stats.statements is not None:
+                    stats.statements.append(args[0] if args else kwargs.get("query", ""))
+
+    return wrapper
+
+
+def instrument_db_clients() -> None:
+    global _installed
+    if _installed:
+        return
+
+    for client_class in CLIENT_CLASSES:
+        for name in EXECUTE_METHODS:
+            if name in client_class.__dict__:
+                setattr(client_class, name, _instrument(client_class.__dict__[name]))
+    _installed = True
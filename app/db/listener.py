@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Callable
+
+import asyncpg
+
+from app.core.config import Settings
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY_SECONDS = 1.0
+MAX_RECONNECT_DELAY_SECONDS = 30.0
+HEALTHCHECK_INTERVAL_SECONDS = 15.0
+
+
+class PgListener:
+    def __init__(
+        self,
+        settings: Settings,
+        channel: str,
+        on_message: Callable[[str], None],
+        on_gap: Callable[[], None],
+    ) -> None:
+        self.settings = settings
+        self.channel = channel
+        self.on_message = on_message
+        self.on_gap = on_gap
+        self.connected = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=f"pg-listener-{self.channel}")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        delay = RECONNECT_DELAY_SECONDS
+        while True:
+            try:
+                await self._listen()
+                delay = RECONNECT_DELAY_SECONDS
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(
+                    "Ошибка LISTEN %s, переподключение через %.1f с", self.channel, delay
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+
+    async def _listen(self) -> None:
+        conn = await asyncpg.connect(
+            host=self.settings.db_host,
+            port=self.settings.db_port,
+            user=self.settings.db_user,
+            password=self.settings.db_password or None,
+            database=self.settings.db_database,
+        )
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _: lost.set())
+        try:
+            await conn.add_listener(self.channel, self._dispatch)
+            # Уведомления, пришедшие до подписки, потеряны
+            self.on_gap()
+            self.connected.set()
+            logger.info("Подписка на канал %s установлена", self.channel)
+            # Оборванное по сети соединение может не прислать завершение, поэтому пингуем
+            while not lost.is_set():
+                try:
+                    await asyncio.wait_for(lost.wait(), HEALTHCHECK_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    await conn.fetchval("SELECT 1", timeout=HEALTHCHECK_INTERVAL_SECONDS)
+            logger.warning("Соединение LISTEN %s потеряно", self.channel)
+        finally:
+            self.connected.clear()
+            self.on_gap()
+            if not conn.is_closed():
+                await conn.close()
+
+    def _dispatch(self, conn: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            self.on_message(payload)
+        except Exception:
+            logger.exception("Ошибка обработки уведомления из канала %s", channel)
+            self.on_gap()
@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from tortoise import connections
+from tortoise.transactions import in_transaction
+
+from app.core.config import Settings, get_settings
+from app.db.sql import POSTGRES, get_dialect
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_FILE_RE = re.compile(r"^(?P<version>\d+)_(?P<name>\w+)\.sql$")
+MIGRATIONS_LOCK_ID = 7_301_904_511
+
+SCHEMA_MIGRATIONS_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+  version       INTEGER PRIMARY KEY,
+  name          VARCHAR(255) NOT NULL,
+  checksum      VARCHAR(64) NOT NULL,
+  applied_at    TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+"""
+
+
+class MigrationError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+
+def load_migrations(directory: Path) -> list[Migration]:
+    migrations: dict[int, Migration] = {}
+    for path in sorted(directory.glob("*.sql")):
+        match = MIGRATION_FILE_RE.match(path.name)
+        if not match:
+            raise MigrationError(f"Некорректное имя файла миграции: {path.name}")
+
+        version = int(match["version"])
+        if version in migrations:
+            raise MigrationError(f"Повторяющаяся версия миграции: {version}")
+
+        migrations[version] = Migration(
+            version=version,
+            name=match["name"],
+            sql=path.read_text(encoding="utf-8"),
+        )
+
+    return [migrations[version] for version in sorted(migrations)]
+
+
+async def apply_migrations(settings: Settings) -> list[Migration]:
+    dialect = get_dialect(connections.get("default"))
+    if dialect != POSTGRES:
+        logger.info("Миграции пропущены для диалекта %s", dialect)
+        return []
+
+    migrations = load_migrations(Path(settings.db_migrations_dir))
+    applied: list[Migration] = []
+
+    async with in_transaction("default") as conn:
+        await conn.execute_query("SELECT pg_advisory_xact_lock($1)", [MIGRATIONS_LOCK_ID])
+        await conn.execute_script(SCHEMA_MIGRATIONS_SQL)
+
+        rows = await conn.execute_query_dict("SELECT version, checksum FROM schema_migrations")
+        known = {row["version"]: row["checksum"] for row in rows}
+
+        for migration in migrations:
+            if migration.version in known:
+                if known[migration.version] != migration.checksum:
+                    logger.warning(
+                        "Миграция %03d_%s изменена после применения",
+                        migration.version,
+                        migration.name,
+                    )
+                continue
+
+            await conn.execute_script(migration.sql)
+            await conn.execute_query(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3)",
+                [migration.version, migration.name, migration.checksum],
+            )
+            applied.append(migration)
+            logger.info("Применена миграция %03d_%s", migration.version, migration.name)
+
+    return applied
+
+
+async def main() -> None:
+    from app.core.logging import configure_logging
+    from app.db.tortoise import close_db, init_db
+
+    settings = get_settings()
+    configure_logging(settings)
+
+    await init_db(settings.model_copy(update={"db_run_migrations": False}))
+    try:
+        applied = await apply_migrations(settings)
+        logger.info("Применено миграций: %s", len(applied))
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
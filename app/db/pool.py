@@ -0,0 +1,101 @@
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import asyncpg
+from tortoise import Tortoise
+from tortoise.backends.asyncpg.client import AsyncpgDBClient
+
+from app.common.errors.base import ServiceError
+
+
+class DatabaseOverloadedError(ServiceError):
+    default_message = "База данных перегружена, повторите запрос позже"
+    default_status_code = 503
+    default_code = "DB_OVERLOADED"
+
+
+@dataclass
+class PoolStats:
+    size: int = 0
+    max_size: int = 0
+    in_use: int = 0
+    idle: int = 0
+    waiting: int = 0
+    acquired: int = 0
+    shed: int = 0
+    acquire_wait_seconds_total: float = 0.0
+    acquire_wait_seconds_max: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class InstrumentedPool:
+    # Tortoise берёт соединения только через acquire/release, остальное проксируем в asyncpg
+    def __init__(self, pool: asyncpg.Pool, acquire_timeout: float | None) -> None:
+        self._pool = pool
+        self.acquire_timeout = acquire_timeout
+        self._stats = PoolStats()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    async def acquire(self) -> asyncpg.Connection:
+        self._stats.waiting += 1
+        started = time.perf_counter()
+        try:
+            connection = await self._pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError as exc:
+            self._stats.shed += 1
+            raise DatabaseOverloadedError(
+                extra={"acquire_timeout_seconds": self.acquire_timeout}
+            ) from exc
+        finally:
+            self._stats.waiting -= 1
+
+        waited = time.perf_counter() - started
+        self._stats.acquired += 1
+        self._stats.acquire_wait_seconds_total += waited
+        self._stats.acquire_wait_seconds_max = max(self._stats.acquire_wait_seconds_max, waited)
+        return connection
+
+    async def release(self, connection: asyncpg.Connection) -> None:
+        await self._pool.release(connection)
+
+    def stats(self) -> PoolStats:
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        return PoolStats(
+            **{
+                **asdict(self._stats),
+                "size": size,
+                "max_size": self._pool.get_max_size(),
+                "in_use": size - idle,
+                "idle": idle,
+            }
+        )
+
+
+class InstrumentedAsyncpgDBClient(AsyncpgDBClient):
+    def __init__(self, *args: Any, acquire_timeout: float | None = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.acquire_timeout = acquire_timeout
+
+    async def create_pool(self, **kwargs: Any) -> InstrumentedPool:
+        pool = await super().create_pool(**kwargs)
+        return InstrumentedPool(pool, self.acquire_timeout)
+
+
+client_class = InstrumentedAsyncpgDBClient
+
+
+def get_pool_stats() -> PoolStats | None:
+    if not Tortoise._inited:
+        return None
+
+    pool = getattr(Tortoise.get_connection("default"), "_pool", None)
+    if not isinstance(pool, InstrumentedPool):
+        return None
+    return pool.stats()
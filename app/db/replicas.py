@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Iterator
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import DBConnectionError, OperationalError
+
+from app.core.config import get_settings
+from app.db.unit_of_work import in_unit_of_work
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "default"
+# Ошибки, после которых чтение повторяется на primary, а реплика временно исключается
+REPLICA_ERRORS = (DBConnectionError, OperationalError, OSError, asyncio.TimeoutError)
+
+
+@dataclass
+class ReadRoute:
+    # Реплика выбирается один раз на запрос, чтобы все чтения видели один снимок
+    replica: str | None = None
+
+
+_route: ContextVar[ReadRoute | None] = ContextVar("read_route", default=None)
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        names: list[str],
+        retry_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.names = names
+        self.retry_seconds = retry_seconds
+        self._clock = clock
+        self._down_until: dict[str, float] = {}
+        self._next = 0
+
+    def choose(self) -> str | None:
+        # По кругу среди доступных; упавшая реплика снова пробуется после retry_seconds
+        now = self._clock()
+        for _ in range(len(self.names)):
+            name = self.names[self._next % len(self.names)]
+            self._next += 1
+            if self._down_until.get(name, 0.0) <= now:
+                return name
+        return None
+
+    def is_available(self, name: str) -> bool:
+        return self._down_until.get(name, 0.0) <= self._clock()
+
+    def mark_down(self, name: str) -> None:
+        if name not in self._down_until:
+            logger.warning("Реплика %s недоступна, чтение переключено на primary", name)
+        self._down_until[name] = self._clock() + self.retry_seconds
+
+    def mark_up(self, name: str) -> None:
+        if self._down_until.pop(name, None) is not None:
+            logger.info("Реплика %s снова доступна", name)
+
+
+class ReadReplicaRouter:
+    # Роутер Tortoise: чтения моделей уходят на реплику, если запрос это разрешил
+    def db_for_read(self, model: Any) -> str | None:
+        return choose_replica()
+
+    def db_for_write(self, model: Any) -> str | None:
+        return None
+
+
+@contextmanager
+def replica_reads() -> Iterator[ReadRoute]:
+    route = ReadRoute()
+    token = _route.set(route)
+    try:
+        yield route
+    finally:
+        _route.reset(token)
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    token = _route.set(None)
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+def choose_replica() -> str | None:
+    route = _route.get()
+    # Внутри транзакции читаем её же соединение, иначе не увидим свои изменения
+    if route is None or in_unit_of_work():
+        return None
+    if route.replica is None:
+        route.replica = get_replica_set().choose()
+    return route.replica
+
+
+def read_connection() -> BaseDBAsyncClient:
+    return connections.get(choose_replica() or PRIMARY)
+
+
+@lru_cache
+def get_replica_set() -> ReplicaSet:
+    settings = get_settings()
+    names = [f"replica_{index}" for index in range(len(settings.replica_dsns))]
+    return ReplicaSet(names, settings.db_replica_retry_seconds)
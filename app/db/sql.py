@@ -0,0 +1,114 @@
+from datetime import datetime
+from typing import Any, Iterable
+from uuid import UUID
+
+import orjson
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+SQLITE = "sqlite"
+POSTGRES = "postgres"
+
+# Строк в одном многострочном запросе, держит число параметров ниже лимитов драйверов
+BULK_CHUNK_SIZE = 1000
+
+
+def get_dialect(conn: BaseDBAsyncClient) -> str:
+    return conn.capabilities.dialect
+
+
+class SqlParams:
+    def __init__(self, dialect: str) -> None:
+        self.dialect = dialect
+        self.values: list[Any] = []
+
+    def __call__(self, value: Any, cast: str | None = None) -> str:
+        if self.dialect == SQLITE:
+            if isinstance(value, UUID):
+                value = str(value)
+            self.values.append(value)
+            return "?"
+
+        self.values.append(value)
+        placeholder = f"${len(self.values)}"
+        if cast:
+            return f"{placeholder}::{cast}"
+        return placeholder
+
+    def in_list(self, column: str, values: Iterable[Any], cast: str | None = None) -> str:
+        values = [value for value in values if value is not None]
+        if not values:
+            return "FALSE"
+
+        if self.dialect == SQLITE:
+            return f"{column} IN ({', '.join(self(value) for value in values)})"
+
+        return f"{column} = ANY({self(values, f'{cast}[]' if cast else None)})"
+
+    def rows(
+        self,
+        columns: list[str],
+        rows: Iterable[Iterable[Any]],
+        casts: list[str | None] | None = None,
+    ) -> str:
+        casts = casts or [None] * len(columns)
+        selects = []
+        for row in rows:
+            values = ", ".join(
+                f"{self(value, cast)} AS {column}"
+                for column, value, cast in zip(columns, row, casts, strict=True)
+            )
+            selects.append(f"SELECT {values}")
+        return " UNION ALL ".join(selects)
+
+    def value_rows(
+        self, rows: Iterable[Iterable[Any]], casts: list[str | None] | None = None
+    ) -> str:
+        groups = []
+        for row in rows:
+            row = list(row)
+            row_casts = casts or [None] * len(row)
+            placeholders = ", ".join(
+                self(value, cast) for value, cast in zip(row, row_casts, strict=True)
+            )
+            groups.append(f"({placeholders})")
+        return ", ".join(groups)
+
+    def unnest(self, columns: list[str], rows: Iterable[Iterable[Any]], casts: list[str]) -> str:
+        # Все строки передаются одним параметром на колонку (в SQLite одним JSON), поэтому
+        # запрос не нужно дробить на пачки при любом числе строк
+        rows = [list(row) for row in rows]
+        if self.dialect == SQLITE:
+            data = orjson.dumps(rows, default=str, option=orjson.OPT_PASSTHROUGH_DATETIME).decode()
+            values = ", ".join(
+                f"json_extract(value, '$[{index}]') AS {column}"
+                for index, column in enumerate(columns)
+            )
+            return f"SELECT {values} FROM json_each({self(data)})"
+
+        arrays = ", ".join(
+            self([row[index] for row in rows], f"{cast}[]") for index, cast in enumerate(casts)
+        )
+        return f"SELECT * FROM unnest({arrays}) AS t({', '.join(columns)})"
+
+    def not_in_list(self, column: str, values: Iterable[Any], cast: str | None = None) -> str:
+        values = [value for value in values if value is not None]
+        if not values:
+            return "TRUE"
+        return f"NOT ({self.in_list(column, values, cast)})"
+
+
+def chunked(items: list[Any], size: int = BULK_CHUNK_SIZE) -> Iterable[list[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def to_uuid(value: Any) -> UUID | None:
+    if value is None or isinstance(value, UUID):
+        return value
+    return UUID(str(value))
+
+
+def to_datetime(value: Any) -> datetime | None:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
@@ -1,23 +1,30 @@
+import asyncio
 import logging
 
 from tortoise import Tortoise
 
 from app.core.config import Settings
+from app.db.migrations import apply_migrations
+from app.db.replicas import get_replica_set
 
 logger = logging.getLogger(__name__)
 
 
 async def init_db(settings: Settings) -> None:
     try:
-        await Tortoise.init(
-            db_url=settings.db_dsn,
-            modules={"models": ["app.models"]},
-        )
+        await Tortoise.init(config=settings.tortoise_config)
         logger.info("Tortoise ORM Инициализирована")
     except Exception:
         logger.exception("Ошибка инициализации Tortoise ORM")
         raise
 
+    if settings.db_run_migrations:
+        try:
+            await apply_migrations(settings)
+        except Exception:
+            logger.exception("Ошибка применения миграций")
+            raise
+
 
 async def close_db() -> None:
     try:
@@ -35,3 +42,24 @@ async def db_check() -> bool:
     except Exception:
         logger.exception("При попытке проверить подключение к базе произошла ошибка")
         return False
+
+
+async def replicas_check() -> dict[str, bool]:
+    replicas = get_replica_set()
+    results = await asyncio.gather(*(_replica_check(name) for name in replicas.names))
+    status = dict(zip(replicas.names, results, strict=True))
+    for name, ok in status.items():
+        if ok:
+            replicas.mark_up(name)
+        else:
+            replicas.mark_down(name)
+    return status
+
+
+async def _replica_check(name: str) -> bool:
+    try:
+        await Tortoise.get_connection(name).execute_query("SELECT 1")
+        return True
+    except Exception:
+        logger.warning("Реплика %s не отвечает на проверку", name, exc_info=True)
+        return False
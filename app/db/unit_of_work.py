@@ -0,0 +1,51 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+AfterCommit = Callable[[], Awaitable[None]]
+
+
+class UnitOfWork:
+    def __init__(self) -> None:
+        self.after_commit_callbacks: list[AfterCommit] = []
+
+    def after_commit(self, callback: AfterCommit) -> None:
+        self.after_commit_callbacks.append(callback)
+
+
+_current: ContextVar[UnitOfWork | None] = ContextVar("unit_of_work", default=None)
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncIterator[BaseDBAsyncClient]:
+    # Вложенный вызов присоединяется к внешней транзакции
+    if _current.get() is not None:
+        yield connections.get("default")
+        return
+
+    uow = UnitOfWork()
+    token = _current.set(uow)
+    try:
+        async with in_transaction("default") as conn:
+            yield conn
+    finally:
+        _current.reset(token)
+
+    for callback in uow.after_commit_callbacks:
+        await callback()
+
+
+async def run_after_commit(callback: AfterCommit) -> None:
+    uow = _current.get()
+    if uow is None:
+        await callback()
+    else:
+        uow.after_commit(callback)
+
+
+def in_unit_of_work() -> bool:
+    return _current.get() is not None
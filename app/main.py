@@ -1,14 +1,30 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from typing import AsyncIterator
 
 from fastapi import FastAPI
 
 from app.api.routes.top import api_router
+from app.common.errors.base import ServiceError
+from app.common.responses import JsonResponse
 from app.core.config import get_settings
+from app.core.idempotency import IdempotencyMiddleware, purge_expired_keys
 from app.core.logging import configure_logging
-from app.core.middleware import ServiceErrorMiddleware
+from app.core.metrics import METRICS_PATH, MetricsMiddleware, mark_worker_dead, metrics_endpoint
+from app.core.middleware import (
+    QueryLogMiddleware,
+    ReadRoutingMiddleware,
+    ServiceErrorMiddleware,
+    service_error_handler,
+)
+from app.db.instrumentation import instrument_db_clients
 from app.db.tortoise import close_db, init_db
+from app.services.dto_cache import create_invalidation_listener
+from app.services.outbox.outbox_service import get_webhook_dispatcher
+from app.services.review_stream.review_stream_service import create_review_listener
+from app.services.stats.stats_service import reconcile_stats_periodically
+from app.services.users.users_service import get_activity_buffer
 
 
 @asynccontextmanager
@@ -29,15 +45,58 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     except Exception:
         logger.exception("Ошибка подключения базы данных")
 
+    cache_listener = create_invalidation_listener(settings)
+    if cache_listener is not None:
+        cache_listener.start()
+
+    review_listener = create_review_listener(settings)
+    if review_listener is not None:
+        review_listener.start()
+
+    purge_task = None
+    if settings.idempotency_enabled:
+        purge_task = asyncio.create_task(
+            purge_expired_keys(settings.idempotency_purge_interval_seconds)
+        )
+
+    reconcile_task = asyncio.create_task(
+        reconcile_stats_periodically(settings.stats_reconcile_interval_seconds)
+    )
+
+    # Без WEBHOOK_URLS воркеры не запускаются
+    get_webhook_dispatcher().start()
+
     app.state.app_initialized = True
 
     yield
 
     app.state.app_initialized = False
 
+    if cache_listener is not None:
+        await cache_listener.stop()
+
+    if review_listener is not None:
+        await review_listener.stop()
+
+    if purge_task is not None:
+        purge_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await purge_task
+
+    reconcile_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await reconcile_task
+
+    # Отложенные изменения пишутся до закрытия соединений
+    await get_activity_buffer().close()
+    # Неотправленные события остаются в outbox и уйдут после перезапуска
+    await get_webhook_dispatcher().stop()
+
     await close_db()
     app.state.db_initialized = False
 
+    mark_worker_dead()
+
 
 def create_app() -> FastAPI:
     settings = get_settings()
@@ -46,10 +105,40 @@ def create_app() -> FastAPI:
         title=settings.app_name,
         debug=settings.debug,
         lifespan=lifespan,
+        default_response_class=JsonResponse,
     )
 
     app.include_router(api_router, prefix="/api/v1")
+
+    if settings.idempotency_enabled:
+        app.add_middleware(
+            IdempotencyMiddleware,
+            ttl_seconds=settings.idempotency_ttl_seconds,
+            lease_seconds=settings.idempotency_lease_seconds,
+            wait_seconds=settings.idempotency_wait_seconds,
+            cache_max_entries=settings.idempotency_cache_max_entries,
+        )
+
+    if settings.replica_dsns:
+        app.add_middleware(
+            ReadRoutingMiddleware,
+            read_your_writes_seconds=settings.db_read_your_writes_seconds,
+        )
+
     app.add_middleware(ServiceErrorMiddleware)
+    app.add_exception_handler(ServiceError, service_error_handler)
+
+    if settings.metrics_enabled:
+        instrument_db_clients()
+        app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+        app.add_route(METRICS_PATH, metrics_endpoint, include_in_schema=False)
+
+    if settings.query_log_enabled:
+        instrument_db_clients()
+        app.add_middleware(
+            QueryLogMiddleware,
+            repeat_threshold=settings.query_repeat_threshold,
+        )
 
     return app
 
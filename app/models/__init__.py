@@ -1,13 +1,23 @@
+from .idempotency_keys import IdempotencyKey
+from .outbox_events import OutboxEvent
 from .pull_request_reviewers import PullRequestReviewer
 from .pull_requests import PullRequest
+from .reviewer_loads import ReviewerLoad
+from .stat_counters import StatCounter
 from .team_members import TeamMember
 from .teams import Team
 from .users import User
+from .webhook_target_slots import WebhookTargetSlot
 
 __all__ = [
+    "IdempotencyKey",
+    "OutboxEvent",
     "PullRequestReviewer",
     "PullRequest",
+    "ReviewerLoad",
+    "StatCounter",
     "TeamMember",
     "Team",
     "User",
+    "WebhookTargetSlot",
 ]
@@ -0,0 +1,21 @@
+from tortoise import fields
+from tortoise.indexes import Index
+
+from app.models.base import BaseModel
+
+
+class IdempotencyKey(BaseModel):
+    key = fields.CharField(max_length=255, unique=True)
+    # sha256 метода, пути и тела: тот же ключ с другим запросом отклоняется
+    fingerprint = fields.CharField(max_length=64)
+
+    # NULL пока первый запрос выполняется
+    status_code = fields.IntField(null=True)
+    content_type = fields.CharField(max_length=255, null=True)
+    body = fields.TextField(null=True)
+
+    expires_at = fields.DatetimeField()
+
+    class Meta:
+        table = "idempotency_keys"
+        indexes = (Index(fields=("expires_at",), name="ix_idempotency_keys_expires"),)
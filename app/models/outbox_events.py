@@ -0,0 +1,33 @@
+from enum import Enum
+
+from tortoise import fields
+from tortoise.indexes import Index
+
+from app.models.base import BaseModel
+
+
+class OutboxStatus(str, Enum):
+    PENDING = "PENDING"
+    DELIVERED = "DELIVERED"
+    FAILED = "FAILED"
+
+
+class OutboxEvent(BaseModel):
+    # Строка на пару (событие, получатель): повторы и статус доставки у каждого свои
+    event_id = fields.UUIDField()
+    event_type = fields.CharField(max_length=64)
+    target = fields.CharField(max_length=2048)
+    payload = fields.TextField()
+
+    status = fields.CharEnumField(OutboxStatus, max_length=16, default=OutboxStatus.PENDING)
+    attempts = fields.IntField(default=0)
+    # Для взятой в отправку строки — конец аренды, после него строку заберёт другой воркер
+    next_attempt_at = fields.DatetimeField()
+    delivered_at = fields.DatetimeField(null=True)
+    last_error = fields.TextField(null=True)
+
+    class Meta:
+        table = "outbox_events"
+        indexes = (
+            Index(fields=("target", "status", "next_attempt_at"), name="ix_outbox_events_due"),
+        )
@@ -1,6 +1,8 @@
 from tortoise import fields
+from tortoise.indexes import Index
 
 from app.models.base import BaseModel
+from app.models.pull_requests import PRStatus
 
 
 class PullRequestReviewer(BaseModel):
@@ -15,6 +17,20 @@ class PullRequestReviewer(BaseModel):
         on_delete=fields.CASCADE,
     )
 
+    # Копия статуса PR: очередь ревьювера читается по индексу без обхода всей истории
+    pr_status = fields.CharEnumField(PRStatus, max_length=50, default=PRStatus.OPEN)
+
     class Meta:
         table = "pull_request_reviewers"
         unique_together = ("pr", "reviewer")
+        indexes = (
+            Index(fields=("reviewer_id", "pr_id"), name="ix_pull_request_reviewers_reviewer_pr"),
+            Index(
+                fields=("reviewer_id", "created_at", "id"),
+                name="ix_pull_request_reviewers_reviewer_created",
+            ),
+            Index(
+                fields=("reviewer_id", "pr_status", "created_at", "id"),
+                name="ix_pull_request_reviewers_reviewer_status_created",
+            ),
+        )
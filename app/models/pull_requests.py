@@ -1,6 +1,7 @@
 from enum import Enum
 
 from tortoise import fields
+from tortoise.indexes import Index
 
 from app.models.base import BaseModel
 
@@ -23,3 +24,7 @@ class PullRequest(BaseModel):
 
     class Meta:
         table = "pull_requests"
+        indexes = (
+            Index(fields=("created_at", "id"), name="ix_pull_requests_created"),
+            Index(fields=("author_id",), name="ix_pull_requests_author"),
+        )
@@ -0,0 +1,17 @@
+from tortoise import fields
+
+from app.models.base import BaseModel
+
+
+class ReviewerLoad(BaseModel):
+    user = fields.OneToOneField(
+        "models.User",
+        related_name="reviewer_load",
+        on_delete=fields.CASCADE,
+    )
+
+    open_reviews = fields.IntField(default=0)
+    last_assigned_at = fields.DatetimeField(null=True)
+
+    class Meta:
+        table = "reviewer_loads"
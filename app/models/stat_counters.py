@@ -0,0 +1,18 @@
+from tortoise import fields, models
+from tortoise.indexes import Index
+
+
+class StatCounter(models.Model):
+    # Счётчик разбит на слоты: параллельные транзакции увеличивают разные строки и не ждут
+    # друг друга, значение счётчика - сумма его слотов
+    key = fields.CharField(max_length=128, primary_key=True)
+    scope = fields.CharField(max_length=16)
+    subject_id = fields.UUIDField(null=True)
+    metric = fields.CharField(max_length=32)
+    slot = fields.SmallIntField()
+    value = fields.BigIntField(default=0)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "stat_counters"
+        indexes = (Index(fields=("scope", "subject_id"), name="ix_stat_counters_subject"),)
@@ -1,4 +1,5 @@
 from tortoise import fields
+from tortoise.indexes import Index
 
 from app.models.base import BaseModel
 
@@ -18,3 +19,5 @@ class TeamMember(BaseModel):
 
     class Meta:
         table = "team_members"
+        unique_together = (("user",),)
+        indexes = (Index(fields=("team_id", "user_id"), name="ix_team_members_team_user"),)
@@ -1,4 +1,5 @@
 from tortoise import fields
+from tortoise.indexes import Index
 
 from app.models.base import BaseModel
 
@@ -8,3 +9,4 @@ class Team(BaseModel):
 
     class Meta:
         table = "teams"
+        indexes = (Index(fields=("created_at", "id"), name="ix_teams_created"),)
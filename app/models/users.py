@@ -1,8 +1,10 @@
 from tortoise import fields
+from tortoise.indexes import Index
 
 from app.models.base import BaseModel
 from app.models.pull_request_reviewers import PullRequestReviewer
 from app.models.pull_requests import PullRequest
+from app.models.reviewer_loads import ReviewerLoad
 from app.models.team_members import TeamMember
 
 
@@ -13,6 +15,8 @@ class User(BaseModel):
     authored_prs: fields.ReverseRelation["PullRequest"]
     team_memberships: fields.ReverseRelation["TeamMember"]
     pr_reviews: fields.ReverseRelation["PullRequestReviewer"]
+    reviewer_load: fields.BackwardOneToOneRelation["ReviewerLoad"]
 
     class Meta:
         table = "users"
+        indexes = (Index(fields=("created_at", "id"), name="ix_users_created"),)
@@ -0,0 +1,16 @@
+from tortoise import fields
+
+from app.models.base import BaseModel
+
+
+class WebhookTargetSlot(BaseModel):
+    # Слот одновременной отправки на получателя, общий для всех воркеров: пачку отправляет
+    # только тот, кто взял слот в аренду
+    target = fields.CharField(max_length=2048)
+    slot = fields.SmallIntField()
+    lease_id = fields.UUIDField(null=True)
+    leased_until = fields.DatetimeField()
+
+    class Meta:
+        table = "webhook_target_slots"
+        unique_together = ("target", "slot")
@@ -0,0 +1,198 @@
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from typing import Awaitable, Callable, Iterable, TypeVar
+from uuid import UUID
+
+from tortoise import connections
+
+from app.common.cache import AsyncTTLCache, CacheStats
+from app.core.config import Settings, get_settings
+from app.db.listener import PgListener
+from app.db.replicas import primary_reads
+from app.db.sql import POSTGRES, get_dialect
+from app.db.unit_of_work import run_after_commit
+from app.services.teams.schemas import TeamDto
+from app.services.users.schemas import UserDto
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "dto_cache_invalidation"
+# Лимит payload у NOTIFY 8000 байт, при превышении сбрасываем кэш целиком
+MAX_PAYLOAD_BYTES = 7900
+
+WORKER_ID = uuid.uuid4().hex[:12]
+
+T = TypeVar("T")
+
+
+@dataclass
+class CacheInvalidation:
+    team_ids: set[UUID] = field(default_factory=set)
+    user_ids: set[UUID] = field(default_factory=set)
+    team_names: set[str] = field(default_factory=set)
+    flush: bool = False
+
+    def encode(self) -> str:
+        payload = json.dumps(
+            {
+                "w": WORKER_ID,
+                "t": [str(team_id) for team_id in self.team_ids],
+                "u": [str(user_id) for user_id in self.user_ids],
+                "n": list(self.team_names),
+            },
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+            return json.dumps({"w": WORKER_ID, "f": 1}, separators=(",", ":"))
+        return payload
+
+    @classmethod
+    def decode(cls, payload: str) -> tuple[str, "CacheInvalidation"]:
+        data = json.loads(payload)
+        return data["w"], cls(
+            team_ids={UUID(team_id) for team_id in data.get("t", [])},
+            user_ids={UUID(user_id) for user_id in data.get("u", [])},
+            team_names=set(data.get("n", [])),
+            flush=bool(data.get("f")),
+        )
+
+
+class DtoCache:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._team_by_user: dict[UUID, UUID] = {}
+        self.teams: AsyncTTLCache[UUID, TeamDto] = AsyncTTLCache(
+            maxsize, ttl, on_remove=self._forget_team_members
+        )
+        self.team_ids: AsyncTTLCache[str, UUID] = AsyncTTLCache(maxsize, ttl)
+        self.users: AsyncTTLCache[UUID, UserDto] = AsyncTTLCache(maxsize, ttl)
+
+    # Загрузки идут в primary: инвалидация приходит после COMMIT, и отстающая реплика
+    # положила бы в кэш старые данные на весь TTL
+    async def get_team(self, team_id: UUID, loader: Callable[[], Awaitable[TeamDto]]) -> TeamDto:
+        async def load() -> TeamDto:
+            with primary_reads():
+                team = await loader()
+            for member in team.members:
+                self._team_by_user[member.user_id] = team_id
+            return team
+
+        return await self.teams.get_or_load(team_id, load)
+
+    async def get_team_id(self, name: str, loader: Callable[[], Awaitable[UUID]]) -> UUID:
+        return await self.team_ids.get_or_load(name, partial(_load_from_primary, loader))
+
+    async def get_user(self, user_id: UUID, loader: Callable[[], Awaitable[UserDto]]) -> UserDto:
+        return await self.users.get_or_load(user_id, partial(_load_from_primary, loader))
+
+    def invalidate_teams(self, team_ids: Iterable[UUID]) -> None:
+        for team_id in set(team_ids):
+            self.teams.invalidate(team_id)
+
+    def invalidate_team_name(self, name: str) -> None:
+        self.team_ids.invalidate(name)
+
+    def invalidate_users(self, user_ids: Iterable[UUID]) -> None:
+        user_ids = set(user_ids)
+        team_ids = {self._team_by_user[uid] for uid in user_ids if uid in self._team_by_user}
+        for user_id in user_ids:
+            self.users.invalidate(user_id)
+        self.invalidate_teams(team_ids)
+        # Состав ещё не загруженных команд неизвестен, поэтому их загрузки не кэшируем
+        self.teams.invalidate_inflight()
+
+    def apply(self, invalidation: CacheInvalidation) -> None:
+        if invalidation.flush:
+            self.clear()
+            return
+
+        self.invalidate_teams(invalidation.team_ids)
+        for name in invalidation.team_names:
+            self.invalidate_team_name(name)
+        if invalidation.user_ids:
+            self.invalidate_users(invalidation.user_ids)
+
+    def clear(self) -> None:
+        self.teams.clear()
+        self.team_ids.clear()
+        self.users.clear()
+        self._team_by_user.clear()
+
+    def stats(self) -> dict[str, CacheStats]:
+        return {
+            "teams": self.teams.stats(),
+            "team_ids": self.team_ids.stats(),
+            "users": self.users.stats(),
+        }
+
+    def _forget_team_members(self, team_id: UUID, team: TeamDto) -> None:
+        for member in team.members:
+            if self._team_by_user.get(member.user_id) == team_id:
+                del self._team_by_user[member.user_id]
+
+
+async def _load_from_primary(loader: Callable[[], Awaitable[T]]) -> T:
+    with primary_reads():
+        return await loader()
+
+
+@lru_cache
+def get_dto_cache() -> DtoCache:
+    settings = get_settings()
+    maxsize = settings.dto_cache_max_entries if settings.dto_cache_enabled else 0
+    return DtoCache(maxsize=maxsize, ttl=settings.dto_cache_ttl_seconds)
+
+
+async def invalidate_dto_cache(
+    team_ids: Iterable[UUID] = (),
+    user_ids: Iterable[UUID] = (),
+    team_names: Iterable[str | None] = (),
+) -> None:
+    invalidation = CacheInvalidation(
+        team_ids=set(team_ids),
+        user_ids=set(user_ids),
+        team_names={name for name in team_names if name is not None},
+    )
+    # Инвалидация до COMMIT позволила бы параллельной загрузке закэшировать старые данные
+    await run_after_commit(partial(_publish_invalidation, invalidation))
+
+
+async def _publish_invalidation(invalidation: CacheInvalidation) -> None:
+    get_dto_cache().apply(invalidation)
+
+    if not get_settings().dto_cache_bus_enabled:
+        return
+
+    conn = connections.get("default")
+    if get_dialect(conn) == POSTGRES:
+        await conn.execute_query(
+            "SELECT pg_notify($1, $2)", [INVALIDATION_CHANNEL, invalidation.encode()]
+        )
+
+
+def handle_invalidation_message(payload: str) -> None:
+    worker_id, invalidation = CacheInvalidation.decode(payload)
+    if worker_id != WORKER_ID:
+        get_dto_cache().apply(invalidation)
+
+
+def flush_dto_cache() -> None:
+    logger.info("Сброс кэша DTO")
+    get_dto_cache().clear()
+
+
+def create_invalidation_listener(settings: Settings) -> PgListener | None:
+    if not settings.dto_cache_enabled or not settings.dto_cache_bus_enabled:
+        return None
+    if settings.db_schema.startswith("sqlite"):
+        return None
+
+    return PgListener(
+        settings,
+        INVALIDATION_CHANNEL,
+        on_message=handle_invalidation_message,
+        on_gap=flush_dto_cache,
+    )
@@ -0,0 +1,24 @@
+from app.common.errors.base import ServiceError
+
+
+class IdempotencyError(ServiceError):
+    default_message = "Произошла ошибка обработки ключа идемпотентности"
+    default_code = "IDEMPOTENCY_ERROR"
+
+
+class IdempotencyKeyInvalidError(IdempotencyError):
+    default_message = "Некорректный ключ идемпотентности"
+    default_status_code = 400
+    default_code = "INVALID_IDEMPOTENCY_KEY"
+
+
+class IdempotencyKeyReusedError(IdempotencyError):
+    default_message = "Ключ идемпотентности уже использован для другого запроса"
+    default_status_code = 422
+    default_code = "IDEMPOTENCY_KEY_REUSED"
+
+
+class IdempotencyKeyInProgressError(IdempotencyError):
+    default_message = "Запрос с этим ключом идемпотентности ещё выполняется"
+    default_status_code = 409
+    default_code = "IDEMPOTENCY_KEY_IN_PROGRESS"
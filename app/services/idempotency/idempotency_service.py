@@ -0,0 +1,115 @@
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+
+from tortoise import connections, timezone
+
+from app.db.sql import SqlParams, get_dialect
+
+
+@dataclass(frozen=True)
+class IdempotencyRecord:
+    fingerprint: str
+    status_code: int | None = None
+    content_type: str | None = None
+    body: str = ""
+
+    @property
+    def completed(self) -> bool:
+        return self.status_code is not None
+
+
+class IdempotencyService:
+    @staticmethod
+    async def claim(key: str, fingerprint: str, lease_seconds: float) -> bool:
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        now = timezone.now()
+        # Истёкшая запись (в том числе брошенная упавшим воркером) захватывается заново
+        sql = f"""
+            INSERT INTO idempotency_keys
+                (id, created_at, updated_at, key, fingerprint, expires_at)
+            VALUES (
+                {p(uuid.uuid4())}, {p(now)}, {p(now)}, {p(key)}, {p(fingerprint)},
+                {p(now + timedelta(seconds=lease_seconds))}
+            )
+            ON CONFLICT (key) DO UPDATE
+            SET fingerprint = EXCLUDED.fingerprint,
+                status_code = NULL,
+                content_type = NULL,
+                body = NULL,
+                expires_at = EXCLUDED.expires_at,
+                updated_at = EXCLUDED.updated_at
+            WHERE idempotency_keys.expires_at <= {p(now, "timestamptz")}
+            RETURNING id
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        return bool(rows)
+
+    @staticmethod
+    async def get(key: str) -> IdempotencyRecord | None:
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        sql = f"""
+            SELECT fingerprint, status_code, content_type, body
+            FROM idempotency_keys
+            WHERE key = {p(key)} AND expires_at > {p(timezone.now(), "timestamptz")}
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        if not rows:
+            return None
+        return IdempotencyRecord(
+            fingerprint=rows[0]["fingerprint"],
+            status_code=rows[0]["status_code"],
+            content_type=rows[0]["content_type"],
+            body=rows[0]["body"] or "",
+        )
+
+    @staticmethod
+    async def complete(key: str, record: IdempotencyRecord, ttl_seconds: float) -> None:
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        now = timezone.now()
+        sql = f"""
+            UPDATE idempotency_keys
+            SET status_code = {p(record.status_code)},
+                content_type = {p(record.content_type)},
+                body = {p(record.body)},
+                expires_at = {p(now + timedelta(seconds=ttl_seconds))},
+                updated_at = {p(now)}
+            WHERE key = {p(key)} AND fingerprint = {p(record.fingerprint)}
+        """
+        await conn.execute_query(sql, p.values)
+
+    @staticmethod
+    async def extend(key: str, fingerprint: str, lease_seconds: float) -> bool:
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        now = timezone.now()
+        sql = f"""
+            UPDATE idempotency_keys
+            SET expires_at = {p(now + timedelta(seconds=lease_seconds))},
+                updated_at = {p(now)}
+            WHERE key = {p(key)} AND fingerprint = {p(fingerprint)} AND status_code IS NULL
+            RETURNING id
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        return bool(rows)
+
+    @staticmethod
+    async def release(key: str, fingerprint: str) -> None:
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        sql = f"""
+            DELETE FROM idempotency_keys
+            WHERE key = {p(key)} AND fingerprint = {p(fingerprint)} AND status_code IS NULL
+        """
+        await conn.execute_query(sql, p.values)
+
+    @staticmethod
+    async def purge_expired() -> int:
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        sql = f"DELETE FROM idempotency_keys WHERE expires_at <= {p(timezone.now(), 'timestamptz')}"
+        deleted, _ = await conn.execute_query(sql, p.values)
+        return deleted
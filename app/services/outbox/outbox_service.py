@@ -0,0 +1,217 @@
+import uuid
+from datetime import timedelta
+from functools import lru_cache
+from typing import Iterable
+from uuid import UUID
+
+from tortoise import connections, timezone
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.common.webhooks import WebhookDelivery, WebhookDispatcher
+from app.core.config import get_settings
+from app.db.sql import POSTGRES, SqlParams, get_dialect, to_uuid
+from app.db.unit_of_work import run_after_commit
+from app.models.outbox_events import OutboxStatus
+from app.services.outbox.schemas import WebhookEvent
+
+
+class OutboxService:
+    @staticmethod
+    async def add_events(conn: BaseDBAsyncClient, events: Iterable[WebhookEvent]) -> None:
+        # Пишется в транзакции изменения: событие уходит тогда и только тогда, когда
+        # изменение зафиксировано
+        targets = get_settings().webhook_targets
+        events = list(events)
+        if not targets or not events:
+            return
+
+        rows = []
+        for event in events:
+            payload = event.model_dump_json()
+            for target in targets:
+                rows.append((uuid.uuid4(), event.event_id, event.event_type, target, payload))
+
+        now = timezone.now()
+        p = SqlParams(get_dialect(conn))
+        columns = ["id", "event_id", "event_type", "target", "payload"]
+        sql = f"""
+            INSERT INTO outbox_events
+                (id, created_at, updated_at, event_id, event_type, target, payload,
+                 status, attempts, next_attempt_at)
+            SELECT e.id, {p(now, "timestamptz")}, {p(now, "timestamptz")}, e.event_id,
+                   e.event_type, e.target, e.payload, {p(OutboxStatus.PENDING.value)}, 0,
+                   {p(now, "timestamptz")}
+            FROM ({p.unnest(columns, rows, ["uuid", "uuid", "text", "text", "text"])}) AS e
+        """
+        await conn.execute_query(sql, p.values)
+        await run_after_commit(get_webhook_dispatcher().wake)
+
+    @staticmethod
+    async def acquire_slot(target: str, limit: int, lease_seconds: float) -> UUID | None:
+        # Предел одновременных отправок на получателя общий для всех воркеров и процессов
+        conn = connections.get("default")
+        lease_id = await OutboxService._lease_slot(conn, target, limit, lease_seconds)
+        if lease_id is None and await OutboxService._add_slots(conn, target, limit):
+            lease_id = await OutboxService._lease_slot(conn, target, limit, lease_seconds)
+        return lease_id
+
+    @staticmethod
+    async def release_slot(lease_id: UUID) -> None:
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        now = timezone.now()
+        sql = f"""
+            UPDATE webhook_target_slots
+            SET lease_id = NULL,
+                leased_until = {p(now, "timestamptz")},
+                updated_at = {p(now, "timestamptz")}
+            WHERE lease_id = {p(lease_id, "uuid")}
+        """
+        await conn.execute_query(sql, p.values)
+
+    @staticmethod
+    async def _lease_slot(
+        conn: BaseDBAsyncClient, target: str, limit: int, lease_seconds: float
+    ) -> UUID | None:
+        # Аренда, а не блокировка: слот упавшего воркера освободится после lease_seconds
+        dialect = get_dialect(conn)
+        p = SqlParams(dialect)
+        now = timezone.now()
+        lease_id = uuid.uuid4()
+        sql = f"""
+            UPDATE webhook_target_slots
+            SET lease_id = {p(lease_id, "uuid")},
+                leased_until = {p(now + timedelta(seconds=lease_seconds), "timestamptz")},
+                updated_at = {p(now, "timestamptz")}
+            WHERE id = (
+                SELECT id FROM webhook_target_slots
+                WHERE target = {p(target)}
+                  AND slot < {p(limit)}
+                  AND leased_until <= {p(now, "timestamptz")}
+                ORDER BY slot
+                LIMIT 1
+                {"FOR UPDATE SKIP LOCKED" if dialect == POSTGRES else ""}
+            )
+            RETURNING id
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        return lease_id if rows else None
+
+    @staticmethod
+    async def _add_slots(conn: BaseDBAsyncClient, target: str, limit: int) -> bool:
+        p = SqlParams(get_dialect(conn))
+        now = timezone.now()
+        values = p.value_rows(
+            ((uuid.uuid4(), now, now, target, slot, now) for slot in range(limit)),
+            ["uuid", "timestamptz", "timestamptz", None, "smallint", "timestamptz"],
+        )
+        sql = f"""
+            INSERT INTO webhook_target_slots
+                (id, created_at, updated_at, target, slot, leased_until)
+            VALUES {values}
+            ON CONFLICT (target, slot) DO NOTHING
+            RETURNING id
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        return bool(rows)
+
+    @staticmethod
+    async def claim(target: str, limit: int, lease_seconds: float) -> list[WebhookDelivery]:
+        # Аренда вместо блокировки на время HTTP-запроса: строки упавшего воркера
+        # снова станут доступны после lease_seconds, поэтому доставка не реже одного раза
+        conn = connections.get("default")
+        dialect = get_dialect(conn)
+        p = SqlParams(dialect)
+        now = timezone.now()
+        sql = f"""
+            UPDATE outbox_events
+            SET attempts = attempts + 1,
+                next_attempt_at = {p(now + timedelta(seconds=lease_seconds), "timestamptz")},
+                updated_at = {p(now, "timestamptz")}
+            WHERE id IN (
+                SELECT id FROM outbox_events
+                WHERE target = {p(target)}
+                  AND status = {p(OutboxStatus.PENDING.value)}
+                  AND next_attempt_at <= {p(now, "timestamptz")}
+                ORDER BY next_attempt_at
+                LIMIT {p(limit)}
+                {"FOR UPDATE SKIP LOCKED" if dialect == POSTGRES else ""}
+            )
+            RETURNING id, event_id, payload, attempts, created_at
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        rows = sorted(rows, key=lambda row: (str(row["created_at"]), str(row["id"])))
+        return [
+            WebhookDelivery(
+                id=to_uuid(row["id"]),
+                event_id=to_uuid(row["event_id"]),
+                payload=row["payload"],
+                attempts=row["attempts"],
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    async def mark_delivered(ids: list[UUID]) -> None:
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        sql = f"""
+            UPDATE outbox_events
+            SET status = {p(OutboxStatus.DELIVERED.value)},
+                delivered_at = {p(timezone.now(), "timestamptz")},
+                last_error = NULL
+            WHERE {p.in_list("id", ids, "uuid")}
+        """
+        await conn.execute_query(sql, p.values)
+
+    @staticmethod
+    async def mark_retry(
+        ids: list[UUID], error: str, delay_seconds: float, max_attempts: int
+    ) -> int:
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        next_attempt_at = timezone.now() + timedelta(seconds=delay_seconds)
+        sql = f"""
+            UPDATE outbox_events
+            SET next_attempt_at = {p(next_attempt_at, "timestamptz")},
+                last_error = {p(error)},
+                status = CASE
+                    WHEN attempts >= {p(max_attempts)} THEN {p(OutboxStatus.FAILED.value)}
+                    ELSE status
+                END
+            WHERE {p.in_list("id", ids, "uuid")}
+            RETURNING status
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        return sum(1 for row in rows if row["status"] == OutboxStatus.FAILED.value)
+
+    @staticmethod
+    async def purge_delivered(retention_seconds: float) -> int:
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        cutoff = timezone.now() - timedelta(seconds=retention_seconds)
+        sql = f"""
+            DELETE FROM outbox_events
+            WHERE status = {p(OutboxStatus.DELIVERED.value)}
+              AND delivered_at < {p(cutoff, "timestamptz")}
+        """
+        deleted, _ = await conn.execute_query(sql, p.values)
+        return deleted
+
+
+@lru_cache
+def get_webhook_dispatcher() -> WebhookDispatcher:
+    settings = get_settings()
+    return WebhookDispatcher(
+        OutboxService,
+        targets=settings.webhook_targets,
+        batch_size=settings.webhook_batch_size,
+        concurrency_per_target=settings.webhook_concurrency_per_target,
+        timeout_seconds=settings.webhook_timeout_seconds,
+        poll_interval_seconds=settings.webhook_poll_interval_seconds,
+        lease_seconds=settings.webhook_lease_seconds,
+        retry_base_seconds=settings.webhook_retry_base_seconds,
+        retry_max_seconds=settings.webhook_retry_max_seconds,
+        max_attempts=settings.webhook_max_attempts,
+        retention_seconds=settings.webhook_retention_seconds,
+    )
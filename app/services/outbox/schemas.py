@@ -0,0 +1,64 @@
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from app.models.pull_requests import PRStatus
+from app.services.pull_requests.schemas import PullRequestDto
+
+
+class PullRequestEventType(str, Enum):
+    CREATED = "pull_request.created"
+    MERGED = "pull_request.merged"
+    REASSIGNED = "pull_request.reassigned"
+
+
+class WebhookEvent(BaseModel):
+    # event_id одинаков во всех попытках доставки, получатель отбрасывает повторы по нему
+    event_id: UUID = Field(default_factory=uuid.uuid4)
+    event_type: PullRequestEventType
+    occurred_at: datetime
+    data: dict[str, Any]
+
+    model_config = {"use_enum_values": True}
+
+    @classmethod
+    def pull_request_created(cls, pr: PullRequestDto, now: datetime) -> "WebhookEvent":
+        return cls(
+            event_type=PullRequestEventType.CREATED,
+            occurred_at=now,
+            data=pr.model_dump(mode="json", by_alias=True),
+        )
+
+    @classmethod
+    def pull_request_merged(
+        cls, pr_id: UUID, title: str, author_id: UUID | None, now: datetime
+    ) -> "WebhookEvent":
+        return cls(
+            event_type=PullRequestEventType.MERGED,
+            occurred_at=now,
+            data={
+                "pull_request_id": str(pr_id),
+                "pull_request_name": title,
+                "author_id": str(author_id) if author_id else None,
+                "status": PRStatus.MERGED.value,
+            },
+        )
+
+    @classmethod
+    def pull_request_reassigned(
+        cls, pr_id: UUID, old_reviewer_id: UUID, new_reviewer_id: UUID | None, now: datetime
+    ) -> "WebhookEvent":
+        # new_reviewer_id пуст, если ревьювер снят при деактивации и замены не нашлось
+        return cls(
+            event_type=PullRequestEventType.REASSIGNED,
+            occurred_at=now,
+            data={
+                "pull_request_id": str(pr_id),
+                "old_reviewer_id": str(old_reviewer_id),
+                "new_reviewer_id": str(new_reviewer_id) if new_reviewer_id else None,
+            },
+        )
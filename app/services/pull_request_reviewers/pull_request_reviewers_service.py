@@ -1,10 +1,27 @@
+import uuid
+from collections import Counter
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Iterable
 from uuid import UUID
 
+from tortoise import connections, timezone
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.db.replicas import read_connection
+from app.db.sql import POSTGRES, SqlParams, chunked, get_dialect, to_datetime, to_uuid
 from app.models.pull_request_reviewers import PullRequestReviewer
-from app.models.pull_requests import PullRequest
-from app.models.team_members import TeamMember
-from app.models.users import User
+from app.models.pull_requests import PRStatus, PullRequest
+from app.services.outbox.schemas import WebhookEvent
+from app.services.pull_request_reviewers.selection import (
+    Candidate,
+    CandidatePool,
+    get_selection_strategy,
+)
 from app.services.pull_requests.errors import PullRequestNotFoundError
+from app.services.pull_requests.events import PullRequestEvents
+from app.services.pull_requests.schemas import ReviewerSummary
 
 
 class PullRequestReviewerService:
@@ -12,34 +29,443 @@ class PullRequestReviewerService:
     async def add_pull_request_reviewers(
         pr_id: UUID, team_id: UUID, author_id: UUID, reviewer_count=2
     ) -> None:
-        pr = await PullRequest.filter(id=pr_id).first()
-        if not pr:
+        pr_status = await PullRequest.filter(id=pr_id).first().values_list("status", flat=True)
+        if not pr_status:
             raise PullRequestNotFoundError(f"Pull request с id {pr_id} не найден")
 
-        candidates = await PullRequestReviewerService._get_candidates(
+        candidate_ids = await PullRequestReviewerService._get_candidates(
             team_id=team_id,
             reviewer_count=reviewer_count,
             exclude_ids={author_id},
         )
 
-        if candidates:
+        if candidate_ids:
             await PullRequestReviewer.bulk_create(
                 [
-                    PullRequestReviewer(pr_id=pr_id, reviewer_id=candidate.id)
-                    for candidate in candidates
+                    PullRequestReviewer(pr_id=pr_id, reviewer_id=candidate_id, pr_status=pr_status)
+                    for candidate_id in candidate_ids
                 ]
             )
+            await PullRequestReviewerService.track_assigned(
+                connections.get("default"), candidate_ids, timezone.now()
+            )
+
+    @staticmethod
+    async def assign_reviewers(
+        conn: BaseDBAsyncClient,
+        pr_id: UUID,
+        author_id: UUID,
+        now: datetime,
+        reviewer_count: int = 2,
+    ) -> list[UUID]:
+        if reviewer_count <= 0:
+            return []
+
+        p = SqlParams(get_dialect(conn))
+        slots = " UNION ALL ".join(
+            f"SELECT {rn} AS rn, {p(uuid.uuid4(), 'uuid')} AS id"
+            for rn in range(1, reviewer_count + 1)
+        )
+        candidates = PullRequestReviewerService._candidates_sql(
+            p,
+            team_id_sql=f"(SELECT team_id FROM team_members WHERE user_id = {p(author_id)})",
+            exclude_ids=[author_id],
+            limit=reviewer_count,
+        )
+        sql = f"""
+            WITH slots AS ({slots}),
+            picked AS ({candidates}),
+            ranked AS (
+                SELECT user_id, ROW_NUMBER() OVER (ORDER BY user_id) AS rn FROM picked
+            )
+            INSERT INTO pull_request_reviewers (id, created_at, updated_at, pr_id, reviewer_id)
+            SELECT slots.id, {p(now, "timestamptz")}, {p(now, "timestamptz")},
+                   {p(pr_id, "uuid")}, ranked.user_id
+            FROM ranked
+            JOIN slots ON slots.rn = ranked.rn
+            RETURNING reviewer_id
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        reviewer_ids = [to_uuid(row["reviewer_id"]) for row in rows]
+
+        await PullRequestReviewerService.track_assigned(conn, reviewer_ids, now)
+        return reviewer_ids
 
     @staticmethod
-    async def pick_replacement_candidate(team_id: UUID, exclude_ids: set[UUID]) -> User | None:
-        candidates = await PullRequestReviewerService._get_candidates(
+    async def pick_replacement_candidate(team_id: UUID, exclude_ids: set[UUID]) -> UUID | None:
+        candidate_ids = await PullRequestReviewerService._get_candidates(
             team_id=team_id,
             reviewer_count=1,
             exclude_ids=exclude_ids,
         )
-        if not candidates:
+        if not candidate_ids:
+            return None
+        return candidate_ids[0]
+
+    @staticmethod
+    async def track_assigned(
+        conn: BaseDBAsyncClient, user_ids: Iterable[UUID], now: datetime
+    ) -> None:
+        counts = Counter(user_ids)
+        if not counts:
+            return
+
+        p = SqlParams(get_dialect(conn))
+        # Строки вставляются по порядку, сортировка даёт тот же порядок блокировок, что и в _lock
+        values = ", ".join(
+            f"({p(uuid.uuid4())}, {p(now)}, {p(now)}, {p(user_id)}, {p(count)}, {p(now)})"
+            for user_id, count in sorted(counts.items(), key=lambda item: str(item[0]))
+        )
+        sql = f"""
+            INSERT INTO reviewer_loads
+                (id, created_at, updated_at, user_id, open_reviews, last_assigned_at)
+            VALUES {values}
+            ON CONFLICT (user_id) DO UPDATE
+            SET open_reviews = reviewer_loads.open_reviews + EXCLUDED.open_reviews,
+                last_assigned_at = EXCLUDED.last_assigned_at,
+                updated_at = EXCLUDED.updated_at
+        """
+        await conn.execute_query(sql, p.values)
+
+    @staticmethod
+    async def track_released(conn: BaseDBAsyncClient, user_ids: Iterable[UUID]) -> None:
+        counts = Counter(user_ids)
+        if not counts:
+            return
+
+        await PullRequestReviewerService.lock_loads(conn, counts)
+        p = SqlParams(get_dialect(conn))
+        released = p.rows(["user_id", "n"], counts.items(), ["uuid", "int"])
+        await PullRequestReviewerService._release(conn, p, released)
+
+    @staticmethod
+    async def track_reassigned(
+        conn: BaseDBAsyncClient,
+        old_user_ids: Iterable[UUID],
+        new_user_ids: Iterable[UUID],
+        now: datetime,
+    ) -> None:
+        released = Counter(old_user_ids)
+        assigned = list(new_user_ids)
+        await PullRequestReviewerService.lock_loads(conn, [*released, *assigned])
+        if released:
+            p = SqlParams(get_dialect(conn))
+            released_sql = p.rows(["user_id", "n"], released.items(), ["uuid", "int"])
+            await PullRequestReviewerService._release(conn, p, released_sql)
+        await PullRequestReviewerService.track_assigned(conn, assigned, now)
+
+    @staticmethod
+    async def insert_reviewers(
+        conn: BaseDBAsyncClient, assignments: Iterable[tuple[UUID, UUID]], now: datetime
+    ) -> None:
+        rows = [(uuid.uuid4(), now, now, pr_id, reviewer_id) for pr_id, reviewer_id in assignments]
+        for chunk in chunked(rows):
+            p = SqlParams(get_dialect(conn))
+            values = p.value_rows(chunk, ["uuid", "timestamptz", "timestamptz", "uuid", "uuid"])
+            sql = f"""
+                INSERT INTO pull_request_reviewers (id, created_at, updated_at, pr_id, reviewer_id)
+                VALUES {values}
+            """
+            await conn.execute_query(sql, p.values)
+
+    @staticmethod
+    async def delete_reviewers(conn: BaseDBAsyncClient, assignment_ids: list[UUID]) -> None:
+        for chunk in chunked(assignment_ids):
+            p = SqlParams(get_dialect(conn))
+            sql = f"DELETE FROM pull_request_reviewers WHERE {p.in_list('id', chunk, 'uuid')}"
+            await conn.execute_query(sql, p.values)
+
+    @staticmethod
+    async def load_candidate_pool(
+        conn: BaseDBAsyncClient, team_ids: Iterable[UUID], now: datetime
+    ) -> CandidatePool:
+        p = SqlParams(get_dialect(conn))
+        sql = f"""
+            SELECT tm.team_id, tm.user_id,
+                   COALESCE(rl.open_reviews, 0) AS open_reviews, rl.last_assigned_at
+            FROM team_members tm
+            JOIN users u ON u.id = tm.user_id
+            LEFT JOIN reviewer_loads rl ON rl.user_id = tm.user_id
+            WHERE {p.in_list("tm.team_id", team_ids, "uuid")}
+              AND u.is_active
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        return CandidatePool(
+            (
+                (
+                    to_uuid(row["team_id"]),
+                    Candidate(
+                        user_id=to_uuid(row["user_id"]),
+                        open_reviews=row["open_reviews"],
+                        last_assigned_at=to_datetime(row["last_assigned_at"]),
+                    ),
+                )
+                for row in rows
+            ),
+            now,
+        )
+
+    @staticmethod
+    async def lock_loads(conn: BaseDBAsyncClient, user_ids: Iterable[UUID]) -> None:
+        if get_dialect(conn) != POSTGRES:
+            return
+
+        p = SqlParams(POSTGRES)
+        await PullRequestReviewerService._lock(conn, p, p.in_list("user_id", user_ids, "uuid"))
+
+    @staticmethod
+    async def release_pull_requests(conn: BaseDBAsyncClient, pr_ids: Iterable[UUID]) -> None:
+        pr_ids = list(pr_ids)
+        if not pr_ids:
+            return
+
+        dialect = get_dialect(conn)
+        if dialect == POSTGRES:
+            p = SqlParams(dialect)
+            reviewers = f"""
+                user_id IN (
+                    SELECT reviewer_id FROM pull_request_reviewers
+                    WHERE {p.in_list("pr_id", pr_ids, "uuid")}
+                )
+            """
+            await PullRequestReviewerService._lock(conn, p, reviewers)
+
+        p = SqlParams(dialect)
+        released = f"""
+            SELECT reviewer_id AS user_id, COUNT(*) AS n
+            FROM pull_request_reviewers
+            WHERE {p.in_list("pr_id", pr_ids, "uuid")}
+            GROUP BY reviewer_id
+        """
+        await PullRequestReviewerService._release(conn, p, released)
+
+    @staticmethod
+    async def reassign_from_inactive(
+        conn: BaseDBAsyncClient, user_ids: Iterable[UUID], now: datetime
+    ) -> tuple[int, int]:
+        # Число запросов не зависит от числа затронутых PR: все назначения читаются одним
+        # запросом, замены выбираются в памяти, строки удаляются и вставляются по одному разу.
+        # Пользователи уже деактивированы в этой транзакции и в кандидаты не попадают
+        user_ids = list(user_ids)
+        rows = await PullRequestReviewerService._lock_open_reviews(
+            conn, user_ids, team_of="prr.reviewer_id"
+        )
+        if not rows:
+            return 0, 0
+
+        inactive = set(user_ids)
+        reviewers: dict[UUID, set[UUID]] = {}
+        authors: dict[UUID, UUID] = {}
+        removed: list[tuple[UUID, UUID, UUID | None]] = []
+        for row in rows:
+            pr_id, reviewer_id = to_uuid(row["pr_id"]), to_uuid(row["reviewer_id"])
+            reviewers.setdefault(pr_id, set()).add(reviewer_id)
+            authors[pr_id] = to_uuid(row["author_id"])
+            if reviewer_id in inactive:
+                removed.append((pr_id, reviewer_id, to_uuid(row["team_id"])))
+
+        pool = await PullRequestReviewerService.load_candidate_pool(
+            conn, {team_id for _, _, team_id in removed if team_id}, now
+        )
+        replaced: list[tuple[UUID, UUID, UUID | None]] = []
+        for pr_id, old_id, team_id in removed:
+            new_id = None
+            if team_id is not None:
+                current = reviewers[pr_id]
+                for candidate_id in pool.pick(team_id, current | {authors[pr_id]}, 1):
+                    current.add(candidate_id)
+                    new_id = candidate_id
+            replaced.append((pr_id, old_id, new_id))
+
+        reassigned = await PullRequestReviewerService._replace_reviewers(
+            conn, user_ids, replaced, now
+        )
+        return reassigned, len(replaced) - reassigned
+
+    @staticmethod
+    async def reassign_to_author_teams(
+        conn: BaseDBAsyncClient, user_ids: Iterable[UUID], now: datetime
+    ) -> list[tuple[Any, Any, Any | None]]:
+        # Ревью целой команды переходят в команды авторов PR. Кандидаты команды стоят в очереди
+        # в порядке стратегии: получивший ревью уходит в конец, а пропущенный (автор или уже
+        # ревьювер PR) остаётся впереди, поэтому никто не получает второе ревью, пока не дойдёт
+        # очередь до остальных. id возвращаются в том виде, как их вернула БД: на тысячах
+        # строк разбор в UUID стоит дороже самих запросов
+        user_ids = list(user_ids)
+        rows = await PullRequestReviewerService._lock_open_reviews(
+            conn, user_ids, team_of="pr.author_id"
+        )
+        if not rows:
+            return []
+
+        dialect = get_dialect(conn)
+        p = SqlParams(dialect)
+        sql = f"""
+            SELECT tm.team_id, tm.user_id
+            FROM team_members tm
+            JOIN users u ON u.id = tm.user_id
+            LEFT JOIN reviewer_loads rl ON rl.user_id = tm.user_id
+            WHERE {p.in_list("tm.team_id", {row["team_id"] for row in rows}, "uuid")}
+              AND u.is_active
+            ORDER BY tm.team_id, {get_selection_strategy().order_by(dialect)}
+        """
+        _, candidates = await conn.execute_query(sql, p.values)
+        queues: dict[Any, list[Any]] = {}
+        for row in candidates:
+            queues.setdefault(row["team_id"], []).append(row["user_id"])
+
+        inactive = {str(user_id) for user_id in user_ids}
+        replaced: list[tuple[Any, Any, Any | None]] = []
+        for pr_id, group in groupby(rows, key=itemgetter("pr_id")):
+            group = list(group)
+            current = {row["reviewer_id"] for row in group}
+            author_id, queue = group[0]["author_id"], queues.get(group[0]["team_id"], ())
+            for row in group:
+                if str(row["reviewer_id"]) not in inactive:
+                    continue
+                new_id = None
+                for index, candidate_id in enumerate(queue):
+                    if candidate_id != author_id and candidate_id not in current:
+                        new_id = queue.pop(index)
+                        queue.append(new_id)
+                        current.add(new_id)
+                        break
+                replaced.append((pr_id, row["reviewer_id"], new_id))
+
+        await PullRequestReviewerService._replace_reviewers(conn, user_ids, replaced, now)
+        return replaced
+
+    @staticmethod
+    async def _lock_open_reviews(
+        conn: BaseDBAsyncClient, user_ids: list[UUID], team_of: str
+    ) -> list[Any]:
+        # Все назначения открытых PR, где ревьювит кто-то из user_ids, с командой колонки
+        # team_of, по порядку PR. PR блокируются, чтобы параллельный merge или reassign
+        # не менял их ревьюверов до конца замены
+        if not user_ids:
+            return []
+
+        dialect = get_dialect(conn)
+        p = SqlParams(dialect)
+        open_reviews = f"""
+            SELECT pr_id FROM pull_request_reviewers
+            WHERE {p.in_list("reviewer_id", user_ids, "uuid")}
+              AND pr_status = {p(PRStatus.OPEN.value)}
+        """
+        sql = f"""
+            SELECT prr.pr_id, prr.reviewer_id, pr.author_id, tm.team_id
+            FROM pull_request_reviewers prr
+            JOIN pull_requests pr ON pr.id = prr.pr_id
+            LEFT JOIN team_members tm ON tm.user_id = {team_of}
+            WHERE prr.pr_id IN ({open_reviews})
+            ORDER BY prr.pr_id, prr.reviewer_id
+            {"FOR UPDATE OF pr" if dialect == POSTGRES else ""}
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        return rows
+
+    @staticmethod
+    async def _replace_reviewers(
+        conn: BaseDBAsyncClient,
+        user_ids: list[UUID],
+        replaced: list[tuple[Any, Any, Any | None]],
+        now: datetime,
+    ) -> int:
+        # replaced: (pr_id, old_id, new_id). Без замены ревьювер всё равно снимается:
+        # неактивный пользователь ревью не проведёт. Возвращает число назначенных замен
+        dialect = get_dialect(conn)
+        p = SqlParams(dialect)
+        sql = f"""
+            DELETE FROM pull_request_reviewers
+            WHERE {p.in_list("reviewer_id", user_ids, "uuid")}
+              AND pr_status = {p(PRStatus.OPEN.value)}
+        """
+        await conn.execute_query(sql, p.values)
+
+        assignments = [
+            (uuid.uuid4(), pr_id, new_id) for pr_id, _, new_id in replaced if new_id is not None
+        ]
+        if assignments:
+            p = SqlParams(dialect)
+            columns = ["id", "pr_id", "reviewer_id"]
+            sql = f"""
+                INSERT INTO pull_request_reviewers
+                    (id, created_at, updated_at, pr_id, reviewer_id)
+                SELECT t.id, {p(now, "timestamptz")}, {p(now, "timestamptz")},
+                       t.pr_id, t.reviewer_id
+                FROM ({p.unnest(columns, assignments, ["uuid"] * 3)}) AS t
+            """
+            await conn.execute_query(sql, p.values)
+
+        await PullRequestReviewerService.track_reassigned(
+            conn,
+            [old_id for _, old_id, _ in replaced],
+            [new_id for _, _, new_id in assignments],
+            now,
+        )
+        await PullRequestEvents.record(
+            conn,
+            (
+                WebhookEvent.pull_request_reassigned(pr_id, old_id, new_id, now)
+                for pr_id, old_id, new_id in replaced
+            ),
+        )
+        return len(assignments)
+
+    @staticmethod
+    async def mark_merged(conn: BaseDBAsyncClient, pr_ids: Iterable[UUID]) -> None:
+        p = SqlParams(get_dialect(conn))
+        sql = f"""
+            UPDATE pull_request_reviewers
+            SET pr_status = {p(PRStatus.MERGED.value)}
+            WHERE {p.in_list("pr_id", pr_ids, "uuid")}
+        """
+        await conn.execute_query(sql, p.values)
+
+    @staticmethod
+    async def get_reviewer_summary(user_id: UUID) -> ReviewerSummary | None:
+        conn = read_connection()
+        p = SqlParams(get_dialect(conn))
+        sql = f"""
+            SELECT COALESCE(rl.open_reviews, 0) AS open_reviews, rl.last_assigned_at
+            FROM users u
+            LEFT JOIN reviewer_loads rl ON rl.user_id = u.id
+            WHERE u.id = {p(user_id)}
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        if not rows:
             return None
-        return candidates[0]
+        return ReviewerSummary(
+            open_reviews=rows[0]["open_reviews"],
+            last_assigned_at=to_datetime(rows[0]["last_assigned_at"]),
+        )
+
+    @staticmethod
+    async def _lock(conn: BaseDBAsyncClient, p: SqlParams, condition: str) -> None:
+        # Параллельные create/reassign/merge обновляют счётчики в разном порядке;
+        # блокировка строк по возрастанию user_id исключает взаимоблокировки.
+        # SQLite сериализует пишущие транзакции сам.
+        sql = f"""
+            SELECT user_id FROM reviewer_loads
+            WHERE {condition}
+            ORDER BY user_id
+            FOR UPDATE
+        """
+        await conn.execute_query(sql, p.values)
+
+    @staticmethod
+    async def _release(conn: BaseDBAsyncClient, p: SqlParams, released_sql: str) -> None:
+        sql = f"""
+            UPDATE reviewer_loads
+            SET open_reviews = CASE
+                    WHEN reviewer_loads.open_reviews > released.n
+                    THEN reviewer_loads.open_reviews - released.n
+                    ELSE 0
+                END
+            FROM ({released_sql}) AS released
+            WHERE reviewer_loads.user_id = released.user_id
+        """
+        await conn.execute_query(sql, p.values)
 
     @staticmethod
     async def get_pull_request_reviewer_ids_map(
@@ -60,17 +486,34 @@ class PullRequestReviewerService:
     @staticmethod
     async def _get_candidates(
         team_id: UUID, reviewer_count: int, exclude_ids: set[UUID]
-    ) -> list[User]:
+    ) -> list[UUID]:
         if reviewer_count <= 0:
             return []
 
-        candidate_ids = await TeamMember.filter(team_id=team_id).values_list("user_id", flat=True)
-        if not candidate_ids:
-            return []
-
-        return (
-            await User.filter(id__in=candidate_ids, is_active=True)
-            .exclude(id__in=list(exclude_ids))
-            .order_by("id")
-            .limit(reviewer_count)
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        sql = PullRequestReviewerService._candidates_sql(
+            p,
+            team_id_sql=p(team_id),
+            exclude_ids=exclude_ids,
+            limit=reviewer_count,
         )
+        _, rows = await conn.execute_query(sql, p.values)
+        return [to_uuid(row["user_id"]) for row in rows]
+
+    @staticmethod
+    def _candidates_sql(
+        p: SqlParams, team_id_sql: str, exclude_ids: Iterable[UUID], limit: int
+    ) -> str:
+        strategy = get_selection_strategy()
+        return f"""
+            SELECT tm.user_id
+            FROM team_members tm
+            JOIN users u ON u.id = tm.user_id
+            LEFT JOIN reviewer_loads rl ON rl.user_id = tm.user_id
+            WHERE tm.team_id = {team_id_sql}
+              AND u.is_active
+              AND {p.not_in_list("tm.user_id", exclude_ids, "uuid")}
+            ORDER BY {strategy.order_by(p.dialect)}
+            LIMIT {p(limit)}
+        """
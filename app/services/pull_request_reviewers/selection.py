@@ -0,0 +1,121 @@
+import heapq
+import math
+import random
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+from uuid import UUID
+
+from app.core.config import get_settings
+from app.db.sql import SQLITE
+
+
+@dataclass
+class Candidate:
+    user_id: UUID
+    open_reviews: int
+    last_assigned_at: datetime | None
+
+
+def _nulls_first(value: datetime | None) -> tuple[bool, datetime | None]:
+    return value is not None, value
+
+
+class SelectionStrategy(ABC):
+    name: str
+
+    @abstractmethod
+    def order_by(self, dialect: str) -> str: ...
+
+    # Тот же порядок, что и order_by, для выбора в памяти при пакетных операциях
+    @abstractmethod
+    def sort_key(self, candidate: Candidate) -> tuple[Any, ...]: ...
+
+
+class LeastOpenReviewsStrategy(SelectionStrategy):
+    name = "least_open"
+
+    def order_by(self, dialect: str) -> str:
+        return "COALESCE(rl.open_reviews, 0), rl.last_assigned_at NULLS FIRST, tm.user_id"
+
+    def sort_key(self, candidate: Candidate) -> tuple[Any, ...]:
+        return (
+            candidate.open_reviews,
+            _nulls_first(candidate.last_assigned_at),
+            candidate.user_id,
+        )
+
+
+class WeightedRandomStrategy(SelectionStrategy):
+    name = "weighted_random"
+
+    def order_by(self, dialect: str) -> str:
+        if dialect == SQLITE:
+            uniform = "((ABS(RANDOM()) % 1000000 + 1) / 1000000.0)"
+        else:
+            uniform = "(1.0 - RANDOM())"
+
+        # Ключ Efraimidis–Spirakis с весом 1 / (open_reviews + 1)
+        return f"-LN({uniform}) * (COALESCE(rl.open_reviews, 0) + 1)"
+
+    def sort_key(self, candidate: Candidate) -> tuple[Any, ...]:
+        return (-math.log(1.0 - random.random()) * (candidate.open_reviews + 1),)
+
+
+class RoundRobinStrategy(SelectionStrategy):
+    name = "round_robin"
+
+    def order_by(self, dialect: str) -> str:
+        return "rl.last_assigned_at NULLS FIRST, tm.user_id"
+
+    def sort_key(self, candidate: Candidate) -> tuple[Any, ...]:
+        return _nulls_first(candidate.last_assigned_at), candidate.user_id
+
+
+STRATEGIES: dict[str, SelectionStrategy] = {
+    strategy.name: strategy
+    for strategy in (LeastOpenReviewsStrategy(), WeightedRandomStrategy(), RoundRobinStrategy())
+}
+
+
+def get_selection_strategy(name: str | None = None) -> SelectionStrategy:
+    return STRATEGIES[name or get_settings().reviewer_selection_strategy]
+
+
+class CandidatePool:
+    # Каждое назначение сразу учитывается в нагрузке кандидата, поэтому пакет PR
+    # распределяется так же, как последовательные одиночные вызовы
+    def __init__(
+        self,
+        candidates: Iterable[tuple[UUID, Candidate]],
+        now: datetime,
+        strategy: SelectionStrategy | None = None,
+    ) -> None:
+        self.strategy = strategy or get_selection_strategy()
+        self.now = now
+        self._assignments = 0
+        self._by_team: dict[UUID, list[Candidate]] = {}
+        self._by_user: dict[UUID, Candidate] = {}
+        for team_id, candidate in candidates:
+            self._by_team.setdefault(team_id, []).append(candidate)
+            self._by_user[candidate.user_id] = candidate
+
+    def pick(self, team_id: UUID, exclude_ids: set[UUID], count: int) -> list[UUID]:
+        available = (
+            candidate
+            for candidate in self._by_team.get(team_id, ())
+            if candidate.user_id not in exclude_ids
+        )
+        picked = heapq.nsmallest(count, available, key=self.strategy.sort_key)
+        for candidate in picked:
+            self._assignments += 1
+            candidate.open_reviews += 1
+            # В БД у всех назначений пакета одно время, здесь порядок назначений сохраняется
+            candidate.last_assigned_at = self.now + timedelta(microseconds=self._assignments)
+        return [candidate.user_id for candidate in picked]
+
+    def release(self, user_id: UUID) -> None:
+        candidate = self._by_user.get(user_id)
+        if candidate is not None and candidate.open_reviews > 0:
+            candidate.open_reviews -= 1
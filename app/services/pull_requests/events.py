@@ -0,0 +1,24 @@
+from functools import partial
+from typing import Iterable
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.db.unit_of_work import run_after_commit
+from app.services.outbox.outbox_service import OutboxService
+from app.services.outbox.schemas import WebhookEvent
+from app.services.review_stream.review_stream_service import publish_review_assignments
+from app.services.stats.stats_service import StatsService
+
+
+class PullRequestEvents:
+    @staticmethod
+    async def record(conn: BaseDBAsyncClient, events: Iterable[WebhookEvent]) -> None:
+        # Через эту точку проходят все изменения PR: статистика и outbox пишутся в транзакции
+        # изменения, потоки ревью этого воркера узнают о назначениях после COMMIT
+        events = list(events)
+        if not events:
+            return
+
+        await StatsService.track_events(conn, events)
+        await OutboxService.add_events(conn, events)
+        await run_after_commit(partial(publish_review_assignments, events))
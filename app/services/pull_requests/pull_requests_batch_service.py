@@ -0,0 +1,412 @@
+from datetime import datetime
+from typing import Iterable
+from uuid import UUID
+
+from tortoise import timezone
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.common.batch import BatchItemError
+from app.common.errors.base import ServiceError
+from app.db.sql import SqlParams, chunked, get_dialect, to_uuid
+from app.db.unit_of_work import unit_of_work
+from app.models.pull_requests import PRStatus, PullRequest
+from app.services.outbox.schemas import WebhookEvent
+from app.services.pull_request_reviewers.pull_request_reviewers_service import (
+    PullRequestReviewerService,
+)
+from app.services.pull_request_reviewers.selection import CandidatePool
+from app.services.pull_requests.errors import (
+    PullRequestAlreadyExistsError,
+    PullRequestMergedError,
+    PullRequestNotFoundError,
+    ReplacementCandidateNotFoundError,
+    ReviewerNotAssignedError,
+)
+from app.services.pull_requests.events import PullRequestEvents
+from app.services.pull_requests.pull_requests_service import PullRequestService
+from app.services.pull_requests.schemas import (
+    PullRequestBatchResult,
+    PullRequestCreate,
+    PullRequestDto,
+    PullRequestReassign,
+)
+from app.services.teams.errors import TeamNotFoundError
+from app.services.users.errors import UserNotFoundError
+
+REVIEWERS_PER_PULL_REQUEST = 2
+
+
+class PullRequestBatchService:
+    @staticmethod
+    async def create_pull_requests(
+        payloads: list[PullRequestCreate],
+    ) -> list[PullRequestBatchResult]:
+        now = timezone.now()
+        results: dict[int, PullRequestBatchResult] = {}
+        accepted: list[tuple[int, PullRequestCreate, UUID]] = []
+
+        async with unit_of_work() as conn:
+            author_teams = await PullRequestBatchService._get_user_teams(
+                conn, [payload.author_id for payload in payloads]
+            )
+            taken_ids = await PullRequestBatchService._get_existing_ids(
+                conn, [payload.pull_request_id for payload in payloads]
+            )
+
+            for index, payload in enumerate(payloads):
+                try:
+                    team_id = PullRequestBatchService._check_create(
+                        payload, author_teams, taken_ids
+                    )
+                except ServiceError as exc:
+                    results[index] = PullRequestBatchService._failed(
+                        index, payload.pull_request_id, exc
+                    )
+                    continue
+                taken_ids.add(payload.pull_request_id)
+                accepted.append((index, payload, team_id))
+
+            if accepted:
+                created_ids = await PullRequestBatchService._insert_pull_requests(
+                    conn, [payload for _, payload, _ in accepted], now
+                )
+                # Кандидаты всех команд пакета читаются одним запросом, выбор идёт в памяти
+                pool = await PullRequestReviewerService.load_candidate_pool(
+                    conn, {team_id for _, _, team_id in accepted}, now
+                )
+                assignments = PullRequestBatchService._assign_created(
+                    accepted, created_ids, pool, results, now
+                )
+                await PullRequestReviewerService.insert_reviewers(conn, assignments, now)
+                await PullRequestReviewerService.track_assigned(
+                    conn, [reviewer_id for _, reviewer_id in assignments], now
+                )
+                await PullRequestEvents.record(
+                    conn,
+                    (
+                        WebhookEvent.pull_request_created(result.pr, now)
+                        for result in results.values()
+                        if result.status_code == 201 and result.pr is not None
+                    ),
+                )
+
+        return [results[index] for index in range(len(payloads))]
+
+    @staticmethod
+    async def merge_pull_requests(pr_ids: list[UUID]) -> list[PullRequestBatchResult]:
+        now = timezone.now()
+
+        async with unit_of_work() as conn:
+            prs = await PullRequestBatchService._lock_pull_requests(pr_ids)
+            open_ids = [pr.id for pr in prs.values() if pr.status != PRStatus.MERGED]
+            if open_ids:
+                p = SqlParams(get_dialect(conn))
+                sql = f"""
+                    UPDATE pull_requests
+                    SET status = {p(PRStatus.MERGED.value)}, updated_at = {p(now, "timestamptz")}
+                    WHERE {p.in_list("id", open_ids, "uuid")}
+                """
+                await conn.execute_query(sql, p.values)
+                await PullRequestReviewerService.release_pull_requests(conn, open_ids)
+                await PullRequestReviewerService.mark_merged(conn, open_ids)
+                for pr_id in open_ids:
+                    prs[pr_id].status = PRStatus.MERGED
+                await PullRequestEvents.record(
+                    conn,
+                    (
+                        WebhookEvent.pull_request_merged(
+                            pr_id, prs[pr_id].title, prs[pr_id].author_id, now
+                        )
+                        for pr_id in open_ids
+                    ),
+                )
+
+        dtos = {
+            dto.pull_request_id: dto for dto in await PullRequestService.to_dtos(list(prs.values()))
+        }
+        results = []
+        for index, pr_id in enumerate(pr_ids):
+            if pr_id not in dtos:
+                error = PullRequestNotFoundError(f"Pull request с id {pr_id} не найден")
+                results.append(PullRequestBatchService._failed(index, pr_id, error))
+                continue
+            results.append(
+                PullRequestBatchResult(
+                    index=index, pull_request_id=pr_id, status_code=200, pr=dtos[pr_id]
+                )
+            )
+        return results
+
+    @staticmethod
+    async def reassign_pull_requests(
+        payloads: list[PullRequestReassign],
+    ) -> list[PullRequestBatchResult]:
+        now = timezone.now()
+        replaced: dict[int, UUID] = {}
+        errors: dict[int, ServiceError] = {}
+
+        async with unit_of_work() as conn:
+            prs = await PullRequestBatchService._lock_pull_requests(
+                [payload.pull_request_id for payload in payloads]
+            )
+            # pr_id -> reviewer_id -> id строки назначения, None для назначенных в этом пакете
+            reviewers = await PullRequestBatchService._get_assignments(conn, list(prs))
+            reviewer_teams = await PullRequestBatchService._get_user_teams(
+                conn, [payload.old_user_id for payload in payloads]
+            )
+            pool = await PullRequestReviewerService.load_candidate_pool(
+                conn, {team_id for team_id in reviewer_teams.values() if team_id}, now
+            )
+
+            removed_ids: list[UUID] = []
+            released: list[UUID] = []
+            for index, payload in enumerate(payloads):
+                try:
+                    candidate_id = PullRequestBatchService._pick_replacement(
+                        payload, prs, reviewers, reviewer_teams, pool
+                    )
+                except ServiceError as exc:
+                    errors[index] = exc
+                    continue
+
+                current = reviewers[payload.pull_request_id]
+                assignment_id = current.pop(payload.old_user_id)
+                if assignment_id is not None:
+                    removed_ids.append(assignment_id)
+                current[candidate_id] = None
+                pool.release(payload.old_user_id)
+                released.append(payload.old_user_id)
+                replaced[index] = candidate_id
+
+            if replaced:
+                await PullRequestReviewerService.delete_reviewers(conn, removed_ids)
+                await PullRequestReviewerService.insert_reviewers(
+                    conn,
+                    [
+                        (pr_id, reviewer_id)
+                        for pr_id, current in reviewers.items()
+                        for reviewer_id, assignment_id in current.items()
+                        if assignment_id is None
+                    ],
+                    now,
+                )
+                await PullRequestReviewerService.track_reassigned(
+                    conn, released, replaced.values(), now
+                )
+                await PullRequestEvents.record(
+                    conn,
+                    (
+                        WebhookEvent.pull_request_reassigned(
+                            payloads[index].pull_request_id,
+                            payloads[index].old_user_id,
+                            candidate_id,
+                            now,
+                        )
+                        for index, candidate_id in replaced.items()
+                    ),
+                )
+
+        results = []
+        for index, payload in enumerate(payloads):
+            if index in errors:
+                results.append(
+                    PullRequestBatchService._failed(index, payload.pull_request_id, errors[index])
+                )
+                continue
+            pr = prs[payload.pull_request_id]
+            results.append(
+                PullRequestBatchResult(
+                    index=index,
+                    pull_request_id=pr.id,
+                    status_code=200,
+                    pr=PullRequestBatchService._build_dto(pr, list(reviewers[pr.id])),
+                    replaced_by=replaced[index],
+                )
+            )
+        return results
+
+    @staticmethod
+    def _check_create(
+        payload: PullRequestCreate,
+        author_teams: dict[UUID, UUID | None],
+        taken_ids: set[UUID],
+    ) -> UUID:
+        if payload.author_id not in author_teams:
+            raise UserNotFoundError(
+                f"Пользователь с id {payload.author_id} не найден", status_code=404
+            )
+
+        if payload.pull_request_id in taken_ids:
+            raise PullRequestAlreadyExistsError(
+                f"Pull request с id {payload.pull_request_id} уже существует"
+            )
+
+        team_id = author_teams[payload.author_id]
+        if team_id is None:
+            raise TeamNotFoundError("Команда автора не найдена", status_code=404, code="NOT_FOUND")
+        return team_id
+
+    @staticmethod
+    def _assign_created(
+        accepted: list[tuple[int, PullRequestCreate, UUID]],
+        created_ids: set[UUID],
+        pool: CandidatePool,
+        results: dict[int, PullRequestBatchResult],
+        now: datetime,
+    ) -> list[tuple[UUID, UUID]]:
+        assignments = []
+        for index, payload, team_id in accepted:
+            if payload.pull_request_id not in created_ids:
+                # PR с тем же id успел создать параллельный запрос
+                error = PullRequestAlreadyExistsError(
+                    f"Pull request с id {payload.pull_request_id} уже существует"
+                )
+                results[index] = PullRequestBatchService._failed(
+                    index, payload.pull_request_id, error
+                )
+                continue
+
+            reviewer_ids = pool.pick(team_id, {payload.author_id}, REVIEWERS_PER_PULL_REQUEST)
+            assignments.extend(
+                (payload.pull_request_id, reviewer_id) for reviewer_id in reviewer_ids
+            )
+            results[index] = PullRequestBatchResult(
+                index=index,
+                pull_request_id=payload.pull_request_id,
+                status_code=201,
+                pr=PullRequestDto(
+                    pull_request_id=payload.pull_request_id,
+                    pull_request_name=payload.pull_request_name,
+                    status=PRStatus.OPEN,
+                    author_id=payload.author_id,
+                    assigned_reviewers=reviewer_ids,
+                    created_at=now,
+                ),
+            )
+        return assignments
+
+    @staticmethod
+    def _pick_replacement(
+        payload: PullRequestReassign,
+        prs: dict[UUID, PullRequest],
+        reviewers: dict[UUID, dict[UUID, UUID | None]],
+        reviewer_teams: dict[UUID, UUID | None],
+        pool: CandidatePool,
+    ) -> UUID:
+        pr = prs.get(payload.pull_request_id)
+        if pr is None:
+            raise PullRequestNotFoundError(f"Pull request с id {payload.pull_request_id} не найден")
+
+        if pr.status == PRStatus.MERGED:
+            raise PullRequestMergedError("Нельзя переназначить ревьюера у MERGED PR")
+
+        if payload.old_user_id not in reviewer_teams:
+            raise UserNotFoundError(f"Пользователь с id {payload.old_user_id} не найден")
+
+        current = reviewers.setdefault(pr.id, {})
+        if payload.old_user_id not in current:
+            raise ReviewerNotAssignedError("Ревьювер не назначен на этот pull request")
+
+        team_id = reviewer_teams[payload.old_user_id]
+        if team_id is None:
+            raise ReplacementCandidateNotFoundError("У ревьювера нет команды")
+
+        candidate_ids = pool.pick(team_id, {*current, payload.old_user_id, pr.author_id}, 1)
+        if not candidate_ids:
+            raise ReplacementCandidateNotFoundError("Нет доступных кандидатов в команде ревьювера")
+        return candidate_ids[0]
+
+    @staticmethod
+    async def _get_user_teams(
+        conn: BaseDBAsyncClient, user_ids: Iterable[UUID]
+    ) -> dict[UUID, UUID | None]:
+        p = SqlParams(get_dialect(conn))
+        sql = f"""
+            SELECT u.id AS user_id, tm.team_id
+            FROM users u
+            LEFT JOIN team_members tm ON tm.user_id = u.id
+            WHERE {p.in_list("u.id", set(user_ids), "uuid")}
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        return {to_uuid(row["user_id"]): to_uuid(row["team_id"]) for row in rows}
+
+    @staticmethod
+    async def _get_existing_ids(conn: BaseDBAsyncClient, pr_ids: Iterable[UUID]) -> set[UUID]:
+        p = SqlParams(get_dialect(conn))
+        sql = f"SELECT id FROM pull_requests WHERE {p.in_list('id', set(pr_ids), 'uuid')}"
+        _, rows = await conn.execute_query(sql, p.values)
+        return {to_uuid(row["id"]) for row in rows}
+
+    @staticmethod
+    async def _get_assignments(
+        conn: BaseDBAsyncClient, pr_ids: list[UUID]
+    ) -> dict[UUID, dict[UUID, UUID | None]]:
+        p = SqlParams(get_dialect(conn))
+        sql = f"""
+            SELECT id, pr_id, reviewer_id
+            FROM pull_request_reviewers
+            WHERE {p.in_list("pr_id", pr_ids, "uuid")}
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+
+        assignments: dict[UUID, dict[UUID, UUID | None]] = {pr_id: {} for pr_id in pr_ids}
+        for row in rows:
+            assignments[to_uuid(row["pr_id"])][to_uuid(row["reviewer_id"])] = to_uuid(row["id"])
+        return assignments
+
+    @staticmethod
+    async def _insert_pull_requests(
+        conn: BaseDBAsyncClient, payloads: list[PullRequestCreate], now: datetime
+    ) -> set[UUID]:
+        created_ids: set[UUID] = set()
+        for chunk in chunked(payloads):
+            p = SqlParams(get_dialect(conn))
+            values = p.value_rows(
+                (
+                    (
+                        payload.pull_request_id,
+                        now,
+                        now,
+                        payload.author_id,
+                        PRStatus.OPEN.value,
+                        payload.pull_request_name,
+                    )
+                    for payload in chunk
+                ),
+                ["uuid", "timestamptz", "timestamptz", "uuid", None, None],
+            )
+            sql = f"""
+                INSERT INTO pull_requests (id, created_at, updated_at, author_id, status, title)
+                VALUES {values}
+                ON CONFLICT (id) DO NOTHING
+                RETURNING id
+            """
+            _, rows = await conn.execute_query(sql, p.values)
+            created_ids.update(to_uuid(row["id"]) for row in rows)
+        return created_ids
+
+    @staticmethod
+    async def _lock_pull_requests(pr_ids: Iterable[UUID]) -> dict[UUID, PullRequest]:
+        # Блокировки по возрастанию id: пересекающиеся пакеты не взаимоблокируются
+        prs = await PullRequest.filter(id__in=set(pr_ids)).order_by("id").select_for_update()
+        return {pr.id: pr for pr in prs}
+
+    @staticmethod
+    def _build_dto(pr: PullRequest, reviewer_ids: list[UUID]) -> PullRequestDto:
+        return PullRequestDto(
+            pull_request_id=pr.id,
+            pull_request_name=pr.title,
+            status=pr.status,
+            author_id=pr.author_id,
+            assigned_reviewers=reviewer_ids,
+            created_at=pr.created_at,
+        )
+
+    @staticmethod
+    def _failed(index: int, pr_id: UUID, exc: ServiceError) -> PullRequestBatchResult:
+        return PullRequestBatchResult(
+            index=index,
+            pull_request_id=pr_id,
+            status_code=exc.status_code,
+            error=BatchItemError.from_error(exc),
+        )
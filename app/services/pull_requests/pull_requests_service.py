@@ -1,9 +1,17 @@
 from uuid import UUID
 
+from tortoise import timezone
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.common.pagination import DEFAULT_PAGE_SIZE, Cursor
+from app.db.replicas import read_connection
+from app.db.sql import SqlParams, get_dialect, to_datetime, to_uuid
+from app.db.unit_of_work import unit_of_work
 from app.models.pull_request_reviewers import PullRequestReviewer
 from app.models.pull_requests import PRStatus, PullRequest
 from app.models.team_members import TeamMember
 from app.models.users import User
+from app.services.outbox.schemas import WebhookEvent
 from app.services.pull_request_reviewers.pull_request_reviewers_service import (
     PullRequestReviewerService,
 )
@@ -14,11 +22,13 @@ from app.services.pull_requests.errors import (
     ReplacementCandidateNotFoundError,
     ReviewerNotAssignedError,
 )
+from app.services.pull_requests.events import PullRequestEvents
 from app.services.pull_requests.schemas import (
     PullRequestCreate,
     PullRequestDto,
     PullRequestReassign,
     PullRequestShort,
+    ReviewerSummary,
 )
 from app.services.teams.errors import TeamNotFoundError
 from app.services.users.errors import UserNotFoundError
@@ -26,44 +36,83 @@ from app.services.users.errors import UserNotFoundError
 
 class PullRequestService:
     @staticmethod
-    async def create_pull_request(payload: PullRequestCreate) -> PullRequest:
+    async def create_pull_request(payload: PullRequestCreate) -> PullRequestDto:
         author_id = payload.author_id
+        now = timezone.now()
 
-        exists = await User.filter(id=author_id).exists()
-        if not exists:
-            raise UserNotFoundError(f"Пользователь с id {author_id} не найден", status_code=404)
+        async with unit_of_work() as conn:
+            p = SqlParams(get_dialect(conn))
+            sql = f"""
+                INSERT INTO pull_requests (id, created_at, updated_at, author_id, status, title)
+                SELECT {p(payload.pull_request_id, "uuid")},
+                       {p(now, "timestamptz")}, {p(now, "timestamptz")},
+                       u.id, {p(PRStatus.OPEN.value)}, {p(payload.pull_request_name)}
+                FROM users u
+                JOIN team_members tm ON tm.user_id = u.id
+                WHERE u.id = {p(author_id)}
+                ON CONFLICT (id) DO NOTHING
+                RETURNING id
+            """
+            _, rows = await conn.execute_query(sql, p.values)
+            if not rows:
+                await PullRequestService._raise_create_error(conn, payload)
 
-        if await PullRequest.filter(id=payload.pull_request_id).exists():
-            raise PullRequestAlreadyExistsError(
-                f"Pull request с id {payload.pull_request_id} уже существует"
+            reviewer_ids = await PullRequestReviewerService.assign_reviewers(
+                conn, payload.pull_request_id, author_id, now
+            )
+            dto = PullRequestDto(
+                pull_request_id=payload.pull_request_id,
+                pull_request_name=payload.pull_request_name,
+                status=PRStatus.OPEN,
+                author_id=author_id,
+                assigned_reviewers=reviewer_ids,
+                created_at=now,
             )
+            await PullRequestEvents.record(conn, [WebhookEvent.pull_request_created(dto, now)])
 
-        author_team = await TeamMember.filter(user_id=author_id).first()
-        if not author_team:
-            raise TeamNotFoundError("Команда автора не найдена", status_code=404, code="NOT_FOUND")
+        return dto
 
-        pr = await PullRequest.create(
-            id=payload.pull_request_id,
-            title=payload.pull_request_name,
-            author_id=author_id,
-            status=PRStatus.OPEN,
-        )
+    @staticmethod
+    async def _raise_create_error(conn: BaseDBAsyncClient, payload: PullRequestCreate) -> None:
+        p = SqlParams(get_dialect(conn))
+        sql = f"""
+            SELECT
+                EXISTS(SELECT 1 FROM users WHERE id = {p(payload.author_id)}) AS author_exists,
+                EXISTS(
+                    SELECT 1 FROM pull_requests WHERE id = {p(payload.pull_request_id)}
+                ) AS pr_exists
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        row = rows[0]
 
-        await PullRequestReviewerService.add_pull_request_reviewers(
-            pr.id, author_team.team_id, author_id
-        )
+        if not row["author_exists"]:
+            raise UserNotFoundError(
+                f"Пользователь с id {payload.author_id} не найден", status_code=404
+            )
 
-        return pr
+        if row["pr_exists"]:
+            raise PullRequestAlreadyExistsError(
+                f"Pull request с id {payload.pull_request_id} уже существует"
+            )
+
+        raise TeamNotFoundError("Команда автора не найдена", status_code=404, code="NOT_FOUND")
 
     @staticmethod
     async def merge_pull_request(pr_id: UUID) -> PullRequest:
-        pr = await PullRequest.filter(id=pr_id).first()
-        if not pr:
-            raise PullRequestNotFoundError(f"Pull request с id {pr_id} не найден")
+        async with unit_of_work() as conn:
+            pr = await PullRequest.filter(id=pr_id).select_for_update().first()
+            if not pr:
+                raise PullRequestNotFoundError(f"Pull request с id {pr_id} не найден")
 
-        if pr.status != PRStatus.MERGED:
-            pr.status = PRStatus.MERGED
-            await pr.save()
+            if pr.status != PRStatus.MERGED:
+                pr.status = PRStatus.MERGED
+                await pr.save()
+                await PullRequestReviewerService.release_pull_requests(conn, [pr.id])
+                await PullRequestReviewerService.mark_merged(conn, [pr.id])
+                event = WebhookEvent.pull_request_merged(
+                    pr.id, pr.title, pr.author_id, timezone.now()
+                )
+                await PullRequestEvents.record(conn, [event])
 
         return pr
 
@@ -71,43 +120,55 @@ class PullRequestService:
     async def reassign_pull_request(
         pr_id: UUID, payload: PullRequestReassign
     ) -> tuple[PullRequest, UUID]:
-        pr = await PullRequest.filter(id=pr_id).first()
-        if not pr:
-            raise PullRequestNotFoundError(f"Pull request с id {pr_id} не найден")
+        async with unit_of_work() as conn:
+            # Блокировка PR сериализует параллельные reassign и merge одного PR
+            pr = await PullRequest.filter(id=pr_id).select_for_update().first()
+            if not pr:
+                raise PullRequestNotFoundError(f"Pull request с id {pr_id} не найден")
 
-        if pr.status == PRStatus.MERGED:
-            raise PullRequestMergedError("Нельзя переназначить ревьюера у MERGED PR")
+            if pr.status == PRStatus.MERGED:
+                raise PullRequestMergedError("Нельзя переназначить ревьюера у MERGED PR")
 
-        old_reviewer = await User.filter(id=payload.old_user_id).first()
-        if not old_reviewer:
-            raise UserNotFoundError(f"Пользователь с id {payload.old_user_id} не найден")
+            if not await User.filter(id=payload.old_user_id).exists():
+                raise UserNotFoundError(f"Пользователь с id {payload.old_user_id} не найден")
 
-        assigned = await PullRequestReviewer.filter(
-            pr_id=pr_id, reviewer_id=payload.old_user_id
-        ).exists()
-        if not assigned:
-            raise ReviewerNotAssignedError("Ревьювер не назначен на этот pull request")
+            current_reviewer_ids = await PullRequestReviewer.filter(pr_id=pr_id).values_list(
+                "reviewer_id", flat=True
+            )
+            if payload.old_user_id not in current_reviewer_ids:
+                raise ReviewerNotAssignedError("Ревьювер не назначен на этот pull request")
 
-        reviewer_team = await TeamMember.filter(user_id=payload.old_user_id).first()
-        if not reviewer_team:
-            raise ReplacementCandidateNotFoundError("У ревьювера нет команды")
+            reviewer_team_id = (
+                await TeamMember.filter(user_id=payload.old_user_id)
+                .first()
+                .values_list("team_id", flat=True)
+            )
+            if not reviewer_team_id:
+                raise ReplacementCandidateNotFoundError("У ревьювера нет команды")
 
-        current_reviewer_ids = await PullRequestReviewer.filter(pr_id=pr_id).values_list(
-            "reviewer_id", flat=True
-        )
+            candidate_id = await PullRequestReviewerService.pick_replacement_candidate(
+                team_id=reviewer_team_id,
+                exclude_ids=set(current_reviewer_ids) | {payload.old_user_id, pr.author_id},
+            )
 
-        candidate = await PullRequestReviewerService.pick_replacement_candidate(
-            team_id=reviewer_team.team_id,
-            exclude_ids=set(current_reviewer_ids) | {payload.old_user_id, pr.author_id},
-        )
+            if not candidate_id:
+                raise ReplacementCandidateNotFoundError(
+                    "Нет доступных кандидатов в команде ревьювера"
+                )
 
-        if not candidate:
-            raise ReplacementCandidateNotFoundError("Нет доступных кандидатов в команде ревьювера")
+            await PullRequestReviewer.filter(pr_id=pr_id, reviewer_id=payload.old_user_id).delete()
+            await PullRequestReviewer.create(pr_id=pr_id, reviewer_id=candidate_id)
 
-        await PullRequestReviewer.filter(pr_id=pr_id, reviewer_id=payload.old_user_id).delete()
-        await PullRequestReviewer.create(pr_id=pr_id, reviewer_id=candidate.id)
+            now = timezone.now()
+            await PullRequestReviewerService.track_reassigned(
+                conn, [payload.old_user_id], [candidate_id], now
+            )
+            event = WebhookEvent.pull_request_reassigned(
+                pr_id, payload.old_user_id, candidate_id, now
+            )
+            await PullRequestEvents.record(conn, [event])
 
-        return pr, candidate.id
+        return pr, candidate_id
 
     @staticmethod
     async def to_dto(pr: PullRequest) -> PullRequestDto:
@@ -144,18 +205,67 @@ class PullRequestService:
         return await PullRequestReviewerService.get_pull_request_reviewer_ids_map(pr_ids)
 
     @staticmethod
-    async def get_pull_requests_for_reviewer(user_id: UUID) -> list[PullRequest]:
-        exists = await User.filter(id=user_id).exists()
-        if not exists:
+    async def get_reviewer_summary(user_id: UUID) -> ReviewerSummary:
+        summary = await PullRequestReviewerService.get_reviewer_summary(user_id)
+        if summary is None:
             raise UserNotFoundError(f"Пользователь с id {user_id} не найден")
+        return summary
 
-        pr_ids = await PullRequestReviewer.filter(reviewer_id=user_id).values_list(
-            "pr_id", flat=True
-        )
-        if not pr_ids:
-            return []
+    @staticmethod
+    async def get_pull_requests_for_reviewer(
+        user_id: UUID,
+        status: PRStatus | None = None,
+        limit: int | None = DEFAULT_PAGE_SIZE,
+        cursor: Cursor | None = None,
+    ) -> tuple[list[PullRequestShort], Cursor | None]:
+        # Без limit и курсора ответ прежний: все PR ревьювера в порядке их создания
+        if limit is None and cursor is not None:
+            limit = DEFAULT_PAGE_SIZE
+        conn = read_connection()
+        p = SqlParams(get_dialect(conn))
+        conditions = [f"r.reviewer_id = {p(user_id, 'uuid')}"]
+        if status is not None:
+            conditions.append(f"r.pr_status = {p(status.value)}")
+        if cursor is not None:
+            # Страница идёт по индексу (reviewer_id[, pr_status], created_at, id) назначений
+            conditions.append(
+                f"r.created_at >= {p(cursor.created_at, 'timestamptz')}"
+                f" AND (r.created_at > {p(cursor.created_at, 'timestamptz')}"
+                f" OR r.id > {p(cursor.id, 'uuid')})"
+            )
+
+        if limit is None:
+            order_by = "pr.created_at, pr.id"
+        else:
+            order_by = f"r.created_at, r.id LIMIT {p(limit + 1)}"
+        sql = f"""
+            SELECT r.id AS assignment_id, r.created_at AS assigned_at,
+                   pr.id, pr.title, pr.status, pr.author_id
+            FROM pull_request_reviewers r
+            JOIN pull_requests pr ON pr.id = r.pr_id
+            WHERE {" AND ".join(conditions)}
+            ORDER BY {order_by}
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = Cursor(
+                created_at=to_datetime(last["assigned_at"]), id=to_uuid(last["assignment_id"])
+            )
 
-        return await PullRequest.filter(id__in=pr_ids).order_by("created_at")
+        prs = [
+            PullRequestShort(
+                pull_request_id=to_uuid(row["id"]),
+                pull_request_name=row["title"],
+                author_id=to_uuid(row["author_id"]),
+                status=row["status"],
+            )
+            for row in rows
+        ]
+        return prs, next_cursor
 
     @staticmethod
     async def to_short_dtos(prs: list[PullRequest]) -> list[PullRequestShort]:
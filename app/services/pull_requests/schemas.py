@@ -3,6 +3,7 @@ from uuid import UUID
 
 from pydantic import AliasChoices, BaseModel, Field
 
+from app.common.batch import MAX_BATCH_SIZE, BatchItemError
 from app.models.pull_requests import PRStatus
 
 
@@ -50,6 +51,11 @@ class PullRequestShort(BaseModel):
     }
 
 
+class ReviewerSummary(BaseModel):
+    open_reviews: int
+    last_assigned_at: datetime | None = None
+
+
 class PullRequestResponse(BaseModel):
     pr: PullRequestDto
 
@@ -57,3 +63,28 @@ class PullRequestResponse(BaseModel):
 class PullRequestReassignResponse(BaseModel):
     pr: PullRequestDto
     replaced_by: UUID
+
+
+class PullRequestBatchCreate(BaseModel):
+    items: list[PullRequestCreate] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class PullRequestBatchMerge(BaseModel):
+    items: list[PullRequestMerge] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class PullRequestBatchReassign(BaseModel):
+    items: list[PullRequestReassign] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class PullRequestBatchResult(BaseModel):
+    index: int
+    pull_request_id: UUID
+    status_code: int
+    pr: PullRequestDto | None = None
+    replaced_by: UUID | None = None
+    error: BatchItemError | None = None
+
+
+class PullRequestBatchResponse(BaseModel):
+    results: list[PullRequestBatchResult]
@@ -0,0 +1,179 @@
+import logging
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import AsyncIterator, Iterable
+from uuid import UUID
+
+from tortoise import connections, timezone
+
+from app.common.pagination import Cursor
+from app.common.pubsub import PubSub
+from app.common.sse import sse_comment, sse_event, sse_retry
+from app.core.config import Settings, get_settings
+from app.db.listener import PgListener
+from app.db.sql import SqlParams, get_dialect, to_datetime, to_uuid
+from app.services.outbox.schemas import PullRequestEventType, WebhookEvent
+from app.services.pull_requests.schemas import PullRequestShort
+from app.services.review_stream.schemas import ReviewAssignmentEvent
+
+logger = logging.getLogger(__name__)
+
+REVIEW_CHANNEL = "review_assignments"
+ALL_REVIEWERS = "*"
+EVENT_TYPE = "review.assigned"
+RETRY_MILLISECONDS = 3000
+FETCH_BATCH_SIZE = 500
+# created_at назначения берётся до COMMIT, поэтому более раннее назначение может
+# зафиксироваться позже уже отправленного; такие строки дочитываются в пределах окна
+REORDER_WINDOW = timedelta(seconds=5)
+
+# Сообщение - id PR или None, если источник его не знает; поток использует его только
+# как сигнал и сам дочитывает назначения от своего курсора
+ReviewBroker = PubSub[UUID, UUID | None]
+
+
+class ReviewStream:
+    def __init__(self, user_id: UUID, after: Cursor) -> None:
+        self.user_id = user_id
+        self.floor = after
+        self.position = after
+        self._sent: dict[UUID, datetime] = {}
+
+    async def fetch(self) -> list[tuple[Cursor, ReviewAssignmentEvent]]:
+        since = max(self.floor.created_at, self.position.created_at - REORDER_WINDOW)
+        events = []
+        after = None
+        while True:
+            rows = await ReviewStreamService.get_assignments(
+                self.user_id, since, after, FETCH_BATCH_SIZE
+            )
+            for row in rows:
+                if self._accept(row):
+                    events.append((self.position, row))
+            if len(rows) < FETCH_BATCH_SIZE:
+                break
+            after = Cursor(created_at=rows[-1].assigned_at, id=rows[-1].assignment_id)
+
+        horizon = self.position.created_at - REORDER_WINDOW
+        self._sent = {id_: at for id_, at in self._sent.items() if at >= horizon}
+        return events
+
+    def _accept(self, event: ReviewAssignmentEvent) -> bool:
+        key = (event.assigned_at, event.assignment_id)
+        if key <= (self.floor.created_at, self.floor.id) or event.assignment_id in self._sent:
+            return False
+
+        self._sent[event.assignment_id] = event.assigned_at
+        if key > (self.position.created_at, self.position.id):
+            self.position = Cursor(created_at=event.assigned_at, id=event.assignment_id)
+        return True
+
+
+class ReviewStreamService:
+    @staticmethod
+    async def stream(user_id: UUID, after: Cursor | None) -> AsyncIterator[bytes]:
+        settings = get_settings()
+        # Без Last-Event-ID поток начинается с момента подключения
+        stream = ReviewStream(user_id, after or Cursor(created_at=timezone.now(), id=UUID(int=0)))
+
+        with get_review_broker().subscribe(user_id) as subscription:
+            yield sse_retry(RETRY_MILLISECONDS)
+            while True:
+                # Подписка оформлена до чтения, поэтому назначение между ними не теряется
+                for position, event in await stream.fetch():
+                    yield sse_event(event.model_dump_json(), EVENT_TYPE, position.encode())
+
+                while await subscription.wait(settings.review_stream_heartbeat_seconds) is None:
+                    yield sse_comment("heartbeat")
+
+    @staticmethod
+    async def get_assignments(
+        user_id: UUID, since: datetime, after: Cursor | None, limit: int
+    ) -> list[ReviewAssignmentEvent]:
+        # Уведомление приходит после COMMIT на primary, реплика может его ещё не догнать
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        conditions = [
+            f"r.reviewer_id = {p(user_id, 'uuid')}",
+            f"r.created_at >= {p(since, 'timestamptz')}",
+        ]
+        if after is not None:
+            conditions.append(
+                f"(r.created_at > {p(after.created_at, 'timestamptz')}"
+                f" OR (r.created_at = {p(after.created_at, 'timestamptz')}"
+                f" AND r.id > {p(after.id, 'uuid')}))"
+            )
+
+        sql = f"""
+            SELECT r.id AS assignment_id, r.created_at AS assigned_at,
+                   pr.id, pr.title, pr.status, pr.author_id
+            FROM pull_request_reviewers r
+            JOIN pull_requests pr ON pr.id = r.pr_id
+            WHERE {" AND ".join(conditions)}
+            ORDER BY r.created_at, r.id
+            LIMIT {p(limit)}
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        return [
+            ReviewAssignmentEvent(
+                assignment_id=to_uuid(row["assignment_id"]),
+                assigned_at=to_datetime(row["assigned_at"]),
+                pull_request=PullRequestShort(
+                    pull_request_id=to_uuid(row["id"]),
+                    pull_request_name=row["title"],
+                    author_id=to_uuid(row["author_id"]),
+                    status=row["status"],
+                ),
+            )
+            for row in rows
+        ]
+
+
+async def publish_review_assignments(events: Iterable[WebhookEvent]) -> None:
+    # Сообщение только будит поток, поэтому каждому ревьюверу хватает одного на пакет
+    latest: dict[str, str] = {}
+    for event in events:
+        if event.event_type == PullRequestEventType.CREATED:
+            reviewer_ids = event.data["assigned_reviewers"]
+        elif event.event_type == PullRequestEventType.REASSIGNED:
+            reviewer_ids = [event.data["new_reviewer_id"]] if event.data["new_reviewer_id"] else []
+        else:
+            continue
+
+        for reviewer_id in reviewer_ids:
+            latest[reviewer_id] = event.data["pull_request_id"]
+
+    broker = get_review_broker()
+    for reviewer_id, pr_id in latest.items():
+        broker.publish(UUID(reviewer_id), UUID(pr_id))
+
+
+def handle_review_message(payload: str) -> None:
+    broker = get_review_broker()
+    if payload == ALL_REVIEWERS:
+        broker.publish_all(None)
+        return
+    for reviewer_id in payload.split(","):
+        broker.publish(UUID(reviewer_id), None)
+
+
+def wake_all_review_streams() -> None:
+    # Пока LISTEN не работал, уведомления могли потеряться: все потоки дочитывают из БД
+    get_review_broker().publish_all(None)
+
+
+def create_review_listener(settings: Settings) -> PgListener | None:
+    if not settings.review_stream_bus_enabled or settings.db_schema.startswith("sqlite"):
+        return None
+
+    return PgListener(
+        settings,
+        REVIEW_CHANNEL,
+        on_message=handle_review_message,
+        on_gap=wake_all_review_streams,
+    )
+
+
+@lru_cache
+def get_review_broker() -> ReviewBroker:
+    return ReviewBroker(get_settings().review_stream_queue_size)
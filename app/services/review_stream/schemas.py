@@ -0,0 +1,12 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.services.pull_requests.schemas import PullRequestShort
+
+
+class ReviewAssignmentEvent(BaseModel):
+    assignment_id: UUID
+    assigned_at: datetime
+    pull_request: PullRequestShort
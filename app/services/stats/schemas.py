@@ -0,0 +1,75 @@
+from enum import Enum
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.models.pull_requests import PRStatus
+
+
+class StatScope(str, Enum):
+    GLOBAL = "global"
+    TEAM = "team"
+    USER = "user"
+
+
+class StatMetric(str, Enum):
+    # PR считаются по автору, ревью - по ревьюверу
+    PRS_OPEN = "prs_open"
+    PRS_MERGED = "prs_merged"
+    REVIEWS_OPEN = "reviews_open"
+    REVIEWS_TOTAL = "reviews_total"
+
+
+class PullRequestCounts(BaseModel):
+    open: int
+    merged: int
+    merged_ratio: float
+
+    @classmethod
+    def from_counters(cls, counters: dict[StatMetric, int]) -> "PullRequestCounts":
+        opened = counters.get(StatMetric.PRS_OPEN, 0)
+        merged = counters.get(StatMetric.PRS_MERGED, 0)
+        total = opened + merged
+        return cls(open=opened, merged=merged, merged_ratio=merged / total if total else 0.0)
+
+
+class ReviewCounts(BaseModel):
+    open: int
+    total: int
+
+    @classmethod
+    def from_counters(cls, counters: dict[StatMetric, int]) -> "ReviewCounts":
+        return cls(
+            open=counters.get(StatMetric.REVIEWS_OPEN, 0),
+            total=counters.get(StatMetric.REVIEWS_TOTAL, 0),
+        )
+
+
+class LoadBucket(BaseModel):
+    open_reviews: int
+    users: int
+
+
+class StatsResponse(BaseModel):
+    pull_requests: PullRequestCounts
+    reviews: ReviewCounts
+    # Сколько активных пользователей имеют данное число открытых ревью
+    load_distribution: list[LoadBucket]
+
+
+class TeamStatsResponse(StatsResponse):
+    team_id: UUID
+
+
+class UserStatsResponse(BaseModel):
+    user_id: UUID
+    pull_requests: PullRequestCounts
+    reviews: ReviewCounts
+
+
+class PullRequestStatsResponse(BaseModel):
+    pull_request_id: UUID
+    status: PRStatus
+    reviewers: int
+
+    model_config = {"use_enum_values": True}
@@ -0,0 +1,343 @@
+import asyncio
+import logging
+import random
+from collections import Counter
+from typing import Iterable
+from uuid import UUID
+
+from tortoise import connections, timezone
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.core.config import get_settings
+from app.db.replicas import read_connection
+from app.db.sql import POSTGRES, SqlParams, get_dialect, to_uuid
+from app.db.unit_of_work import unit_of_work
+from app.models.pull_requests import PRStatus
+from app.services.outbox.schemas import PullRequestEventType, WebhookEvent
+from app.services.pull_requests.errors import PullRequestNotFoundError
+from app.services.stats.schemas import (
+    LoadBucket,
+    PullRequestCounts,
+    PullRequestStatsResponse,
+    ReviewCounts,
+    StatMetric,
+    StatScope,
+    StatsResponse,
+    TeamStatsResponse,
+    UserStatsResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_LOCK_ID = 7_301_904_512
+RECONCILE_BATCH_SIZE = 500
+
+
+class StatsService:
+    @staticmethod
+    async def track_events(conn: BaseDBAsyncClient, events: Iterable[WebhookEvent]) -> None:
+        # Счётчики меняются в транзакции изменения, по тем же событиям, что уходят в outbox
+        p = SqlParams(get_dialect(conn))
+        sql = StatsService._counters_sql(p, events)
+        if sql:
+            await conn.execute_query(sql, p.values)
+
+    @staticmethod
+    def _counters_sql(p: SqlParams, events: Iterable[WebhookEvent]) -> str | None:
+        # Изменения сразу складываются по пользователю: пакет из тысяч событий даёт столько
+        # строк, сколько в нём разных пользователей. Открытые и все ревью меняются вместе
+        reviews: Counter[str | None] = Counter()
+        opened: Counter[str | None] = Counter()
+        merged: Counter[str | None] = Counter()
+        merged_ids: list[UUID] = []
+        for event in events:
+            data = event.data
+            if event.event_type == PullRequestEventType.CREATED:
+                opened[data["author_id"]] += 1
+                reviews.update(data["assigned_reviewers"])
+            elif event.event_type == PullRequestEventType.MERGED:
+                opened[data["author_id"]] -= 1
+                merged[data["author_id"]] += 1
+                merged_ids.append(UUID(data["pull_request_id"]))
+            elif event.event_type == PullRequestEventType.REASSIGNED:
+                reviews[data["old_reviewer_id"]] -= 1
+                reviews[data["new_reviewer_id"]] += 1
+        reviews.pop(None, None)
+
+        rows = [
+            (_uuid(user_id), metric.value, delta)
+            for metric, deltas in (
+                (StatMetric.REVIEWS_OPEN, reviews),
+                (StatMetric.REVIEWS_TOTAL, reviews),
+                (StatMetric.PRS_OPEN, opened),
+                (StatMetric.PRS_MERGED, merged),
+            )
+            for user_id, delta in deltas.items()
+            if delta
+        ]
+        if not rows and not merged_ids:
+            return None
+
+        sources = [p.unnest(["user_id", "metric", "delta"], rows, ["uuid", "text", "int"])]
+        if merged_ids:
+            # Ревьюверов влитых PR в событии нет, их открытые ревью снимаются по назначениям
+            sources.append(f"""
+                SELECT reviewer_id AS user_id, {p(StatMetric.REVIEWS_OPEN.value, "text")} AS metric,
+                       -1 AS delta
+                FROM pull_request_reviewers
+                WHERE {p.in_list("pr_id", merged_ids, "uuid")}
+            """)
+        slot = random.randrange(get_settings().stats_counter_slots)
+        return StatsService._add_sql(p, " UNION ALL ".join(sources), slot)
+
+    @staticmethod
+    async def reconcile() -> int:
+        # Пересчёт исправляет расхождения, например после переходов между командами.
+        # Счётчики сверяются пачками субъектов, каждая пачка - один запрос в своей транзакции:
+        # он по одному снимку читает историю и счётчики и дописывает к счётчикам разницу.
+        # Изменение, зафиксированное до снимка, видно в обоих, остальные ни в одном, поэтому
+        # пересчёт не блокирует пишущих и ничего не учитывает дважды
+        drifted = await StatsService._reconcile_subjects(StatScope.GLOBAL, [])
+        for scope in (StatScope.USER, StatScope.TEAM):
+            after = None
+            while drifted is not None:
+                subject_ids = await StatsService._next_subjects(scope, after)
+                if not subject_ids:
+                    break
+                corrected = await StatsService._reconcile_subjects(scope, subject_ids)
+                drifted = None if corrected is None else drifted + corrected
+                after = subject_ids[-1]
+
+        if drifted is None:
+            return 0
+        if drifted:
+            logger.warning("Статистика пересчитана, исправлено счётчиков: %s", drifted)
+        return drifted
+
+    @staticmethod
+    async def get_stats() -> StatsResponse:
+        counters = await StatsService._get_counters(StatScope.GLOBAL, None)
+        return StatsResponse(
+            pull_requests=PullRequestCounts.from_counters(counters),
+            reviews=ReviewCounts.from_counters(counters),
+            load_distribution=await StatsService._get_load_distribution(None),
+        )
+
+    @staticmethod
+    async def get_team_stats(team_id: UUID) -> TeamStatsResponse:
+        counters = await StatsService._get_counters(StatScope.TEAM, team_id)
+        return TeamStatsResponse(
+            team_id=team_id,
+            pull_requests=PullRequestCounts.from_counters(counters),
+            reviews=ReviewCounts.from_counters(counters),
+            load_distribution=await StatsService._get_load_distribution(team_id),
+        )
+
+    @staticmethod
+    async def get_user_stats(user_id: UUID) -> UserStatsResponse:
+        counters = await StatsService._get_counters(StatScope.USER, user_id)
+        return UserStatsResponse(
+            user_id=user_id,
+            pull_requests=PullRequestCounts.from_counters(counters),
+            reviews=ReviewCounts.from_counters(counters),
+        )
+
+    @staticmethod
+    async def get_pull_request_stats(pr_id: UUID) -> PullRequestStatsResponse:
+        # У PR не больше пары назначений, счётчик по индексу не нужен
+        conn = read_connection()
+        p = SqlParams(get_dialect(conn))
+        sql = f"""
+            SELECT pr.status, COUNT(r.id) AS reviewers
+            FROM pull_requests pr
+            LEFT JOIN pull_request_reviewers r ON r.pr_id = pr.id
+            WHERE pr.id = {p(pr_id, "uuid")}
+            GROUP BY pr.status
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        if not rows:
+            raise PullRequestNotFoundError(f"Pull request с id {pr_id} не найден")
+        return PullRequestStatsResponse(
+            pull_request_id=pr_id, status=rows[0]["status"], reviewers=rows[0]["reviewers"]
+        )
+
+    @staticmethod
+    async def _next_subjects(scope: StatScope, after: UUID | None) -> list[UUID]:
+        # Субъекты берутся и из счётчиков: так обнуляются счётчики удалённых пользователей
+        conn = connections.get("default")
+        p = SqlParams(get_dialect(conn))
+        subjects = "SELECT id FROM users" if scope == StatScope.USER else "SELECT id FROM teams"
+        if after is not None:
+            subjects += f" WHERE id > {p(after, 'uuid')}"
+        counters = f"SELECT subject_id FROM stat_counters WHERE scope = {p(scope.value)}"
+        if after is not None:
+            counters += f" AND subject_id > {p(after, 'uuid')}"
+        sql = f"{subjects} UNION {counters} ORDER BY 1 LIMIT {p(RECONCILE_BATCH_SIZE)}"
+        _, rows = await conn.execute_query(sql, p.values)
+        return [to_uuid(row["id"]) for row in rows]
+
+    @staticmethod
+    async def _reconcile_subjects(scope: StatScope, subject_ids: list[UUID]) -> int | None:
+        # None: пересчёт уже идёт в другом воркере. Два пересчёта одной пачки по одному
+        # снимку дописали бы разницу дважды
+        async with unit_of_work() as conn:
+            dialect = get_dialect(conn)
+            if dialect == POSTGRES:
+                _, rows = await conn.execute_query(
+                    "SELECT pg_try_advisory_xact_lock($1) AS locked", [RECONCILE_LOCK_ID]
+                )
+                if not rows[0]["locked"]:
+                    return None
+
+            p = SqlParams(dialect)
+            scope_sql = p(scope.value, "text")
+            expected = StatsService._expected_sql(p, scope, subject_ids)
+            current = f"scope = {p(scope.value)} AND "
+            if scope == StatScope.GLOBAL:
+                current += "subject_id IS NULL"
+            else:
+                current += p.in_list("subject_id", subject_ids, "uuid")
+            sql = f"""
+                WITH c AS (
+                    SELECT {scope_sql} AS scope, d.subject_id, d.metric,
+                           SUM(d.delta) AS value
+                    FROM (
+                        {expected}
+                        UNION ALL
+                        SELECT subject_id, metric, -value FROM stat_counters WHERE {current}
+                    ) AS d
+                    GROUP BY d.subject_id, d.metric
+                )
+                {StatsService._upsert_sql(p, 0)}
+                RETURNING key
+            """
+            _, rows = await conn.execute_query(sql, p.values)
+        return len(rows)
+
+    @staticmethod
+    def _expected_sql(p: SqlParams, scope: StatScope, subject_ids: list[UUID]) -> str:
+        # По строке (subject_id, metric, 1) на каждый PR и назначение субъектов пачки
+        def source(table: str, user_column: str) -> tuple[str, str]:
+            if scope == StatScope.USER:
+                column = f"t.{user_column}"
+                return column, f"{table} t WHERE {p.in_list(column, subject_ids, 'uuid')}"
+            if scope == StatScope.TEAM:
+                join = f"JOIN team_members tm ON tm.user_id = t.{user_column}"
+                condition = p.in_list("tm.team_id", subject_ids, "uuid")
+                return "tm.team_id", f"{table} t {join} WHERE {condition}"
+            return "CAST(NULL AS UUID)", f"{table} t WHERE TRUE"
+
+        metric = f"""
+            CASE WHEN t.status = {p(PRStatus.OPEN.value)}
+                 THEN {p(StatMetric.PRS_OPEN.value, "text")}
+                 ELSE {p(StatMetric.PRS_MERGED.value, "text")} END
+        """
+        subject, rows = source("pull_requests", "author_id")
+        selects = [f"SELECT {subject} AS subject_id, {metric} AS metric, 1 AS delta FROM {rows}"]
+
+        metric = p(StatMetric.REVIEWS_TOTAL.value, "text")
+        subject, rows = source("pull_request_reviewers", "reviewer_id")
+        selects.append(f"SELECT {subject}, {metric}, 1 FROM {rows}")
+
+        metric = p(StatMetric.REVIEWS_OPEN.value, "text")
+        subject, rows = source("pull_request_reviewers", "reviewer_id")
+        selects.append(
+            f"SELECT {subject}, {metric}, 1 FROM {rows} AND t.pr_status = {p(PRStatus.OPEN.value)}"
+        )
+        return " UNION ALL ".join(selects)
+
+    @staticmethod
+    def _add_sql(p: SqlParams, deltas: str, slot: int) -> str:
+        # Каждое изменение раскладывается на общий счётчик, счётчик пользователя и его команды
+        return f"""
+            WITH d AS ({deltas}),
+            c AS (
+                SELECT {p(StatScope.GLOBAL.value, "text")} AS scope, NULL AS subject_id,
+                       d.metric, SUM(d.delta) AS value
+                FROM d
+                GROUP BY d.metric
+                UNION ALL
+                SELECT {p(StatScope.USER.value, "text")}, d.user_id, d.metric, SUM(d.delta)
+                FROM d
+                WHERE d.user_id IS NOT NULL
+                GROUP BY d.user_id, d.metric
+                UNION ALL
+                SELECT {p(StatScope.TEAM.value, "text")}, tm.team_id, d.metric, SUM(d.delta)
+                FROM d
+                JOIN team_members tm ON tm.user_id = d.user_id
+                GROUP BY tm.team_id, d.metric
+            )
+            {StatsService._upsert_sql(p, slot)}
+        """
+
+    @staticmethod
+    def _upsert_sql(p: SqlParams, slot: int) -> str:
+        # Дописывает значения CTE c (scope, subject_id, metric, value) к счётчикам слота.
+        # Строки пишутся в порядке ключа, чтобы транзакции блокировали их одинаково
+        return f"""
+            INSERT INTO stat_counters (key, scope, subject_id, metric, slot, value, updated_at)
+            SELECT c.scope || ':' || COALESCE(CAST(c.subject_id AS TEXT), '') || ':'
+                       || c.metric || ':' || {p(slot, "int")},
+                   c.scope, c.subject_id, c.metric, {p(slot, "int")}, c.value,
+                   {p(timezone.now(), "timestamptz")}
+            FROM c
+            WHERE c.value <> 0
+            ORDER BY 1
+            ON CONFLICT (key) DO UPDATE
+            SET value = stat_counters.value + EXCLUDED.value,
+                updated_at = EXCLUDED.updated_at
+        """
+
+    @staticmethod
+    async def _get_counters(scope: StatScope, subject_id: UUID | None) -> dict[StatMetric, int]:
+        # Не больше stats_counter_slots строк на метрику: время ответа не зависит от истории
+        conn = read_connection()
+        p = SqlParams(get_dialect(conn))
+        conditions = [f"scope = {p(scope.value)}"]
+        if subject_id is None:
+            conditions.append("subject_id IS NULL")
+        else:
+            conditions.append(f"subject_id = {p(subject_id, 'uuid')}")
+        sql = f"""
+            SELECT metric, SUM(value) AS value
+            FROM stat_counters
+            WHERE {" AND ".join(conditions)}
+            GROUP BY metric
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        return {StatMetric(row["metric"]): int(row["value"]) for row in rows}
+
+    @staticmethod
+    async def _get_load_distribution(team_id: UUID | None) -> list[LoadBucket]:
+        # Строится по текущей нагрузке активных пользователей, а не по истории назначений
+        conn = read_connection()
+        p = SqlParams(get_dialect(conn))
+        team_filter = ""
+        if team_id is not None:
+            team_filter = f"""
+                AND u.id IN (SELECT user_id FROM team_members WHERE team_id = {p(team_id)})
+            """
+        sql = f"""
+            SELECT COALESCE(rl.open_reviews, 0) AS open_reviews, COUNT(*) AS users
+            FROM users u
+            LEFT JOIN reviewer_loads rl ON rl.user_id = u.id
+            WHERE u.is_active {team_filter}
+            GROUP BY COALESCE(rl.open_reviews, 0)
+            ORDER BY 1
+        """
+        _, rows = await conn.execute_query(sql, p.values)
+        return [LoadBucket(open_reviews=row["open_reviews"], users=row["users"]) for row in rows]
+
+
+async def reconcile_stats_periodically(interval_seconds: float) -> None:
+    # Первый пересчёт сразу при старте: так заполняются счётчики существующей истории
+    while True:
+        try:
+            await StatsService.reconcile()
+        except Exception:
+            logger.exception("Ошибка пересчёта статистики")
+        await asyncio.sleep(interval_seconds)
+
+
+def _uuid(value: str | None) -> UUID | None:
+    return UUID(value) if value else None
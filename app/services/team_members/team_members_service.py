@@ -1,15 +1,23 @@
+import uuid
 from uuid import UUID
 
+from tortoise import timezone
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import IntegrityError
+
+from app.db.sql import SqlParams, chunked, get_dialect, to_uuid
+from app.db.unit_of_work import unit_of_work
 from app.models.team_members import TeamMember
 from app.models.teams import Team
 from app.models.users import User
+from app.services.dto_cache import invalidate_dto_cache
 from app.services.teams.errors import (
     TeamMemberAlreadyExistsError,
     TeamMemberNotFoundError,
     TeamNotFoundError,
 )
-from app.services.teams.schemas import TeamMemberCreate
-from app.services.users.errors import UserNotFoundError
+from app.services.teams.schemas import TeamMemberCreate, TeamMemberDto
+from app.services.users.errors import UserAlreadyExistsError, UserNotFoundError
 
 
 class TeamMemberService:
@@ -21,81 +29,179 @@ class TeamMemberService:
     async def add_team_members(team_id: UUID, user_ids: list[UUID]) -> None:
         user_ids = list(set(user_ids))
 
-        team = await Team.filter(id=team_id).first()
-        if not team:
-            raise TeamNotFoundError(f"Команда с id {team_id} не найдена")
-
-        users = await User.filter(id__in=user_ids)
-        found_ids = {user.id for user in users}
-        missing_ids = [uid for uid in user_ids if uid not in found_ids]
-        if missing_ids:
-            raise UserNotFoundError(
-                f"Не найдены пользователи: {', '.join(map(str, missing_ids))}",
-                status_code=404,
-                extra={"user_ids": missing_ids},
-            )
-
-        existing_memberships = await TeamMember.filter(user_id__in=user_ids).values_list(
-            "user_id", "team_id"
-        )
-        if existing_memberships:
-            conflicting_user_ids = [user_id for user_id, _ in existing_memberships]
-            raise TeamMemberAlreadyExistsError(
-                "Пользователь уже состоит в команде",
-                status_code=409,
-                extra={"user_ids": conflicting_user_ids},
+        async with unit_of_work():
+            team_exists = await Team.filter(id=team_id).select_for_update().exists()
+            if not team_exists:
+                raise TeamNotFoundError(f"Команда с id {team_id} не найдена")
+
+            found_ids = set(await User.filter(id__in=user_ids).values_list("id", flat=True))
+            missing_ids = [uid for uid in user_ids if uid not in found_ids]
+            if missing_ids:
+                raise UserNotFoundError(
+                    f"Не найдены пользователи: {', '.join(map(str, missing_ids))}",
+                    status_code=404,
+                    extra={"user_ids": missing_ids},
+                )
+
+            existing_memberships = await TeamMember.filter(user_id__in=user_ids).values_list(
+                "user_id", "team_id"
             )
-
-        await TeamMember.bulk_create(
-            [TeamMember(team_id=team_id, user_id=user_id) for user_id in user_ids],
-        )
+            if existing_memberships:
+                conflicting_user_ids = [user_id for user_id, _ in existing_memberships]
+                raise TeamMemberAlreadyExistsError(
+                    "Пользователь уже состоит в команде",
+                    status_code=409,
+                    extra={"user_ids": conflicting_user_ids},
+                )
+
+            try:
+                await TeamMember.bulk_create(
+                    [TeamMember(team_id=team_id, user_id=user_id) for user_id in user_ids],
+                )
+            except IntegrityError as exc:
+                # Параллельный запрос успел добавить пользователя в другую команду
+                raise TeamMemberAlreadyExistsError(
+                    "Пользователь уже состоит в команде",
+                    status_code=409,
+                    extra={"user_ids": user_ids},
+                ) from exc
+
+            await invalidate_dto_cache(team_ids=[team_id], user_ids=user_ids)
 
     @staticmethod
     async def remove_team_member(team_id: UUID, user_id: UUID) -> None:
-        team_exists = await Team.filter(id=team_id).exists()
-        if not team_exists:
-            raise TeamNotFoundError(f"Команда с id {team_id} не найдена")
+        async with unit_of_work():
+            team_exists = await Team.filter(id=team_id).exists()
+            if not team_exists:
+                raise TeamNotFoundError(f"Команда с id {team_id} не найдена")
+
+            deleted = await TeamMember.filter(team_id=team_id, user_id=user_id).delete()
+            if not deleted:
+                raise TeamMemberNotFoundError(
+                    f"Участник с id {user_id} не найден в команде {team_id}"
+                )
 
-        deleted = await TeamMember.filter(team_id=team_id, user_id=user_id).delete()
-        if not deleted:
-            raise TeamMemberNotFoundError(f"Участник с id {user_id} не найден в команде {team_id}")
+            await invalidate_dto_cache(team_ids=[team_id], user_ids=[user_id])
 
     @staticmethod
-    async def get_team_members(team_id: UUID) -> list[TeamMember]:
-        return await TeamMember.filter(team_id=team_id).select_related("user")
+    async def get_team_members(team_id: UUID) -> list[TeamMemberDto]:
+        rows = await TeamMember.filter(team_id=team_id).values_list(
+            "user_id", "user__username", "user__is_active"
+        )
+        return [
+            TeamMemberDto(user_id=user_id, username=username, is_active=is_active)
+            for user_id, username, is_active in rows
+        ]
 
     @staticmethod
     async def get_team_members_map(
         team_ids: list[UUID],
-    ) -> dict[UUID, list[TeamMember]]:
+    ) -> dict[UUID, list[TeamMemberDto]]:
         if not team_ids:
             return {}
 
-        memberships = (
+        rows = (
             await TeamMember.filter(team_id__in=list(team_ids))
-            .select_related("user")
             .order_by("created_at")
+            .values_list("team_id", "user_id", "user__username", "user__is_active")
         )
 
-        mapping = {}
-        for member in memberships:
-            mapping.setdefault(member.team_id, []).append(member)
+        mapping: dict[UUID, list[TeamMemberDto]] = {}
+        for team_id, user_id, username, is_active in rows:
+            mapping.setdefault(team_id, []).append(
+                TeamMemberDto(user_id=user_id, username=username, is_active=is_active)
+            )
         return mapping
 
     @staticmethod
     async def update_or_create_members(team_id: UUID, members: list[TeamMemberCreate]) -> None:
-        team = await Team.filter(id=team_id).first()
-        if not team:
-            raise TeamNotFoundError(f"Команда с id {team_id} не найдена")
-
-        for member in members:
-            user, _ = await User.update_or_create(
-                id=member.user_id,
-                defaults={
-                    "username": member.username,
-                    "is_active": member.is_active,
-                },
+        async with unit_of_work() as conn:
+            team_exists = await Team.filter(id=team_id).select_for_update().exists()
+            if not team_exists:
+                raise TeamNotFoundError(f"Команда с id {team_id} не найдена")
+
+            team_ids, user_ids = await TeamMemberService.upsert_memberships(
+                conn, {team_id: members}
+            )
+            await invalidate_dto_cache(team_ids=team_ids, user_ids=user_ids)
+
+    @staticmethod
+    async def upsert_memberships(
+        conn: BaseDBAsyncClient,
+        members_by_team: dict[UUID, list[TeamMemberCreate]],
+        prune: bool = False,
+    ) -> tuple[set[UUID], set[UUID]]:
+        # Число запросов не зависит от размера команд: upsert пользователей,
+        # удаление старых членств и вставка новых, каждое пачками по BULK_CHUNK_SIZE
+        placement: dict[UUID, tuple[UUID, TeamMemberCreate]] = {}
+        conflicting_ids = set()
+        for team_id, members in members_by_team.items():
+            for member in members:
+                previous = placement.get(member.user_id)
+                if previous is not None and previous[0] != team_id:
+                    conflicting_ids.add(member.user_id)
+                placement[member.user_id] = (team_id, member)
+
+        if conflicting_ids:
+            raise TeamMemberAlreadyExistsError(
+                "Пользователь указан в нескольких командах",
+                status_code=409,
+                extra={"user_ids": sorted(conflicting_ids, key=str)},
+            )
+
+        now = timezone.now()
+        dialect = get_dialect(conn)
+        user_ids = list(placement)
+
+        for chunk in chunked(user_ids):
+            p = SqlParams(dialect)
+            rows = p.value_rows(
+                (user_id, placement[user_id][1].username, placement[user_id][1].is_active, now, now)
+                for user_id in chunk
+            )
+            sql = f"""
+                INSERT INTO users (id, username, is_active, created_at, updated_at)
+                VALUES {rows}
+                ON CONFLICT (id) DO UPDATE
+                SET username = EXCLUDED.username,
+                    is_active = EXCLUDED.is_active,
+                    updated_at = EXCLUDED.updated_at
+            """
+            try:
+                await conn.execute_query(sql, p.values)
+            except IntegrityError as exc:
+                raise UserAlreadyExistsError(
+                    "Логин пользователя уже занят другим пользователем",
+                    status_code=409,
+                ) from exc
+
+        affected_team_ids = set(members_by_team)
+        affected_user_ids = set(user_ids)
+        # Членства синхронизируемых команд удаляются первым запросом, пользователей — пачками
+        conditions = []
+        if prune:
+            conditions.append(("team_id", list(members_by_team)))
+        conditions.extend(("user_id", chunk) for chunk in chunked(user_ids))
+        for column, ids in conditions:
+            p = SqlParams(dialect)
+            sql = f"""
+                DELETE FROM team_members
+                WHERE {p.in_list(column, ids, "uuid")}
+                RETURNING team_id, user_id
+            """
+            _, rows = await conn.execute_query(sql, p.values)
+            affected_team_ids.update(to_uuid(row["team_id"]) for row in rows)
+            affected_user_ids.update(to_uuid(row["user_id"]) for row in rows)
+
+        for chunk in chunked(user_ids):
+            p = SqlParams(dialect)
+            rows = p.value_rows(
+                (uuid.uuid4(), placement[user_id][0], user_id, now, now) for user_id in chunk
             )
+            sql = f"""
+                INSERT INTO team_members (id, team_id, user_id, created_at, updated_at)
+                VALUES {rows}
+            """
+            await conn.execute_query(sql, p.values)
 
-            await TeamMember.filter(user_id=user.id).delete()
-            await TeamMember.get_or_create(team_id=team_id, user_id=user.id)
+        return affected_team_ids, affected_user_ids
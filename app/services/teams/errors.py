@@ -28,3 +28,9 @@ class TeamMemberNotFoundError(TeamError):
     default_message = "Участник команды не найден"
     default_status_code = 404
     default_code = "NOT_FOUND"
+
+
+class TeamImportError(TeamError):
+    default_message = "Некорректные данные импорта команд"
+    default_status_code = 400
+    default_code = "INVALID_IMPORT"
@@ -31,5 +31,39 @@ class TeamDto(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class TeamPage(BaseModel):
+    items: list[TeamDto]
+    next_cursor: str | None = None
+
+
 class TeamResponse(BaseModel):
     team: TeamDto
+
+
+class TeamImportResult(BaseModel):
+    teams: int
+    teams_created: int
+    members: int
+
+
+class TeamDeactivate(BaseModel):
+    team_name: str
+
+
+class ReviewReplacement(BaseModel):
+    old_reviewer_id: UUID
+    # Пусто, если в команде автора не нашлось активного кандидата
+    new_reviewer_id: UUID | None = None
+
+
+class TeamDeactivationPullRequest(BaseModel):
+    pull_request_id: UUID
+    replacements: list[ReviewReplacement]
+
+
+class TeamDeactivationResult(BaseModel):
+    team_name: str
+    deactivated_users: int
+    reassigned: int
+    unassigned: int
+    pull_requests: list[TeamDeactivationPullRequest]
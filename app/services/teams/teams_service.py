@@ -1,11 +1,36 @@
+import uuid
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+from typing import AsyncIterator
 from uuid import UUID
 
+from tortoise import timezone
 from tortoise.exceptions import IntegrityError
 
+from app.common.pagination import Cursor, fetch_page, iterate_pages
+from app.db.sql import SqlParams, chunked, get_dialect, to_uuid
+from app.db.unit_of_work import unit_of_work
+from app.models.team_members import TeamMember
 from app.models.teams import Team
+from app.services.dto_cache import get_dto_cache, invalidate_dto_cache
+from app.services.pull_request_reviewers.pull_request_reviewers_service import (
+    PullRequestReviewerService,
+)
 from app.services.team_members.team_members_service import TeamMemberService
-from app.services.teams.errors import TeamAlreadyExistsError, TeamNotFoundError
-from app.services.teams.schemas import TeamCreate, TeamDto, TeamMemberDto
+from app.services.teams.errors import (
+    TeamAlreadyExistsError,
+    TeamImportError,
+    TeamNotFoundError,
+)
+from app.services.teams.schemas import (
+    TeamCreate,
+    TeamDeactivationResult,
+    TeamDto,
+    TeamImportResult,
+    TeamMemberDto,
+)
+from app.services.users.users_service import get_activity_buffer
 
 
 class TeamService:
@@ -21,6 +46,61 @@ class TeamService:
 
         return team
 
+    @staticmethod
+    async def create_team_with_members(payload: TeamCreate) -> Team:
+        async with unit_of_work() as conn:
+            team = await TeamService.create_team(payload)
+            team_ids, user_ids = await TeamMemberService.upsert_memberships(
+                conn, {team.id: payload.members}
+            )
+            await invalidate_dto_cache(team_ids=team_ids, user_ids=user_ids)
+
+        return team
+
+    @staticmethod
+    async def import_teams(payloads: list[TeamCreate]) -> TeamImportResult:
+        names = [payload.team_name for payload in payloads]
+        duplicates = sorted(name for name, count in Counter(names).items() if count > 1)
+        if duplicates:
+            raise TeamImportError(
+                "Команды повторяются в импорте",
+                extra={"team_names": duplicates},
+            )
+
+        now = timezone.now()
+        created = 0
+        team_ids: dict[str, UUID] = {}
+        async with unit_of_work() as conn:
+            dialect = get_dialect(conn)
+            for chunk in chunked(names):
+                p = SqlParams(dialect)
+                rows = p.value_rows((uuid.uuid4(), name, now, now) for name in chunk)
+                sql = f"""
+                    INSERT INTO teams (id, name, created_at, updated_at)
+                    VALUES {rows}
+                    ON CONFLICT (name) DO NOTHING
+                    RETURNING id
+                """
+                created += len((await conn.execute_query(sql, p.values))[1])
+
+                p = SqlParams(dialect)
+                sql = f"SELECT id, name FROM teams WHERE {p.in_list('name', chunk, 'text')}"
+                _, rows = await conn.execute_query(sql, p.values)
+                team_ids.update((row["name"], to_uuid(row["id"])) for row in rows)
+
+            affected_team_ids, affected_user_ids = await TeamMemberService.upsert_memberships(
+                conn,
+                {team_ids[payload.team_name]: payload.members for payload in payloads},
+                prune=True,
+            )
+            await invalidate_dto_cache(team_ids=affected_team_ids, user_ids=affected_user_ids)
+
+        return TeamImportResult(
+            teams=len(payloads),
+            teams_created=created,
+            members=sum(len({m.user_id for m in payload.members}) for payload in payloads),
+        )
+
     @staticmethod
     async def get_team_by_name(name: str) -> Team:
         team = await Team.filter(name=name).first()
@@ -28,6 +108,66 @@ class TeamService:
             raise TeamNotFoundError(f"Команда с названием {name} не найдена")
         return team
 
+    @staticmethod
+    async def deactivate_team(team: Team) -> TeamDeactivationResult:
+        # Отложенные изменения активности пишутся раньше, иначе пачка, собранная до
+        # деактивации, могла бы снова включить участника
+        await get_activity_buffer().flush()
+
+        now = timezone.now()
+        async with unit_of_work() as conn:
+            p = SqlParams(get_dialect(conn))
+            sql = f"""
+                UPDATE users
+                SET is_active = FALSE, updated_at = {p(now, "timestamptz")}
+                WHERE id IN (SELECT user_id FROM team_members WHERE team_id = {p(team.id)})
+                  AND is_active
+                RETURNING id
+            """
+            _, rows = await conn.execute_query(sql, p.values)
+            deactivated = [to_uuid(row["id"]) for row in rows]
+
+            replaced = await PullRequestReviewerService.reassign_to_author_teams(
+                conn, deactivated, now
+            )
+            await invalidate_dto_cache(team_ids=[team.id], user_ids=deactivated)
+
+        reassigned = sum(1 for _, _, new_id in replaced if new_id is not None)
+        # Сводка на тысячи PR собирается из словарей и проверяется одним вызовом pydantic
+        return TeamDeactivationResult.model_validate(
+            {
+                "team_name": team.name,
+                "deactivated_users": len(deactivated),
+                "reassigned": reassigned,
+                "unassigned": len(replaced) - reassigned,
+                "pull_requests": [
+                    {
+                        "pull_request_id": pr_id,
+                        "replacements": [
+                            {"old_reviewer_id": old_id, "new_reviewer_id": new_id}
+                            for _, old_id, new_id in group
+                        ],
+                    }
+                    for pr_id, group in groupby(replaced, key=itemgetter(0))
+                ],
+            }
+        )
+
+    @staticmethod
+    async def get_team_dto(team_id: UUID) -> TeamDto:
+        async def load() -> TeamDto:
+            return await TeamService.to_dto(await TeamService.get_team(team_id))
+
+        return await get_dto_cache().get_team(team_id, load)
+
+    @staticmethod
+    async def get_team_dto_by_name(name: str) -> TeamDto:
+        async def load_id() -> UUID:
+            return (await TeamService.get_team_by_name(name)).id
+
+        team_id = await get_dto_cache().get_team_id(name, load_id)
+        return await TeamService.get_team_dto(team_id)
+
     @staticmethod
     async def to_dto(team: Team) -> TeamDto:
         members = await TeamMemberService.get_team_members(team.id)
@@ -42,19 +182,8 @@ class TeamService:
         return [TeamService.build_team_dto(team, members_map.get(team.id, [])) for team in teams]
 
     @staticmethod
-    def build_team_dto(team: Team, members) -> TeamDto:
-        return TeamDto(
-            team_name=team.name,
-            members=[
-                TeamMemberDto(
-                    user_id=member.user.id,
-                    username=member.user.username,
-                    is_active=member.user.is_active,
-                )
-                for member in members
-                if member.user is not None
-            ],
-        )
+    def build_team_dto(team: Team, members: list[TeamMemberDto]) -> TeamDto:
+        return TeamDto(team_name=team.name, members=members)
 
     @staticmethod
     async def get_team(team_id: UUID) -> Team:
@@ -64,11 +193,25 @@ class TeamService:
         return team
 
     @staticmethod
-    async def get_teams() -> list[Team]:
-        return await Team.all()
+    async def get_teams_page(
+        limit: int, cursor: Cursor | None = None
+    ) -> tuple[list[Team], Cursor | None]:
+        return await fetch_page(Team.all(), limit, cursor)
+
+    @staticmethod
+    async def iter_team_dtos(cursor: Cursor | None = None) -> AsyncIterator[list[TeamDto]]:
+        async for teams in iterate_pages(Team.all(), cursor=cursor):
+            yield await TeamService.to_dtos(teams)
 
     @staticmethod
     async def delete_team(team_id: UUID) -> None:
-        deleted = await Team.filter(id=team_id).delete()
-        if not deleted:
-            raise TeamNotFoundError(f"Команда с id {team_id} не найдена")
+        async with unit_of_work():
+            team = await Team.filter(id=team_id).select_for_update().first()
+            if not team:
+                raise TeamNotFoundError(f"Команда с id {team_id} не найдена")
+
+            member_ids = await TeamMember.filter(team_id=team_id).values_list("user_id", flat=True)
+            await Team.filter(id=team_id).delete()
+            await invalidate_dto_cache(
+                team_ids=[team_id], user_ids=member_ids, team_names=[team.name]
+            )
@@ -2,7 +2,8 @@ from uuid import UUID
 
 from pydantic import BaseModel, Field
 
-from app.services.pull_requests.schemas import PullRequestShort
+from app.common.batch import MAX_BATCH_SIZE, BatchItemError
+from app.services.pull_requests.schemas import PullRequestShort, ReviewerSummary
 
 
 class UserCreate(BaseModel):
@@ -14,6 +15,10 @@ class UserSetIsActive(BaseModel):
     is_active: bool
 
 
+class UserBatchSetIsActive(BaseModel):
+    items: list[UserSetIsActive] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
 class UserDto(BaseModel):
     user_id: UUID
     username: str
@@ -23,6 +28,11 @@ class UserDto(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class UserPage(BaseModel):
+    items: list[UserDto]
+    next_cursor: str | None = None
+
+
 class UserResponse(BaseModel):
     user: UserDto
 
@@ -30,3 +40,17 @@ class UserResponse(BaseModel):
 class UserReviewsResponse(BaseModel):
     user_id: UUID
     pull_requests: list[PullRequestShort]
+    summary: ReviewerSummary
+    next_cursor: str | None = None
+
+
+class UserBatchResult(BaseModel):
+    index: int
+    user_id: UUID
+    status_code: int
+    user: UserDto | None = None
+    error: BatchItemError | None = None
+
+
+class UserBatchResponse(BaseModel):
+    results: list[UserBatchResult]
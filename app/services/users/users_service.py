@@ -1,22 +1,129 @@
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Any, AsyncIterator
 from uuid import UUID
 
+from tortoise import timezone
 from tortoise.exceptions import IntegrityError
 
+from app.common.batch import BatchItemError
+from app.common.pagination import Cursor, fetch_page, iterate_pages
+from app.common.write_behind import WriteBehindBuffer
+from app.core.config import get_settings
+from app.db.sql import SqlParams, chunked, get_dialect, to_uuid
+from app.db.unit_of_work import unit_of_work
 from app.models.team_members import TeamMember
 from app.models.users import User
+from app.services.dto_cache import get_dto_cache, invalidate_dto_cache
+from app.services.pull_request_reviewers.pull_request_reviewers_service import (
+    PullRequestReviewerService,
+)
 from app.services.users.errors import UserAlreadyExistsError, UserNotFoundError
-from app.services.users.schemas import UserCreate, UserDto, UserSetIsActive
+from app.services.users.schemas import UserBatchResult, UserCreate, UserDto, UserSetIsActive
+
+logger = logging.getLogger(__name__)
+
+# Проекция для UserDto: название команды приходит тем же запросом через LEFT JOIN членства
+USER_DTO_FIELDS = {
+    "id": "id",
+    "created_at": "created_at",
+    "username": "username",
+    "is_active": "is_active",
+    "team_name": "team_memberships__team__name",
+}
 
 
 class UserService:
     @staticmethod
-    async def set_user_is_active(payload: UserSetIsActive) -> User:
-        user = await User.filter(id=payload.user_id).first()
-        if not user:
-            raise UserNotFoundError(f"Пользователь с id {payload.user_id} не найден")
-        user.is_active = payload.is_active
-        await user.save()
-        return user
+    async def set_user_is_active(payload: UserSetIsActive) -> UserDto:
+        user = await UserService.get_user_dto(payload.user_id)
+        await UserService.set_users_active({payload.user_id: payload.is_active})
+        return user.model_copy(update={"is_active": payload.is_active})
+
+    @staticmethod
+    async def set_users_is_active(payloads: list[UserSetIsActive]) -> list[UserBatchResult]:
+        # При повторе пользователя в пакете действует последнее значение
+        changes = {payload.user_id: payload.is_active for payload in payloads}
+        users = await UserService.get_user_dtos(list(changes))
+        found = {user.user_id: user for user in users}
+        await UserService.set_users_active(
+            {user_id: is_active for user_id, is_active in changes.items() if user_id in found}
+        )
+
+        results = []
+        for index, payload in enumerate(payloads):
+            user = found.get(payload.user_id)
+            if user is None:
+                exc = UserNotFoundError(f"Пользователь с id {payload.user_id} не найден")
+                results.append(
+                    UserBatchResult(
+                        index=index,
+                        user_id=payload.user_id,
+                        status_code=exc.status_code,
+                        error=BatchItemError.from_error(exc),
+                    )
+                )
+                continue
+            results.append(
+                UserBatchResult(
+                    index=index,
+                    user_id=payload.user_id,
+                    status_code=200,
+                    user=user.model_copy(update={"is_active": changes[payload.user_id]}),
+                )
+            )
+        return results
+
+    @staticmethod
+    async def set_users_active(changes: dict[UUID, bool]) -> None:
+        if not changes:
+            return
+
+        mode = get_settings().user_activity_write_mode
+        if mode == "immediate":
+            await UserService.write_users_active(changes)
+            return
+
+        written = get_activity_buffer().put_many(changes)
+        if mode == "group":
+            # Ожидание общей пачки не должно отменяться вместе с запросом
+            await asyncio.shield(written)
+
+    @staticmethod
+    async def write_users_active(changes: dict[UUID, bool]) -> None:
+        now = timezone.now()
+        changed: list[UUID] = []
+        async with unit_of_work() as conn:
+            # Один порядок блокировок строк для параллельных пачек
+            items = sorted(changes.items(), key=lambda item: str(item[0]))
+            deactivated: list[UUID] = []
+            for chunk in chunked(items):
+                p = SqlParams(get_dialect(conn))
+                sql = f"""
+                    UPDATE users
+                    SET is_active = v.is_active, updated_at = {p(now)}
+                    FROM ({p.rows(["id", "is_active"], chunk, ["uuid", "boolean"])}) AS v
+                    WHERE users.id = v.id AND users.is_active <> v.is_active
+                    RETURNING users.id, users.is_active
+                """
+                _, rows = await conn.execute_query(sql, p.values)
+                for row in rows:
+                    changed.append(to_uuid(row["id"]))
+                    if not row["is_active"]:
+                        deactivated.append(to_uuid(row["id"]))
+
+            reassigned, unassigned = await PullRequestReviewerService.reassign_from_inactive(
+                conn, deactivated, now
+            )
+            await invalidate_dto_cache(user_ids=changed)
+
+        if reassigned or unassigned:
+            logger.info(
+                "Ревью деактивированных пользователей: переназначено %s, снято без замены %s",
+                reassigned,
+                unassigned,
+            )
 
     @staticmethod
     async def create_user(payload: UserCreate) -> User:
@@ -40,10 +147,45 @@ class UserService:
         deleted_count = await User.filter(id=user_id).delete()
         if not deleted_count:
             raise UserNotFoundError(f"Пользователь с id {user_id} не найден")
+        await invalidate_dto_cache(user_ids=[user_id])
+
+    @staticmethod
+    async def get_user_dto(user_id: UUID) -> UserDto:
+        async def load() -> UserDto:
+            dtos = await UserService.get_user_dtos([user_id])
+            if not dtos:
+                raise UserNotFoundError(f"Пользователь с id {user_id} не найден")
+            return dtos[0]
+
+        return await get_dto_cache().get_user(user_id, load)
+
+    @staticmethod
+    async def get_user_dtos(user_ids: list[UUID]) -> list[UserDto]:
+        if not user_ids:
+            return []
+        rows = await User.filter(id__in=user_ids).values(**USER_DTO_FIELDS)
+        return [UserService.build_dto(row) for row in rows]
 
     @staticmethod
-    async def get_users() -> list[User]:
-        return await User.all()
+    async def get_users_page(
+        limit: int, cursor: Cursor | None = None
+    ) -> tuple[list[UserDto], Cursor | None]:
+        rows, next_cursor = await fetch_page(User.all(), limit, cursor, USER_DTO_FIELDS)
+        return [UserService.build_dto(row) for row in rows], next_cursor
+
+    @staticmethod
+    async def iter_user_dtos(cursor: Cursor | None = None) -> AsyncIterator[list[UserDto]]:
+        async for rows in iterate_pages(User.all(), cursor=cursor, fields=USER_DTO_FIELDS):
+            yield [UserService.build_dto(row) for row in rows]
+
+    @staticmethod
+    def build_dto(row: dict[str, Any]) -> UserDto:
+        return UserDto(
+            user_id=row["id"],
+            username=row["username"],
+            is_active=row["is_active"],
+            team_name=row["team_name"],
+        )
 
     @staticmethod
     async def get_team_name_map(user_ids: list[UUID]) -> dict[UUID, str | None]:
@@ -86,3 +228,13 @@ class UserService:
             )
             for user in users
         ]
+
+
+@lru_cache
+def get_activity_buffer() -> WriteBehindBuffer[UUID, bool]:
+    settings = get_settings()
+    return WriteBehindBuffer(
+        UserService.write_users_active,
+        delay=settings.user_activity_flush_delay_seconds,
+        max_pending=settings.user_activity_max_pending,
+    )
@@ -0,0 +1,102 @@
+import asyncio
+import time
+import uuid
+
+from httpx import ASGITransport, AsyncClient
+
+from app.main import create_app
+from benchmarks.common import close_bench_db, init_bench_db
+
+TEAMS = 10
+TEAM_SIZE = 10
+PULL_REQUESTS = 1_000
+BATCH_SIZE = 500
+
+
+async def seed_authors(client: AsyncClient) -> list[str]:
+    authors = []
+    for team_index in range(TEAMS):
+        members = [
+            {
+                "user_id": str(uuid.uuid4()),
+                "username": f"bench-{uuid.uuid4().hex}",
+                "is_active": True,
+            }
+            for _ in range(TEAM_SIZE)
+        ]
+        resp = await client.post(
+            "/api/v1/team/add", json={"team_name": f"bench-{team_index}", "members": members}
+        )
+        resp.raise_for_status()
+        authors.extend(member["user_id"] for member in members)
+    return authors
+
+
+def create_items(authors: list[str]) -> list[dict]:
+    return [
+        {
+            "pull_request_id": str(uuid.uuid4()),
+            "pull_request_name": "bench",
+            "author_id": authors[index % len(authors)],
+        }
+        for index in range(PULL_REQUESTS)
+    ]
+
+
+async def single(client: AsyncClient, authors: list[str]) -> tuple[float, float]:
+    items = create_items(authors)
+    started = time.perf_counter()
+    for item in items:
+        (await client.post("/api/v1/pullRequest/create", json=item)).raise_for_status()
+    create_rate = len(items) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for item in items:
+        payload = {"pull_request_id": item["pull_request_id"]}
+        (await client.post("/api/v1/pullRequest/merge", json=payload)).raise_for_status()
+    return create_rate, len(items) / (time.perf_counter() - started)
+
+
+async def batched(client: AsyncClient, authors: list[str]) -> tuple[float, float]:
+    items = create_items(authors)
+    batches = [items[start : start + BATCH_SIZE] for start in range(0, len(items), BATCH_SIZE)]
+
+    started = time.perf_counter()
+    for batch in batches:
+        resp = await client.post("/api/v1/pullRequest/batchCreate", json={"items": batch})
+        assert all(item["status_code"] == 201 for item in resp.json()["results"])
+    create_rate = len(items) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for batch in batches:
+        payload = {"items": [{"pull_request_id": item["pull_request_id"]} for item in batch]}
+        resp = await client.post("/api/v1/pullRequest/batchMerge", json=payload)
+        assert all(item["status_code"] == 200 for item in resp.json()["results"])
+    return create_rate, len(items) / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    await init_bench_db()
+    try:
+        transport = ASGITransport(app=create_app())
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            authors = await seed_authors(client)
+            results = {
+                "по одному": await single(client, authors),
+                f"пакеты по {BATCH_SIZE}": await batched(client, authors),
+            }
+    finally:
+        await close_bench_db()
+
+    print(f"{'':>16} | {'create PR/s':>12} | {'merge PR/s':>12}")
+    for name, (create_rate, merge_rate) in results.items():
+        print(f"{name:>16} | {create_rate:>12.0f} | {merge_rate:>12.0f}")
+    (single_create, single_merge), (batch_create, batch_merge) = results.values()
+    print(
+        f"{'ускорение':>16} | {batch_create / single_create:>11.1f}x"
+        f" | {batch_merge / single_merge:>11.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+import asyncio
+import time
+import uuid
+
+from httpx import ASGITransport, AsyncClient
+
+from app.db.instrumentation import instrument_db_clients, track_queries
+from app.main import create_app
+from benchmarks.common import close_bench_db, init_bench_db
+
+TEAM_SIZE = 4
+AFFECTED = 10_000
+SINGLE_AFFECTED = 500
+BATCH_SIZE = 1000
+
+
+async def seed_reviews(client: AsyncClient, name: str, affected: int) -> tuple[str, list[str]]:
+    # Авторы чередуются, ревьювер members[1] попадает примерно в половину PR команды
+    members = [
+        {"user_id": str(uuid.uuid4()), "username": f"bench-{uuid.uuid4().hex}", "is_active": True}
+        for _ in range(TEAM_SIZE)
+    ]
+    resp = await client.post("/api/v1/team/add", json={"team_name": name, "members": members})
+    resp.raise_for_status()
+    reviewer_id = members[1]["user_id"]
+
+    pr_ids: list[str] = []
+    created = 0
+    while len(pr_ids) < affected:
+        items = [
+            {
+                "pull_request_id": str(uuid.uuid4()),
+                "pull_request_name": "bench",
+                "author_id": members[(created + index) % TEAM_SIZE]["user_id"],
+            }
+            for index in range(BATCH_SIZE)
+        ]
+        created += BATCH_SIZE
+        resp = await client.post("/api/v1/pullRequest/batchCreate", json={"items": items})
+        for result in resp.json()["results"]:
+            if reviewer_id in result["pr"]["assigned_reviewers"]:
+                pr_ids.append(result["pull_request_id"])
+    return reviewer_id, pr_ids[:affected]
+
+
+async def deactivate(client: AsyncClient, reviewer_id: str) -> tuple[float, int]:
+    started = time.perf_counter()
+    with track_queries() as queries:
+        resp = await client.post(
+            "/api/v1/users/setIsActive", json={"user_id": reviewer_id, "is_active": False}
+        )
+    resp.raise_for_status()
+    return time.perf_counter() - started, queries.count
+
+
+async def reassign_one_by_one(
+    client: AsyncClient, reviewer_id: str, pr_ids: list[str]
+) -> tuple[float, int]:
+    started = time.perf_counter()
+    with track_queries() as queries:
+        for pr_id in pr_ids:
+            resp = await client.post(
+                "/api/v1/pullRequest/reassign",
+                json={"pull_request_id": pr_id, "old_user_id": reviewer_id},
+            )
+            resp.raise_for_status()
+    return time.perf_counter() - started, queries.count
+
+
+async def main() -> None:
+    await init_bench_db()
+    instrument_db_clients()
+    try:
+        transport = ASGITransport(app=create_app())
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            reviewer_id, pr_ids = await seed_reviews(client, "bench-single", SINGLE_AFFECTED)
+            single_seconds, single_queries = await reassign_one_by_one(client, reviewer_id, pr_ids)
+
+            reviewer_id, pr_ids = await seed_reviews(client, "bench-bulk", AFFECTED)
+            bulk_seconds, bulk_queries = await deactivate(client, reviewer_id)
+            resp = await client.get("/api/v1/users/getReview", params={"user_id": reviewer_id})
+            assert resp.json()["pull_requests"] == []
+    finally:
+        await close_bench_db()
+
+    single_per_pr = single_seconds / SINGLE_AFFECTED
+    print(f"{'':>24} | {'PR':>6} | {'запросов':>8} | {'время, с':>9} | {'мс на PR':>8}")
+    print(
+        f"{'reassign по одному':>24} | {SINGLE_AFFECTED:>6} | {single_queries:>8}"
+        f" | {single_seconds:>9.2f} | {single_per_pr * 1000:>8.3f}"
+    )
+    print(
+        f"{'setIsActive с заменой':>24} | {AFFECTED:>6} | {bulk_queries:>8}"
+        f" | {bulk_seconds:>9.2f} | {bulk_seconds / AFFECTED * 1000:>8.3f}"
+    )
+    print(f"ускорение на PR: {single_per_pr / (bulk_seconds / AFFECTED):.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
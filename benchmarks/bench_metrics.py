@@ -0,0 +1,53 @@
+import asyncio
+import os
+
+from tortoise import connections
+
+from app.core.config import get_settings
+from app.db.instrumentation import instrument_db_clients, track_queries
+from app.main import create_app
+from benchmarks.bench_middleware import drive
+from benchmarks.common import close_bench_db, init_bench_db, measure
+
+REQUESTS = 20_000
+QUERIES = 5_000
+
+
+def build_app(metrics: bool):
+    os.environ["METRICS_ENABLED"] = str(metrics)
+    get_settings.cache_clear()
+    return create_app()
+
+
+async def query_overhead() -> tuple[float, float]:
+    await init_bench_db()
+    try:
+        conn = connections.get("default")
+        plain_us = await measure(lambda: conn.execute_query("SELECT 1"), QUERIES)
+
+        instrument_db_clients()
+        with track_queries():
+            tracked_us = await measure(lambda: conn.execute_query("SELECT 1"), QUERIES)
+    finally:
+        await close_bench_db()
+    return plain_us, tracked_us
+
+
+async def main() -> None:
+    results = {}
+    for name, metrics in (("без метрик", False), ("с метриками", True)):
+        app = build_app(metrics)
+        await drive(app, 500)
+        results[name] = 1_000_000 / await drive(app, REQUESTS)
+
+    for name, us in results.items():
+        print(f"{name:>20}: {us:>8.1f} µs/запрос")
+    print(f"{'накладные расходы':>20}: {results['с метриками'] - results['без метрик']:>8.1f} µs")
+
+    plain_us, tracked_us = await query_overhead()
+    print(f"{'запрос к БД':>20}: {plain_us:>8.1f} µs, с учётом {tracked_us:>8.1f} µs")
+    print(f"{'накладные расходы':>20}: {tracked_us - plain_us:>8.1f} µs/запрос к БД")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
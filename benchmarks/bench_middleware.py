@@ -0,0 +1,86 @@
+import asyncio
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.api.routes import health
+from app.common.errors.base import ServiceError
+from app.core.middleware import ServiceErrorMiddleware, service_error_handler
+
+REQUESTS = 20_000
+
+
+class BaseHTTPServiceErrorMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
+        request.state.request_id = request_id
+        try:
+            response = await call_next(request)
+        except ServiceError as exc:
+            return JSONResponse(
+                status_code=exc.status_code,
+                content=jsonable_encoder(exc.to_dict()),
+                headers={"X-Request-ID": request_id},
+            )
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+def build_app(asgi: bool) -> FastAPI:
+    app = FastAPI()
+    app.include_router(health.router, prefix="/api/v1")
+    if asgi:
+        app.add_middleware(ServiceErrorMiddleware)
+        app.add_exception_handler(ServiceError, service_error_handler)
+    else:
+        app.add_middleware(BaseHTTPServiceErrorMiddleware)
+    return app
+
+
+async def drive(app: FastAPI, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/health/healthz",
+        "raw_path": b"/api/v1/health/healthz",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return requests / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    results = {}
+    for name, asgi in (("BaseHTTPMiddleware", False), ("pure ASGI", True)):
+        app = build_app(asgi)
+        await drive(app, 500)
+        results[name] = await drive(app, REQUESTS)
+
+    for name, rps in results.items():
+        print(f"{name:>20}: {rps:>10.0f} req/s")
+    print(f"{'speedup':>20}: {results['pure ASGI'] / results['BaseHTTPMiddleware']:>10.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
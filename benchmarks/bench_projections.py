@@ -0,0 +1,129 @@
+import asyncio
+import uuid
+
+from app.common.pagination import MAX_PAGE_SIZE, Cursor, iterate_pages
+from app.models.pull_request_reviewers import PullRequestReviewer
+from app.models.pull_requests import PullRequest
+from app.models.team_members import TeamMember
+from app.models.teams import Team
+from app.models.users import User
+from app.services.pull_requests.pull_requests_service import PullRequestService
+from app.services.pull_requests.schemas import PullRequestShort
+from app.services.team_members.team_members_service import TeamMemberService
+from app.services.teams.schemas import TeamMemberDto
+from app.services.users.users_service import UserService
+from benchmarks.common import close_bench_db, init_bench_db, measure
+
+ROWS = 10_000
+ITERATIONS = 5
+
+
+async def seed() -> tuple[Team, User]:
+    team = await Team.create(name=f"bench-{uuid.uuid4().hex}")
+    users = [User(username=f"bench-{uuid.uuid4().hex}") for _ in range(ROWS)]
+    await User.bulk_create(users, batch_size=1000)
+    await TeamMember.bulk_create(
+        [TeamMember(team_id=team.id, user_id=user.id) for user in users], batch_size=1000
+    )
+
+    reviewer = users[0]
+    prs = [PullRequest(title="bench", author_id=users[1].id) for _ in range(ROWS)]
+    await PullRequest.bulk_create(prs, batch_size=1000)
+    await PullRequestReviewer.bulk_create(
+        [PullRequestReviewer(pr_id=pr.id, reviewer_id=reviewer.id) for pr in prs],
+        batch_size=1000,
+    )
+    return team, reviewer
+
+
+# Прежние реализации: модели целиком и отдельный запрос за названиями команд
+async def hydrated_team_members(team: Team) -> list[TeamMemberDto]:
+    members = await TeamMember.filter(team_id=team.id).select_related("user")
+    return [
+        TeamMemberDto(
+            user_id=member.user.id,
+            username=member.user.username,
+            is_active=member.user.is_active,
+        )
+        for member in members
+    ]
+
+
+async def hydrated_users() -> int:
+    count = 0
+    async for users in iterate_pages(User.all(), batch_size=MAX_PAGE_SIZE):
+        count += len(await UserService.to_dtos(users))
+    return count
+
+
+async def hydrated_reviews(reviewer: User) -> list[PullRequestShort]:
+    assignments = (
+        await PullRequestReviewer.filter(reviewer_id=reviewer.id)
+        .select_related("pr")
+        .order_by("created_at", "id")
+    )
+    return [
+        PullRequestShort(
+            pull_request_id=assignment.pr.id,
+            pull_request_name=assignment.pr.title,
+            author_id=assignment.pr.author_id,
+            status=assignment.pr.status,
+        )
+        for assignment in assignments
+    ]
+
+
+async def projected_users() -> int:
+    count = 0
+    cursor: Cursor | None = None
+    while True:
+        users, cursor = await UserService.get_users_page(MAX_PAGE_SIZE, cursor)
+        count += len(users)
+        if cursor is None:
+            return count
+
+
+async def projected_reviews(reviewer: User) -> int:
+    count = 0
+    cursor: Cursor | None = None
+    while True:
+        prs, cursor = await PullRequestService.get_pull_requests_for_reviewer(
+            reviewer.id, limit=MAX_PAGE_SIZE, cursor=cursor
+        )
+        count += len(prs)
+        if cursor is None:
+            return count
+
+
+async def main() -> None:
+    await init_bench_db()
+    try:
+        team, reviewer = await seed()
+        cases = {
+            "состав команды": (
+                lambda: hydrated_team_members(team),
+                lambda: TeamMemberService.get_team_members(team.id),
+            ),
+            "список пользователей": (hydrated_users, projected_users),
+            "история ревью": (
+                lambda: hydrated_reviews(reviewer),
+                lambda: projected_reviews(reviewer),
+            ),
+        }
+        results = {
+            name: (await measure(before, ITERATIONS), await measure(after, ITERATIONS))
+            for name, (before, after) in cases.items()
+        }
+    finally:
+        await close_bench_db()
+
+    print(f"{ROWS} строк")
+    print(f"{'':>22} | {'модели, мс':>11} | {'проекция, мс':>12} | {'ускорение':>9}")
+    for name, (before, after) in results.items():
+        print(
+            f"{name:>22} | {before / 1000:>11.1f} | {after / 1000:>12.1f} | {before / after:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
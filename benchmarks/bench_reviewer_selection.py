@@ -0,0 +1,77 @@
+import asyncio
+import uuid
+
+from tortoise import connections, timezone
+
+from app.models.pull_request_reviewers import PullRequestReviewer
+from app.models.pull_requests import PRStatus, PullRequest
+from app.models.team_members import TeamMember
+from app.models.teams import Team
+from app.models.users import User
+from app.services.pull_request_reviewers.pull_request_reviewers_service import (
+    PullRequestReviewerService,
+)
+from benchmarks.common import close_bench_db, init_bench_db, measure
+
+TEAM_SIZE = 20
+HISTORY_STEPS = (0, 1_000, 10_000, 50_000)
+ITERATIONS = 500
+BATCH_SIZE = 1_000
+
+
+async def seed_team() -> tuple[Team, list[User]]:
+    team = await Team.create(name=f"bench-{uuid.uuid4().hex[:8]}")
+    users = [User(username=f"bench-{uuid.uuid4().hex}") for _ in range(TEAM_SIZE)]
+    await User.bulk_create(users)
+    await TeamMember.bulk_create([TeamMember(team_id=team.id, user_id=user.id) for user in users])
+    return team, users
+
+
+async def grow_history(users: list[User], count: int) -> None:
+    author = users[0]
+    for offset in range(0, count, BATCH_SIZE):
+        size = min(BATCH_SIZE, count - offset)
+        prs = [
+            PullRequest(title=f"bench-{offset + i}", author_id=author.id, status=PRStatus.MERGED)
+            for i in range(size)
+        ]
+        await PullRequest.bulk_create(prs)
+        await PullRequestReviewer.bulk_create(
+            [
+                PullRequestReviewer(pr_id=pr.id, reviewer_id=users[1 + i % (TEAM_SIZE - 1)].id)
+                for i, pr in enumerate(prs)
+            ]
+        )
+
+
+async def main() -> None:
+    await init_bench_db()
+    try:
+        team, users = await seed_team()
+        author = users[0]
+
+        print(f"{'history rows':>14} | {'select µs':>10} | {'assign µs':>10}")
+        history = 0
+        for target in HISTORY_STEPS:
+            await grow_history(users, target - history)
+            history = target
+
+            select_us = await measure(
+                lambda: PullRequestReviewerService.pick_replacement_candidate(team.id, {author.id}),
+                ITERATIONS,
+            )
+
+            async def assign() -> None:
+                pr = await PullRequest.create(title="bench", author_id=author.id)
+                await PullRequestReviewerService.assign_reviewers(
+                    connections.get("default"), pr.id, author.id, timezone.now()
+                )
+
+            assign_us = await measure(assign, ITERATIONS)
+            print(f"{history:>14} | {select_us:>10.1f} | {assign_us:>10.1f}")
+    finally:
+        await close_bench_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+import asyncio
+import time
+import uuid
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from pydantic import BaseModel
+
+from app.common.responses import JsonResponse
+from app.main import create_app
+from app.models.team_members import TeamMember
+from app.models.teams import Team
+from app.models.users import User
+from app.services.teams.schemas import TeamPage
+from app.services.teams.teams_service import TeamService
+from app.services.users.schemas import UserPage
+from app.services.users.users_service import UserService
+from benchmarks.common import close_bench_db, init_bench_db
+
+TEAMS = 100
+TEAM_SIZE = 10
+ITERATIONS = 200
+
+
+async def seed() -> None:
+    teams = [Team(name=f"bench-{uuid.uuid4().hex}") for _ in range(TEAMS)]
+    await Team.bulk_create(teams)
+    for team in teams:
+        users = [User(username=f"bench-{uuid.uuid4().hex}") for _ in range(TEAM_SIZE)]
+        await User.bulk_create(users)
+        await TeamMember.bulk_create([TeamMember(team_id=team.id, user_id=u.id) for u in users])
+
+
+async def fastapi_default(page: BaseModel, route: APIRoute) -> bytes:
+    # Путь FastAPI по умолчанию: валидация по response_model, dict, json.dumps
+    content = await serialize_response(field=route.response_field, response_content=page)
+    return JSONResponse(content).body
+
+
+async def dto_route(page: BaseModel, route: APIRoute) -> bytes:
+    return JsonResponse(page).body
+
+
+async def per_item_us(serialize, page: BaseModel, route: APIRoute, items: int) -> float:
+    await serialize(page, route)
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await serialize(page, route)
+    return (time.perf_counter() - started) / ITERATIONS / items * 1_000_000
+
+
+async def main() -> None:
+    app = create_app()
+    routes = {
+        route.path: route
+        for route in app.router.routes
+        if isinstance(route, APIRoute) and "GET" in route.methods
+    }
+
+    await init_bench_db()
+    try:
+        await seed()
+        users, _ = await UserService.get_users_page(TEAMS * TEAM_SIZE)
+        user_page = UserPage(items=users)
+        teams, _ = await TeamService.get_teams_page(TEAMS)
+        team_page = TeamPage(items=await TeamService.to_dtos(teams))
+    finally:
+        await close_bench_db()
+
+    cases = {
+        "GET /users": (user_page, routes["/api/v1/users"], len(user_page.items)),
+        "GET /team": (team_page, routes["/api/v1/team"], len(team_page.items)),
+    }
+
+    print(f"{'':>12} | {'до, µs/эл.':>12} | {'после, µs/эл.':>14} | {'ускорение':>9}")
+    for name, (page, route, items) in cases.items():
+        before = await per_item_us(fastapi_default, page, route, items)
+        after = await per_item_us(dto_route, page, route, items)
+        print(f"{name:>12} | {before:>12.2f} | {after:>14.2f} | {before / after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+import asyncio
+import sys
+import time
+import uuid
+from collections import Counter
+
+from httpx import ASGITransport, AsyncClient, Response
+
+from app.db.instrumentation import QueryStats, instrument_db_clients, track_queries
+from app.main import create_app
+from app.models.teams import Team
+from benchmarks.common import close_bench_db, init_bench_db
+
+TEAM_SIZE = 200
+AUTHORS = 50
+AUTHOR_TEAMS = 10
+AUTHOR_TEAM_SIZE = 20
+PULL_REQUESTS = 5_000
+BATCH_SIZE = 500
+BUDGET_SECONDS = 0.1
+QUERY_BUDGET = 11
+
+
+def new_members(count: int) -> list[dict]:
+    return [
+        {"user_id": str(uuid.uuid4()), "username": f"bench-{uuid.uuid4().hex}", "is_active": True}
+        for _ in range(count)
+    ]
+
+
+async def create_team(client: AsyncClient, name: str, members: list[dict]) -> str:
+    resp = await client.post("/api/v1/team/add", json={"team_name": name, "members": members})
+    resp.raise_for_status()
+    return str((await Team.get(name=name)).id)
+
+
+async def seed(client: AsyncClient) -> str:
+    # PR создаются, пока авторы в деактивируемой команде, и получают ревьюверов из неё;
+    # затем авторы расходятся по своим командам, где и нужно искать замену
+    members = new_members(TEAM_SIZE)
+    authors = new_members(AUTHORS)
+    team_id = await create_team(client, "bench-offboarded", members + authors)
+
+    for start in range(0, PULL_REQUESTS, BATCH_SIZE):
+        items = [
+            {
+                "pull_request_id": str(uuid.uuid4()),
+                "pull_request_name": "bench",
+                "author_id": authors[index % AUTHORS]["user_id"],
+            }
+            for index in range(start, start + BATCH_SIZE)
+        ]
+        resp = await client.post("/api/v1/pullRequest/batchCreate", json={"items": items})
+        resp.raise_for_status()
+
+    per_team = AUTHORS // AUTHOR_TEAMS
+    for index in range(AUTHOR_TEAMS):
+        moved = authors[index * per_team : (index + 1) * per_team]
+        for author in moved:
+            resp = await client.delete(f"/api/v1/team/{team_id}/members/{author['user_id']}")
+            resp.raise_for_status()
+        author_team_id = await create_team(
+            client, f"bench-authors-{index}", new_members(AUTHOR_TEAM_SIZE - per_team)
+        )
+        resp = await client.post(
+            f"/api/v1/team/{author_team_id}/members",
+            json={"user_ids": [author["user_id"] for author in moved]},
+        )
+        resp.raise_for_status()
+    return team_id
+
+
+async def deactivate(client: AsyncClient, team_id: str) -> tuple[Response, float, QueryStats]:
+    instrument_db_clients()
+    started = time.perf_counter()
+    with track_queries() as queries:
+        resp = await client.post(f"/api/v1/team/{team_id}/deactivate")
+    elapsed = time.perf_counter() - started
+    resp.raise_for_status()
+    return resp, elapsed, queries
+
+
+def budget_violations(elapsed: float, queries: QueryStats) -> list[str]:
+    violations = []
+    if elapsed > BUDGET_SECONDS:
+        violations.append(
+            f"деактивация заняла {elapsed * 1000:.1f} мс, бюджет {BUDGET_SECONDS * 1000:.0f} мс"
+        )
+    if queries.count > QUERY_BUDGET:
+        violations.append(f"запросов {queries.count}, бюджет {QUERY_BUDGET}")
+    return violations
+
+
+async def main() -> int:
+    await init_bench_db()
+    try:
+        transport = ASGITransport(app=create_app())
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            team_id = await seed(client)
+            resp, elapsed, queries = await deactivate(client, team_id)
+    finally:
+        await close_bench_db()
+
+    result = resp.json()
+    received = Counter(
+        replacement["new_reviewer_id"]
+        for pr in result["pull_requests"]
+        for replacement in pr["replacements"]
+        if replacement["new_reviewer_id"]
+    )
+    candidates = AUTHOR_TEAMS * AUTHOR_TEAM_SIZE
+    print(f"{'участников':>12} | {'PR':>6} | {'замен':>6} | {'без замены':>10} | {'запросов':>8}")
+    print(
+        f"{result['deactivated_users']:>12} | {len(result['pull_requests']):>6}"
+        f" | {result['reassigned']:>6} | {result['unassigned']:>10} | {queries.count:>8}"
+    )
+    print(
+        f"время: {elapsed * 1000:.1f} мс, из них БД {queries.seconds * 1000:.1f} мс,"
+        f" приложение {(elapsed - queries.seconds) * 1000:.1f} мс,"
+        f" бюджет {BUDGET_SECONDS * 1000:.0f} мс"
+    )
+    print(
+        f"ревью на кандидата: {min(received.values())}..{max(received.values())},"
+        f" средняя доля {result['reassigned'] / candidates:.1f}"
+    )
+
+    violations = budget_violations(elapsed, queries)
+    for violation in violations:
+        print(f"Бюджет нарушен: {violation}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,28 @@
+import os
+import time
+from typing import Awaitable, Callable
+
+from tortoise import Tortoise
+
+DEFAULT_DB_URL = "sqlite://:memory:"
+
+
+async def init_bench_db() -> None:
+    await Tortoise.init(
+        db_url=os.getenv("BENCH_DB_URL", DEFAULT_DB_URL),
+        modules={"models": ["app.models"]},
+    )
+    await Tortoise.generate_schemas()
+
+
+async def close_bench_db() -> None:
+    await Tortoise.close_connections()
+
+
+async def measure(func: Callable[[], Awaitable[object]], iterations: int) -> float:
+    await func()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await func()
+    return (time.perf_counter() - started) / iterations * 1_000_000
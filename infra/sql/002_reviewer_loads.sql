@@ -0,0 +1,27 @@
+CREATE TABLE IF NOT EXISTS reviewer_loads (
+  id                UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  created_at        TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at        TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+  user_id           UUID NOT NULL UNIQUE REFERENCES users(id) ON DELETE CASCADE,
+  open_reviews      INTEGER NOT NULL DEFAULT 0,
+  last_assigned_at  TIMESTAMPTZ
+);
+
+DROP TRIGGER IF EXISTS trg_reviewer_loads_updated_at ON reviewer_loads;
+CREATE TRIGGER trg_reviewer_loads_updated_at
+BEFORE UPDATE ON reviewer_loads
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+
+INSERT INTO reviewer_loads (user_id, open_reviews, last_assigned_at)
+SELECT
+  prr.reviewer_id,
+  COUNT(*) FILTER (WHERE pr.status = 'OPEN'),
+  MAX(prr.created_at)
+FROM pull_request_reviewers prr
+JOIN pull_requests pr ON pr.id = prr.pr_id
+GROUP BY prr.reviewer_id
+ON CONFLICT (user_id) DO UPDATE
+SET open_reviews = EXCLUDED.open_reviews,
+    last_assigned_at = EXCLUDED.last_assigned_at;
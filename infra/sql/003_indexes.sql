@@ -0,0 +1,15 @@
+CREATE INDEX IF NOT EXISTS ix_pull_request_reviewers_reviewer_pr
+  ON pull_request_reviewers (reviewer_id, pr_id);
+
+CREATE INDEX IF NOT EXISTS ix_team_members_team_user
+  ON team_members (team_id, user_id);
+
+CREATE INDEX IF NOT EXISTS ix_pull_requests_created
+  ON pull_requests (created_at, id);
+
+CREATE INDEX IF NOT EXISTS ix_pull_requests_author
+  ON pull_requests (author_id);
+
+CREATE INDEX IF NOT EXISTS ix_pull_requests_open
+  ON pull_requests (id, author_id)
+  WHERE status = 'OPEN';
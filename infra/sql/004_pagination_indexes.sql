@@ -0,0 +1,5 @@
+CREATE INDEX IF NOT EXISTS ix_users_created
+  ON users (created_at, id);
+
+CREATE INDEX IF NOT EXISTS ix_teams_created
+  ON teams (created_at, id);
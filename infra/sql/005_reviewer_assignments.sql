@@ -0,0 +1,14 @@
+ALTER TABLE pull_request_reviewers
+  ADD COLUMN IF NOT EXISTS pr_status VARCHAR(50) NOT NULL DEFAULT 'OPEN';
+
+UPDATE pull_request_reviewers r
+SET pr_status = pr.status
+FROM pull_requests pr
+WHERE pr.id = r.pr_id
+  AND r.pr_status <> pr.status;
+
+CREATE INDEX IF NOT EXISTS ix_pull_request_reviewers_reviewer_created
+  ON pull_request_reviewers (reviewer_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS ix_pull_request_reviewers_reviewer_status_created
+  ON pull_request_reviewers (reviewer_id, pr_status, created_at, id);
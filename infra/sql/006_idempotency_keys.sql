@@ -0,0 +1,20 @@
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+  id            UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  created_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+  key           VARCHAR(255) NOT NULL UNIQUE,
+  fingerprint   VARCHAR(64) NOT NULL,
+  status_code   INTEGER,
+  content_type  VARCHAR(255),
+  body          TEXT,
+  expires_at    TIMESTAMPTZ NOT NULL
+);
+
+DROP TRIGGER IF EXISTS trg_idempotency_keys_updated_at ON idempotency_keys;
+CREATE TRIGGER trg_idempotency_keys_updated_at
+BEFORE UPDATE ON idempotency_keys
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires
+  ON idempotency_keys (expires_at);
@@ -0,0 +1,28 @@
+CREATE TABLE IF NOT EXISTS outbox_events (
+  id               UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  created_at       TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at       TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+  event_id         UUID NOT NULL,
+  event_type       VARCHAR(64) NOT NULL,
+  target           VARCHAR(2048) NOT NULL,
+  payload          TEXT NOT NULL,
+
+  status           VARCHAR(16) NOT NULL DEFAULT 'PENDING',
+  attempts         INTEGER NOT NULL DEFAULT 0,
+  next_attempt_at  TIMESTAMPTZ NOT NULL,
+  delivered_at     TIMESTAMPTZ,
+  last_error       TEXT
+);
+
+DROP TRIGGER IF EXISTS trg_outbox_events_updated_at ON outbox_events;
+CREATE TRIGGER trg_outbox_events_updated_at
+BEFORE UPDATE ON outbox_events
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+CREATE INDEX IF NOT EXISTS ix_outbox_events_due
+  ON outbox_events (target, status, next_attempt_at);
+
+CREATE INDEX IF NOT EXISTS ix_outbox_events_delivered
+  ON outbox_events (delivered_at)
+  WHERE status = 'DELIVERED';
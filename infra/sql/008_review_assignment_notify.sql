@@ -0,0 +1,25 @@
+CREATE OR REPLACE FUNCTION notify_review_assignments()
+RETURNS TRIGGER AS $$
+DECLARE
+  reviewers TEXT;
+BEGIN
+  -- Полезная нагрузка NOTIFY ограничена 8000 байт: при большом числе ревьюверов
+  -- отправляется '*', и просыпаются все потоки
+  IF (SELECT COUNT(*) FROM (SELECT DISTINCT reviewer_id FROM inserted LIMIT 201) r) > 200 THEN
+    reviewers := '*';
+  ELSE
+    SELECT string_agg(DISTINCT reviewer_id::text, ',') INTO reviewers FROM inserted;
+  END IF;
+
+  IF reviewers IS NOT NULL THEN
+    PERFORM pg_notify('review_assignments', reviewers);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_pull_request_reviewers_notify ON pull_request_reviewers;
+CREATE TRIGGER trg_pull_request_reviewers_notify
+AFTER INSERT ON pull_request_reviewers
+REFERENCING NEW TABLE AS inserted
+FOR EACH STATEMENT EXECUTE FUNCTION notify_review_assignments();
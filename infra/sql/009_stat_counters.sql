@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS stat_counters (
+  key          VARCHAR(128) PRIMARY KEY,
+  scope        VARCHAR(16) NOT NULL,
+  subject_id   UUID,
+  metric       VARCHAR(32) NOT NULL,
+  slot         SMALLINT NOT NULL,
+  value        BIGINT NOT NULL DEFAULT 0,
+  updated_at   TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_stat_counters_subject
+  ON stat_counters (scope, subject_id);
@@ -0,0 +1,7 @@
+-- ix_pull_requests_open не покрывал выборку открытых ревью пользователя: она фильтрует
+-- pull_request_reviewers по reviewer_id и pr_status
+DROP INDEX IF EXISTS ix_pull_requests_open;
+
+CREATE INDEX IF NOT EXISTS ix_pull_request_reviewers_open
+  ON pull_request_reviewers (reviewer_id, pr_id)
+  WHERE pr_status = 'OPEN';
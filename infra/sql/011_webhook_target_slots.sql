@@ -0,0 +1,17 @@
+CREATE TABLE IF NOT EXISTS webhook_target_slots (
+  id            UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  created_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+  target        VARCHAR(2048) NOT NULL,
+  slot          SMALLINT NOT NULL,
+  lease_id      UUID,
+  leased_until  TIMESTAMPTZ NOT NULL,
+
+  UNIQUE (target, slot)
+);
+
+DROP TRIGGER IF EXISTS trg_webhook_target_slots_updated_at ON webhook_target_slots;
+CREATE TRIGGER trg_webhook_target_slots_updated_at
+BEFORE UPDATE ON webhook_target_slots
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
@@ -0,0 +1,77 @@
+import math
+from dataclasses import dataclass, field
+from typing import Any
+
+TOTAL = "total"
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    failures: int = 0
+
+    def record(self, latency_ms: float, ok: bool) -> None:
+        self.latencies_ms.append(latency_ms)
+        if not ok:
+            self.failures += 1
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(stats: EndpointStats, elapsed_seconds: float) -> dict[str, float]:
+    requests = len(stats.latencies_ms)
+    return {
+        "requests": requests,
+        "failures": stats.failures,
+        "error_rate": round(stats.failures / requests, 4) if requests else 0.0,
+        "rps": round(requests / elapsed_seconds, 2) if elapsed_seconds else 0.0,
+        "p50_ms": round(percentile(stats.latencies_ms, 50), 2),
+        "p90_ms": round(percentile(stats.latencies_ms, 90), 2),
+        "p99_ms": round(percentile(stats.latencies_ms, 99), 2),
+        "max_ms": round(max(stats.latencies_ms, default=0.0), 2),
+    }
+
+
+def build_report(stats: dict[str, EndpointStats], elapsed_seconds: float) -> dict[str, Any]:
+    total = EndpointStats()
+    for endpoint in stats.values():
+        total.latencies_ms.extend(endpoint.latencies_ms)
+        total.failures += endpoint.failures
+
+    return {
+        "elapsed_seconds": round(elapsed_seconds, 3),
+        TOTAL: summarize(total, elapsed_seconds),
+        "endpoints": {
+            name: summarize(endpoint, elapsed_seconds) for name, endpoint in sorted(stats.items())
+        },
+    }
+
+
+def check_slo(report: dict[str, Any], slo: dict[str, Any]) -> list[str]:
+    # Пороги: max_* — верхняя граница, min_* — нижняя, ключ без префикса сравнивается как max
+    targets = [(TOTAL, report[TOTAL], slo.get(TOTAL, {}))]
+    targets += [
+        (name, report["endpoints"].get(name), limits)
+        for name, limits in slo.get("endpoints", {}).items()
+    ]
+
+    violations = []
+    for name, summary, limits in targets:
+        if summary is None:
+            continue
+        for key, limit in limits.items():
+            if key.startswith("min_"):
+                value = summary[key.removeprefix("min_")]
+                failed = value < limit
+            else:
+                value = summary[key.removeprefix("max_")]
+                failed = value > limit
+            if failed:
+                violations.append(f"{name}: {key}={limit}, факт {value}")
+    return violations
@@ -0,0 +1,138 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from httpx import ASGITransport, AsyncClient
+from tortoise import Tortoise
+
+from app.core.config import get_settings
+from app.db.tortoise import close_db, init_db
+from app.main import create_app
+from loadtest.report import EndpointStats, build_report, check_slo
+from loadtest.scenario import Call, Dataset, LoadConfig, next_call, seed_calls
+
+DEFAULT_SLO_PATH = Path(__file__).with_name("slo.json")
+
+
+class SeedError(Exception):
+    pass
+
+
+async def execute(client: AsyncClient, call: Call) -> tuple[int, float]:
+    started = time.perf_counter()
+    response = await client.request(
+        call.method,
+        call.url,
+        json=call.json,
+        params=call.params,
+        content=call.content,
+        headers=call.headers,
+    )
+    latency_ms = (time.perf_counter() - started) * 1000
+    if response.status_code < 300 and call.on_success is not None:
+        call.on_success(response.json())
+    return response.status_code, latency_ms
+
+
+async def seed(client: AsyncClient, config: LoadConfig, rng: random.Random) -> Dataset:
+    dataset = Dataset()
+    for call in seed_calls(config, dataset, rng):
+        status_code, _ = await execute(client, call)
+        if status_code not in call.expected:
+            raise SeedError(f"{call.name} вернул {status_code} при подготовке данных")
+    return dataset
+
+
+async def run_load(
+    client: AsyncClient,
+    dataset: Dataset,
+    requests: int,
+    concurrency: int,
+    rng: random.Random,
+) -> dict[str, Any]:
+    stats: dict[str, EndpointStats] = defaultdict(EndpointStats)
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            call = next_call(dataset, rng)
+            try:
+                status_code, latency_ms = await execute(client, call)
+            except Exception:
+                stats[call.name].failures += 1
+                continue
+            stats[call.name].record(latency_ms, status_code in call.expected)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return build_report(stats, time.perf_counter() - started)
+
+
+@asynccontextmanager
+async def in_process_client() -> AsyncIterator[AsyncClient]:
+    settings = get_settings()
+    await init_db(settings)
+    if settings.db_schema.startswith("sqlite"):
+        await Tortoise.generate_schemas()
+
+    transport = ASGITransport(app=create_app())
+    try:
+        async with AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            yield client
+    finally:
+        await close_db()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон без Locust")
+    parser.add_argument("--target", help="URL сервиса; без него приложение поднимается в процессе")
+    parser.add_argument("--teams", type=int, default=LoadConfig.teams)
+    parser.add_argument("--users", type=int, default=LoadConfig.users_per_team)
+    parser.add_argument("--prs", type=int, default=LoadConfig.prs_per_team)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--slo", type=Path, default=DEFAULT_SLO_PATH)
+    parser.add_argument("--output", type=Path, help="Файл для JSON-отчёта, по умолчанию stdout")
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+    config = LoadConfig(teams=args.teams, users_per_team=args.users, prs_per_team=args.prs)
+
+    if args.target:
+        client_context = AsyncClient(base_url=args.target, timeout=30)
+    else:
+        client_context = in_process_client()
+
+    async with client_context as client:
+        dataset = await seed(client, config, rng)
+        report = await run_load(client, dataset, args.requests, args.concurrency, rng)
+
+    violations = check_slo(report, json.loads(args.slo.read_text()))
+    report["slo_violations"] = violations
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+
+    for violation in violations:
+        print(f"SLO нарушен: {violation}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,161 @@
+import json
+import random
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.common.ndjson import NDJSON_MEDIA_TYPE
+
+API_PREFIX = "/api/v1"
+
+
+@dataclass(frozen=True)
+class LoadConfig:
+    teams: int = 20
+    users_per_team: int = 10
+    prs_per_team: int = 5
+
+
+@dataclass
+class Call:
+    name: str
+    method: str
+    path: str
+    json: dict[str, Any] | None = None
+    params: dict[str, Any] | None = None
+    content: bytes | None = None
+    headers: dict[str, str] | None = None
+    expected: frozenset[int] = frozenset({200})
+    on_success: Callable[[dict[str, Any]], None] | None = None
+
+    @property
+    def url(self) -> str:
+        return f"{API_PREFIX}{self.path}"
+
+
+@dataclass
+class Dataset:
+    team_names: list[str] = field(default_factory=list)
+    user_ids: list[str] = field(default_factory=list)
+    open_prs: dict[str, list[str]] = field(default_factory=dict)
+
+    def add_pull_request(self, body: dict[str, Any]) -> None:
+        pr = body["pr"]
+        if pr["status"] == "OPEN":
+            self.open_prs[pr["pull_request_id"]] = pr["assigned_reviewers"]
+        else:
+            self.open_prs.pop(pr["pull_request_id"], None)
+
+
+def seed_calls(config: LoadConfig, dataset: Dataset, rng: random.Random) -> list[Call]:
+    run_id = uuid.uuid4().hex[:8]
+    teams = []
+    for team_index in range(config.teams):
+        name = f"load-{run_id}-{team_index}"
+        members = [
+            {
+                "user_id": str(uuid.uuid4()),
+                "username": f"load-{run_id}-{team_index}-{user_index}",
+                "is_active": True,
+            }
+            for user_index in range(config.users_per_team)
+        ]
+        teams.append({"team_name": name, "members": members})
+        dataset.team_names.append(name)
+        dataset.user_ids.extend(member["user_id"] for member in members)
+
+    calls = [
+        Call(
+            name="POST /team/import",
+            method="POST",
+            path="/team/import",
+            content="\n".join(json.dumps(team) for team in teams).encode(),
+            headers={"Content-Type": NDJSON_MEDIA_TYPE},
+        )
+    ]
+    for team in teams:
+        for _ in range(config.prs_per_team):
+            author = rng.choice(team["members"])
+            calls.append(create_pull_request(dataset, rng, author["user_id"]))
+    return calls
+
+
+def create_pull_request(dataset: Dataset, rng: random.Random, author_id: str | None = None) -> Call:
+    return Call(
+        name="POST /pullRequest/create",
+        method="POST",
+        path="/pullRequest/create",
+        json={
+            "pull_request_id": str(uuid.uuid4()),
+            "pull_request_name": "Load test",
+            "author_id": author_id or rng.choice(dataset.user_ids),
+        },
+        expected=frozenset({201}),
+        on_success=dataset.add_pull_request,
+    )
+
+
+def merge_pull_request(dataset: Dataset, rng: random.Random) -> Call:
+    if not dataset.open_prs:
+        return create_pull_request(dataset, rng)
+
+    pr_id = rng.choice(list(dataset.open_prs))
+    # Убираем PR сразу, чтобы параллельные воркеры не мержили его повторно
+    dataset.open_prs.pop(pr_id)
+    return Call(
+        name="POST /pullRequest/merge",
+        method="POST",
+        path="/pullRequest/merge",
+        json={"pull_request_id": pr_id},
+        on_success=dataset.add_pull_request,
+    )
+
+
+def reassign_reviewer(dataset: Dataset, rng: random.Random) -> Call:
+    candidates = [pr_id for pr_id, reviewers in dataset.open_prs.items() if reviewers]
+    if not candidates:
+        return create_pull_request(dataset, rng)
+
+    pr_id = rng.choice(candidates)
+    return Call(
+        name="POST /pullRequest/reassign",
+        method="POST",
+        path="/pullRequest/reassign",
+        json={"pull_request_id": pr_id, "old_user_id": rng.choice(dataset.open_prs[pr_id])},
+        # 409: кандидатов нет или ревьювера уже сменил параллельный запрос
+        expected=frozenset({200, 409}),
+        on_success=dataset.add_pull_request,
+    )
+
+
+def get_review(dataset: Dataset, rng: random.Random) -> Call:
+    return Call(
+        name="GET /users/getReview",
+        method="GET",
+        path="/users/getReview",
+        params={"user_id": rng.choice(dataset.user_ids)},
+    )
+
+
+def get_team(dataset: Dataset, rng: random.Random) -> Call:
+    return Call(
+        name="GET /team/get",
+        method="GET",
+        path="/team/get",
+        params={"team_name": rng.choice(dataset.team_names)},
+    )
+
+
+MIX: list[tuple[Callable[[Dataset, random.Random], Call], int]] = [
+    (get_review, 35),
+    (get_team, 25),
+    (create_pull_request, 20),
+    (reassign_reviewer, 10),
+    (merge_pull_request, 10),
+]
+
+
+def next_call(dataset: Dataset, rng: random.Random) -> Call:
+    operations, weights = zip(*MIX, strict=True)
+    operation = rng.choices(operations, weights=weights)[0]
+    return operation(dataset, rng)
@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import random
+from pathlib import Path
+
+import requests
+from locust import HttpUser, between, events, task
+from locust.runners import MasterRunner
+
+from loadtest.report import TOTAL, check_slo
+from loadtest.scenario import Call, Dataset, LoadConfig, next_call, seed_calls
+
+logger = logging.getLogger(__name__)
+
+SLO_PATH = Path(os.getenv("LOADTEST_SLO", Path(__file__).parent / "loadtest" / "slo.json"))
+LOADTEST_REPORT = os.getenv("LOADTEST_REPORT")
+
+config = LoadConfig(
+    teams=int(os.getenv("LOADTEST_TEAMS", LoadConfig.teams)),
+    users_per_team=int(os.getenv("LOADTEST_USERS", LoadConfig.users_per_team)),
+    prs_per_team=int(os.getenv("LOADTEST_PRS", LoadConfig.prs_per_team)),
+)
+dataset = Dataset()
+rng = random.Random()
+
+
+def send(client, call: Call) -> None:
+    with client.request(
+        call.method,
+        call.url,
+        name=call.name,
+        json=call.json,
+        params=call.params,
+        data=call.content,
+        headers=call.headers,
+        catch_response=True,
+    ) as response:
+        if response.status_code not in call.expected:
+            response.failure(f"Неожиданный статус {response.status_code}")
+            return
+        response.success()
+        if response.status_code < 300 and call.on_success is not None:
+            call.on_success(response.json())
+
+
+@events.test_start.add_listener
+def seed_dataset(environment, **kwargs) -> None:
+    # В распределённом режиме данные готовит каждый воркер, мастер запросов не шлёт
+    if dataset.user_ids or isinstance(environment.runner, MasterRunner):
+        return
+
+    session = requests.Session()
+    for call in seed_calls(config, dataset, rng):
+        response = session.request(
+            call.method,
+            f"{environment.host}{call.url}",
+            json=call.json,
+            params=call.params,
+            data=call.content,
+            headers=call.headers,
+        )
+        if response.status_code not in call.expected:
+            raise RuntimeError(f"{call.name} вернул {response.status_code} при подготовке данных")
+        if call.on_success is not None:
+            call.on_success(response.json())
+
+
+def summarize(entry) -> dict[str, float]:
+    return {
+        "requests": entry.num_requests,
+        "failures": entry.num_failures,
+        "error_rate": entry.fail_ratio,
+        "rps": entry.total_rps,
+        "p50_ms": entry.get_response_time_percentile(0.5),
+        "p90_ms": entry.get_response_time_percentile(0.9),
+        "p99_ms": entry.get_response_time_percentile(0.99),
+        "max_ms": entry.max_response_time,
+    }
+
+
+@events.quitting.add_listener
+def gate_on_slo(environment, **kwargs) -> None:
+    stats = environment.stats
+    report = {
+        TOTAL: summarize(stats.total),
+        "endpoints": {entry.name: summarize(entry) for entry in stats.entries.values()},
+    }
+    if LOADTEST_REPORT:
+        Path(LOADTEST_REPORT).write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+    violations = check_slo(report, json.loads(SLO_PATH.read_text()))
+    for violation in violations:
+        logger.error("SLO нарушен: %s", violation)
+    if violations:
+        environment.process_exit_code = 1
+
+
+class ReviewServiceUser(HttpUser):
+    wait_time = between(0.01, 0.1)
+
+    @task
+    def mixed_workload(self) -> None:
+        send(self.client, next_call(dataset, rng))
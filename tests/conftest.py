@@ -1,10 +1,18 @@
+import uuid
+
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from tortoise import Tortoise
 
 from app.core.config import get_settings
+from app.db.replicas import get_replica_set
 from app.db.tortoise import close_db, init_db
 from app.main import create_app
+from app.models.teams import Team
+from app.services.dto_cache import get_dto_cache
+from app.services.outbox.outbox_service import get_webhook_dispatcher
+from app.services.review_stream.review_stream_service import get_review_broker
+from app.services.users.users_service import get_activity_buffer
 
 
 def prepare_sqlite_env(monkeypatch):
@@ -17,9 +25,45 @@ def prepare_sqlite_env(monkeypatch):
     get_settings.cache_clear()
 
 
+async def create_team(api_client: AsyncClient, name: str, members: list[str] | list[dict]) -> str:
+    # Участники передаются id или готовыми словарями TeamMemberCreate
+    resp = await api_client.post(
+        "/api/v1/team/add",
+        json={
+            "team_name": name,
+            "members": [
+                member
+                if isinstance(member, dict)
+                else {"user_id": member, "username": f"{name}-{index}", "is_active": True}
+                for index, member in enumerate(members)
+            ],
+        },
+    )
+    assert resp.status_code == 201
+    return str((await Team.get(name=name)).id)
+
+
+async def create_pull_request(api_client: AsyncClient, author_id: str, name: str = "PR") -> dict:
+    resp = await api_client.post(
+        "/api/v1/pullRequest/create",
+        json={
+            "pull_request_id": str(uuid.uuid4()),
+            "pull_request_name": name,
+            "author_id": author_id,
+        },
+    )
+    assert resp.status_code == 201
+    return resp.json()["pr"]
+
+
 @pytest_asyncio.fixture()
 async def api_client(monkeypatch):
     prepare_sqlite_env(monkeypatch)
+    get_dto_cache.cache_clear()
+    get_activity_buffer.cache_clear()
+    get_replica_set.cache_clear()
+    get_webhook_dispatcher.cache_clear()
+    get_review_broker.cache_clear()
 
     app = create_app()
     settings = get_settings()
@@ -33,5 +77,12 @@ async def api_client(monkeypatch):
         await Tortoise.generate_schemas()
         yield client
 
+    await get_activity_buffer().close()
+    await get_webhook_dispatcher().stop()
     await close_db()
     get_settings.cache_clear()
+    get_dto_cache.cache_clear()
+    get_activity_buffer.cache_clear()
+    get_replica_set.cache_clear()
+    get_webhook_dispatcher.cache_clear()
+    get_review_broker.cache_clear()
@@ -0,0 +1,180 @@
+import asyncio
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from tortoise import connections
+
+from app.common.cache import AsyncTTLCache
+from app.core.config import get_settings
+from app.db.sql import SQLITE, get_dialect
+from app.services import dto_cache
+from app.services.dto_cache import (
+    CacheInvalidation,
+    create_invalidation_listener,
+    get_dto_cache,
+    handle_invalidation_message,
+)
+from app.services.teams.schemas import TeamDto
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache: AsyncTTLCache[str, int] = AsyncTTLCache(maxsize=10, ttl=60)
+    calls = 0
+
+    async def load() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(cache.get_or_load("key", load) for _ in range(10)))
+
+    assert results == [42] * 10
+    assert calls == 1
+    stats = cache.stats()
+    assert (stats.misses, stats.coalesced, stats.hits) == (1, 9, 0)
+
+    assert await cache.get_or_load("key", load) == 42
+    assert cache.stats().hits == 1
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_and_evict_least_recently_used():
+    clock = FakeClock()
+    cache: AsyncTTLCache[str, str] = AsyncTTLCache(maxsize=2, ttl=10, clock=clock)
+
+    async def load_value(value: str) -> str:
+        return value
+
+    await cache.get_or_load("a", lambda: load_value("a"))
+    await cache.get_or_load("b", lambda: load_value("b"))
+    await cache.get_or_load("a", lambda: load_value("a"))
+    await cache.get_or_load("c", lambda: load_value("c"))
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.stats().evictions == 1
+
+    clock.now = 11
+    assert "a" not in cache
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidated_inflight_load_is_not_stored():
+    cache: AsyncTTLCache[str, str] = AsyncTTLCache(maxsize=10, ttl=60)
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_load() -> str:
+        started.set()
+        await release.wait()
+        return "stale"
+
+    pending = asyncio.ensure_future(cache.get_or_load("key", slow_load))
+    await started.wait()
+    cache.invalidate("key")
+    release.set()
+
+    assert await pending == "stale"
+    assert "key" not in cache
+
+
+@pytest.mark.asyncio
+async def test_failed_load_is_not_cached():
+    cache: AsyncTTLCache[str, str] = AsyncTTLCache(maxsize=10, ttl=60)
+
+    async def failing_load() -> str:
+        raise LookupError("нет")
+
+    with pytest.raises(LookupError):
+        await cache.get_or_load("key", failing_load)
+
+    async def load() -> str:
+        return "value"
+
+    assert await cache.get_or_load("key", load) == "value"
+    assert cache.stats().misses == 2
+
+
+def foreign_payload(monkeypatch, invalidation: CacheInvalidation) -> str:
+    with monkeypatch.context() as patch:
+        patch.setattr(dto_cache, "WORKER_ID", "other-worker")
+        return invalidation.encode()
+
+
+async def cache_team(team_id: uuid.UUID) -> None:
+    async def load() -> TeamDto:
+        return TeamDto(team_name="cached", members=[])
+
+    await get_dto_cache().get_team(team_id, load)
+
+
+@pytest.mark.asyncio
+async def test_invalidation_messages_from_other_workers_are_applied(
+    api_client: AsyncClient, monkeypatch
+):
+    team_id = uuid.uuid4()
+    await cache_team(team_id)
+
+    invalidation = CacheInvalidation(team_ids={team_id})
+    handle_invalidation_message(invalidation.encode())
+    assert team_id in get_dto_cache().teams
+
+    handle_invalidation_message(foreign_payload(monkeypatch, invalidation))
+    assert team_id not in get_dto_cache().teams
+
+
+def test_oversized_invalidation_becomes_flush():
+    invalidation = CacheInvalidation(user_ids={uuid.uuid4() for _ in range(500)})
+    _, decoded = CacheInvalidation.decode(invalidation.encode())
+    assert decoded.flush
+    assert not decoded.user_ids
+
+
+@pytest.mark.asyncio
+async def test_listener_evicts_on_notify_and_flushes_on_reconnect(
+    api_client: AsyncClient, monkeypatch
+):
+    conn = connections.get("default")
+    if get_dialect(conn) == SQLITE:
+        pytest.skip("LISTEN/NOTIFY доступен только в PostgreSQL")
+
+    listener = create_invalidation_listener(get_settings())
+    listener.start()
+    try:
+        await asyncio.wait_for(listener.connected.wait(), 5)
+
+        team_id = uuid.uuid4()
+        await cache_team(team_id)
+        payload = foreign_payload(monkeypatch, CacheInvalidation(team_ids={team_id}))
+        await conn.execute_query("SELECT pg_notify('dto_cache_invalidation', $1)", [payload])
+        for _ in range(50):
+            if team_id not in get_dto_cache().teams:
+                break
+            await asyncio.sleep(0.02)
+        assert team_id not in get_dto_cache().teams
+
+        await cache_team(team_id)
+        await conn.execute_query(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE query LIKE 'LISTEN%' AND pid <> pg_backend_pid()"
+        )
+        for _ in range(50):
+            if team_id not in get_dto_cache().teams:
+                break
+            await asyncio.sleep(0.02)
+        assert team_id not in get_dto_cache().teams
+        await asyncio.wait_for(listener.connected.wait(), 5)
+    finally:
+        await listener.stop()
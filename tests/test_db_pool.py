@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from tortoise import connections
+
+from app.db.pool import DatabaseOverloadedError, InstrumentedPool
+from app.db.sql import SQLITE, get_dialect
+
+
+class FakePool:
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.free: asyncio.Queue[str] = asyncio.Queue()
+        for index in range(size):
+            self.free.put_nowait(f"conn-{index}")
+
+    async def acquire(self, timeout: float | None = None) -> str:
+        return await asyncio.wait_for(self.free.get(), timeout)
+
+    async def release(self, connection: str) -> None:
+        self.free.put_nowait(connection)
+
+    def get_size(self) -> int:
+        return self.size
+
+    def get_max_size(self) -> int:
+        return self.size
+
+    def get_idle_size(self) -> int:
+        return self.free.qsize()
+
+
+@pytest.mark.asyncio
+async def test_pool_sheds_load_when_acquire_wait_exceeds_timeout():
+    pool = InstrumentedPool(FakePool(size=1), acquire_timeout=0.05)
+
+    connection = await pool.acquire()
+    assert pool.stats().in_use == 1
+
+    with pytest.raises(DatabaseOverloadedError) as exc_info:
+        await pool.acquire()
+    assert exc_info.value.status_code == 503
+
+    await pool.release(connection)
+    stats = pool.stats()
+    assert (stats.acquired, stats.shed, stats.waiting, stats.idle) == (1, 1, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_pool_records_acquire_wait():
+    pool = InstrumentedPool(FakePool(size=1), acquire_timeout=1)
+    connection = await pool.acquire()
+
+    async def release_later() -> None:
+        await asyncio.sleep(0.05)
+        await pool.release(connection)
+
+    _, second = await asyncio.gather(release_later(), pool.acquire())
+    assert second == connection
+    assert pool.stats().acquire_wait_seconds_max >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_endpoint(api_client: AsyncClient):
+    resp = await api_client.get("/api/v1/health/pool")
+    assert resp.status_code == 200
+
+    if get_dialect(connections.get("default")) == SQLITE:
+        assert resp.json() == {}
+    else:
+        body = resp.json()
+        assert body["max_size"] == 10
+        assert body["acquired"] > 0
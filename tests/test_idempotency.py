@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.responses import Response
+
+from app.core.idempotency import IdempotencyMiddleware, _fingerprint
+from app.db.instrumentation import assert_max_queries
+from app.models.teams import Team
+from app.services.idempotency.idempotency_service import IdempotencyRecord, IdempotencyService
+
+
+@pytest.mark.asyncio
+async def test_retry_with_same_key_replays_first_response(api_client: AsyncClient):
+    headers = {"Idempotency-Key": "create-alice"}
+
+    first_resp = await api_client.post("/api/v1/users", json={"username": "alice"}, headers=headers)
+    assert first_resp.status_code == 201
+    assert "Idempotent-Replayed" not in first_resp.headers
+
+    with assert_max_queries(1):
+        retry_resp = await api_client.post(
+            "/api/v1/users", json={"username": "alice"}, headers=headers
+        )
+    assert retry_resp.status_code == 201
+    assert retry_resp.headers["Idempotent-Replayed"] == "true"
+    assert retry_resp.headers["content-type"] == "application/json"
+    assert retry_resp.json() == first_resp.json()
+
+    record = await IdempotencyService.get("create-alice")
+    assert record is not None and record.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_same_key_with_different_payload_is_rejected(api_client: AsyncClient):
+    headers = {"Idempotency-Key": "create-user"}
+
+    first_resp = await api_client.post("/api/v1/users", json={"username": "bob"}, headers=headers)
+    assert first_resp.status_code == 201
+
+    resp = await api_client.post("/api/v1/users", json={"username": "carol"}, headers=headers)
+    assert resp.status_code == 422
+    assert resp.json()["error"]["code"] == "IDEMPOTENCY_KEY_REUSED"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_wait_for_in_flight_request(api_client: AsyncClient):
+    payload = {"team_name": "storm", "members": []}
+    headers = {"Idempotency-Key": "team-storm"}
+
+    responses = await asyncio.gather(
+        *(api_client.post("/api/v1/team/add", json=payload, headers=headers) for _ in range(5))
+    )
+
+    assert [resp.status_code for resp in responses] == [201] * 5
+    assert len({resp.content for resp in responses}) == 1
+    assert sum("Idempotent-Replayed" not in resp.headers for resp in responses) == 1
+    assert await Team.filter(name="storm").count() == 1
+
+
+@pytest.mark.asyncio
+async def test_pending_key_from_another_worker_is_awaited(api_client: AsyncClient):
+    body = b'{"team_name":"elsewhere","members":[]}'
+    scope = {"method": "POST", "path": "/api/v1/team/add", "query_string": b""}
+    fingerprint = _fingerprint(scope, body)
+    # Ключ захвачен другим воркером, ответ появится в БД позже
+    assert await IdempotencyService.claim("team-elsewhere", fingerprint, lease_seconds=60)
+
+    async def finish_elsewhere() -> None:
+        await asyncio.sleep(0.1)
+        record = IdempotencyRecord(fingerprint, 201, "application/json", '{"done":true}')
+        await IdempotencyService.complete("team-elsewhere", record, ttl_seconds=60)
+
+    resp, _ = await asyncio.gather(
+        api_client.post(
+            "/api/v1/team/add",
+            content=body,
+            headers={"Idempotency-Key": "team-elsewhere", "Content-Type": "application/json"},
+        ),
+        finish_elsewhere(),
+    )
+
+    assert resp.status_code == 201
+    assert resp.headers["Idempotent-Replayed"] == "true"
+    assert resp.json() == {"done": True}
+    assert await Team.filter(name="elsewhere").count() == 0
+
+
+@pytest.mark.asyncio
+async def test_lease_is_extended_while_request_runs(api_client: AsyncClient):
+    executions = 0
+
+    async def slow_write(scope, receive, send) -> None:
+        nonlocal executions
+        executions += 1
+        await receive()
+        # Запрос выполняется дольше нескольких сроков аренды
+        await asyncio.sleep(0.5)
+        await Response(b'{"done":true}', status_code=201, media_type="application/json")(
+            scope, receive, send
+        )
+
+    def worker() -> AsyncClient:
+        middleware = IdempotencyMiddleware(
+            slow_write, ttl_seconds=60, lease_seconds=0.1, wait_seconds=5, cache_max_entries=10
+        )
+        return AsyncClient(transport=ASGITransport(app=middleware), base_url="http://test")
+
+    headers = {"Idempotency-Key": "slow-import"}
+    async with worker() as first, worker() as second:
+
+        async def duplicate_after_lease():
+            await asyncio.sleep(0.3)
+            return await second.post("/api/v1/team/import", content=b"{}", headers=headers)
+
+        first_resp, second_resp = await asyncio.gather(
+            first.post("/api/v1/team/import", content=b"{}", headers=headers),
+            duplicate_after_lease(),
+        )
+
+    assert executions == 1
+    assert first_resp.status_code == second_resp.status_code == 201
+    assert second_resp.headers["Idempotent-Replayed"] == "true"
@@ -0,0 +1,30 @@
+import random
+
+import pytest
+from httpx import AsyncClient
+
+from loadtest.report import check_slo
+from loadtest.runner import run_load, seed
+from loadtest.scenario import LoadConfig
+
+
+@pytest.mark.asyncio
+async def test_load_run_reports_percentiles_per_endpoint(api_client: AsyncClient):
+    rng = random.Random(7)
+    dataset = await seed(api_client, LoadConfig(teams=3, users_per_team=4, prs_per_team=2), rng)
+    assert len(dataset.open_prs) == 6
+
+    report = await run_load(api_client, dataset, requests=200, concurrency=4, rng=rng)
+
+    assert report["total"]["requests"] == 200
+    assert report["total"]["failures"] == 0
+    assert "GET /users/getReview" in report["endpoints"]
+    for summary in report["endpoints"].values():
+        assert summary["p50_ms"] <= summary["p90_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+
+    assert check_slo(report, {"total": {"max_error_rate": 0.0}}) == []
+    violations = check_slo(
+        report,
+        {"total": {"min_rps": 10**9}, "endpoints": {"GET /team/get": {"max_p90_ms": 0}}},
+    )
+    assert len(violations) == 2
@@ -0,0 +1,50 @@
+import pytest
+from httpx import AsyncClient
+
+from app.db.instrumentation import track_queries
+from app.models.users import User
+
+
+def sample_value(body: str, name: str, **labels: str) -> float:
+    suffix = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    prefix = f"{name}{{{suffix}"
+    for line in body.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+@pytest.mark.asyncio
+async def test_metrics_use_route_template_and_count_db_queries(api_client: AsyncClient):
+    before = (await api_client.get("/metrics")).text
+    route = "/api/v1/users/{user_id}"
+    labels = {"method": "GET", "route": route}
+
+    response = await api_client.get("/api/v1/users/00000000-0000-0000-0000-000000000001")
+    assert response.status_code == 404
+
+    after = (await api_client.get("/metrics")).text
+    assert "00000000-0000-0000-0000-000000000001" not in after
+    assert (
+        sample_value(after, "http_requests_total", **labels, status="404")
+        - sample_value(before, "http_requests_total", **labels, status="404")
+        == 1
+    )
+    assert (
+        sample_value(after, "http_request_duration_seconds_count", **labels)
+        - sample_value(before, "http_request_duration_seconds_count", **labels)
+        == 1
+    )
+    assert sample_value(after, "http_request_db_queries_sum", **labels) > sample_value(
+        before, "http_request_db_queries_sum", **labels
+    )
+
+
+@pytest.mark.asyncio
+async def test_track_queries_counts_each_statement_once(api_client: AsyncClient):
+    with track_queries() as queries:
+        await User.all()
+        await User.filter(is_active=True).count()
+
+    assert queries.count == 2
+    assert queries.seconds > 0
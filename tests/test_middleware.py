@@ -0,0 +1,75 @@
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.main import create_app
+
+
+@pytest.mark.asyncio
+async def test_request_id_is_echoed(api_client: AsyncClient):
+    resp = await api_client.get("/api/v1/health/healthz", headers={"X-Request-ID": "req-1"})
+    assert resp.status_code == 200
+    assert resp.headers["X-Request-ID"] == "req-1"
+
+
+@pytest.mark.asyncio
+async def test_request_id_is_generated(api_client: AsyncClient):
+    resp = await api_client.get("/api/v1/health/healthz")
+    assert uuid.UUID(resp.headers["X-Request-ID"])
+
+
+@pytest.mark.asyncio
+async def test_service_error_keeps_request_id(api_client: AsyncClient):
+    resp = await api_client.get(
+        f"/api/v1/users/{uuid.uuid4()}", headers={"X-Request-ID": "req-404"}
+    )
+    assert resp.status_code == 404
+    assert resp.headers["X-Request-ID"] == "req-404"
+    assert resp.json()["error"]["code"] == "NOT_FOUND"
+
+
+@pytest.mark.asyncio
+async def test_unexpected_error_returns_service_error_body():
+    app = create_app()
+
+    async def boom() -> None:
+        raise RuntimeError("boom")
+
+    app.add_api_route("/boom", boom)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get("/boom", headers={"X-Request-ID": "req-500"})
+
+    assert resp.status_code == 500
+    assert resp.headers["X-Request-ID"] == "req-500"
+    assert resp.json() == {"error": {"code": "SERVICE_ERROR", "message": "Произошла ошибка"}}
+
+
+@pytest.mark.asyncio
+async def test_dto_responses_match_response_model_serialization(api_client: AsyncClient):
+    members = [
+        {"user_id": str(uuid.uuid4()), "username": f"json-{index}", "is_active": True}
+        for index in range(3)
+    ]
+    resp = await api_client.post("/api/v1/team/add", json={"team_name": "json", "members": members})
+    assert resp.status_code == 201
+
+    pr_resp = await api_client.post(
+        "/api/v1/pullRequest/create",
+        json={
+            "pull_request_id": str(uuid.uuid4()),
+            "pull_request_name": "Serialize",
+            "author_id": members[0]["user_id"],
+        },
+    )
+    assert pr_resp.status_code == 201
+    assert pr_resp.headers["content-type"] == "application/json"
+    pr = pr_resp.json()["pr"]
+    assert pr["status"] == "OPEN"
+    assert "createdAt" in pr and "created_at" not in pr
+
+    delete_resp = await api_client.delete(f"/api/v1/users/{members[2]['user_id']}")
+    assert delete_resp.status_code == 204
+    assert delete_resp.content == b""
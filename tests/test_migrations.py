@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import get_settings
+from app.db.migrations import MigrationError, apply_migrations, load_migrations
+
+
+def test_load_migrations_orders_by_version():
+    migrations = load_migrations(Path(get_settings().db_migrations_dir))
+
+    versions = [migration.version for migration in migrations]
+    assert versions == sorted(versions)
+    assert versions[:3] == [1, 2, 3]
+    assert migrations[0].name == "init"
+    assert len(migrations[0].checksum) == 64
+
+
+def test_load_migrations_rejects_duplicate_versions(tmp_path: Path):
+    (tmp_path / "001_first.sql").write_text("SELECT 1;")
+    (tmp_path / "01_second.sql").write_text("SELECT 2;")
+
+    with pytest.raises(MigrationError):
+        load_migrations(tmp_path)
+
+
+def test_load_migrations_rejects_unversioned_files(tmp_path: Path):
+    (tmp_path / "indexes.sql").write_text("SELECT 1;")
+
+    with pytest.raises(MigrationError):
+        load_migrations(tmp_path)
+
+
+@pytest.mark.asyncio
+async def test_apply_migrations_skips_sqlite(api_client: AsyncClient):
+    assert await apply_migrations(get_settings()) == []
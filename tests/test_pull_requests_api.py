@@ -1,12 +1,16 @@
+import asyncio
 import uuid
 
 import pytest
 from httpx import AsyncClient
+from tortoise import connections
 
-
-async def create_team(api_client: AsyncClient, name: str, members: list[dict]) -> None:
-    resp = await api_client.post("/api/v1/team/add", json={"team_name": name, "members": members})
-    assert resp.status_code == 201
+from app.core.config import get_settings
+from app.db.sql import SQLITE, get_dialect
+from app.models.pull_request_reviewers import PullRequestReviewer
+from app.models.reviewer_loads import ReviewerLoad
+from app.services.pull_request_reviewers.selection import SelectionStrategy
+from tests.conftest import create_pull_request, create_team
 
 
 @pytest.mark.asyncio
@@ -151,3 +155,364 @@ async def test_reassign_replaces_reviewer_from_same_team(api_client: AsyncClient
     assert len(new_reviewers) == 2
     assert old_reviewer not in new_reviewers
     assert replacement in new_reviewers
+
+
+@pytest.mark.asyncio
+async def test_create_pull_request_duplicate_id_returns_conflict(api_client: AsyncClient):
+    author_id = str(uuid.uuid4())
+    await create_team(
+        api_client,
+        "web",
+        [
+            {"user_id": author_id, "username": "author", "is_active": True},
+            {"user_id": str(uuid.uuid4()), "username": "r1", "is_active": True},
+        ],
+    )
+
+    payload = {
+        "pull_request_id": str(uuid.uuid4()),
+        "pull_request_name": "Duplicate",
+        "author_id": author_id,
+    }
+    first_resp = await api_client.post("/api/v1/pullRequest/create", json=payload)
+    assert first_resp.status_code == 201
+    assert len(first_resp.json()["pr"]["assigned_reviewers"]) == 1
+
+    duplicate_resp = await api_client.post("/api/v1/pullRequest/create", json=payload)
+    assert duplicate_resp.status_code == 409
+    assert duplicate_resp.json()["error"]["code"] == "PR_EXISTS"
+
+
+@pytest.mark.asyncio
+async def test_create_pull_request_requires_author_team(api_client: AsyncClient):
+    user_resp = await api_client.post("/api/v1/users", json={"username": "teamless"})
+    author_id = user_resp.json()["user_id"]
+
+    resp = await api_client.post(
+        "/api/v1/pullRequest/create",
+        json={
+            "pull_request_id": str(uuid.uuid4()),
+            "pull_request_name": "No team",
+            "author_id": author_id,
+        },
+    )
+
+    assert resp.status_code == 404
+    assert resp.json()["error"]["code"] == "NOT_FOUND"
+
+
+@pytest.mark.asyncio
+async def test_create_pull_request_skips_inactive_reviewers(api_client: AsyncClient):
+    author_id = str(uuid.uuid4())
+    active_id = str(uuid.uuid4())
+
+    await create_team(
+        api_client,
+        "data",
+        [
+            {"user_id": author_id, "username": "author", "is_active": True},
+            {"user_id": active_id, "username": "active", "is_active": True},
+            {"user_id": str(uuid.uuid4()), "username": "inactive", "is_active": False},
+        ],
+    )
+
+    resp = await api_client.post(
+        "/api/v1/pullRequest/create",
+        json={
+            "pull_request_id": str(uuid.uuid4()),
+            "pull_request_name": "Only active",
+            "author_id": author_id,
+        },
+    )
+
+    assert resp.status_code == 201
+    assert resp.json()["pr"]["assigned_reviewers"] == [active_id]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("strategy", ["least_open", "round_robin"])
+async def test_reviewer_selection_spreads_load(api_client: AsyncClient, monkeypatch, strategy: str):
+    monkeypatch.setenv("REVIEWER_SELECTION_STRATEGY", strategy)
+    get_settings.cache_clear()
+
+    author_id = str(uuid.uuid4())
+    reviewer_ids = [str(uuid.uuid4()) for _ in range(4)]
+    await create_team(
+        api_client,
+        "balanced",
+        [{"user_id": author_id, "username": "author", "is_active": True}]
+        + [
+            {"user_id": rid, "username": f"r{i}", "is_active": True}
+            for i, rid in enumerate(reviewer_ids)
+        ],
+    )
+
+    first = await create_pull_request(api_client, author_id, "First")
+    second = await create_pull_request(api_client, author_id, "Second")
+
+    assigned = first["assigned_reviewers"] + second["assigned_reviewers"]
+    assert sorted(assigned) == sorted(reviewer_ids)
+
+
+@pytest.mark.asyncio
+async def test_weighted_random_selection_picks_team_members(api_client: AsyncClient, monkeypatch):
+    monkeypatch.setenv("REVIEWER_SELECTION_STRATEGY", "weighted_random")
+    get_settings.cache_clear()
+
+    author_id = str(uuid.uuid4())
+    reviewer_ids = [str(uuid.uuid4()) for _ in range(3)]
+    await create_team(
+        api_client,
+        "weighted",
+        [{"user_id": author_id, "username": "author", "is_active": True}]
+        + [
+            {"user_id": rid, "username": f"r{i}", "is_active": True}
+            for i, rid in enumerate(reviewer_ids)
+        ],
+    )
+
+    for i in range(5):
+        pr = await create_pull_request(api_client, author_id, f"PR {i}")
+        assert len(pr["assigned_reviewers"]) == 2
+        assert set(pr["assigned_reviewers"]) <= set(reviewer_ids)
+
+
+def test_incomplete_selection_strategy_fails_on_construction():
+    class OrderOnlyStrategy(SelectionStrategy):
+        name = "order_only"
+
+        def order_by(self, dialect: str) -> str:
+            return "tm.user_id"
+
+    with pytest.raises(TypeError):
+        OrderOnlyStrategy()
+
+
+@pytest.mark.asyncio
+async def test_open_review_counters_follow_lifecycle(api_client: AsyncClient):
+    author_id = str(uuid.uuid4())
+    reviewer_ids = [str(uuid.uuid4()) for _ in range(3)]
+    await create_team(
+        api_client,
+        "counters",
+        [{"user_id": author_id, "username": "author", "is_active": True}]
+        + [
+            {"user_id": rid, "username": f"r{i}", "is_active": True}
+            for i, rid in enumerate(reviewer_ids)
+        ],
+    )
+
+    pr = await create_pull_request(api_client, author_id, "Counted")
+    old_reviewer = pr["assigned_reviewers"][0]
+
+    reassign_resp = await api_client.post(
+        "/api/v1/pullRequest/reassign",
+        json={"pull_request_id": pr["pull_request_id"], "old_user_id": old_reviewer},
+    )
+    assert reassign_resp.status_code == 200
+    current = reassign_resp.json()["pr"]["assigned_reviewers"]
+
+    loads = {
+        str(user_id): open_reviews
+        for user_id, open_reviews in await ReviewerLoad.all().values_list("user_id", "open_reviews")
+    }
+    assert loads[old_reviewer] == 0
+    assert all(loads[rid] == 1 for rid in current)
+
+    merge_resp = await api_client.post(
+        "/api/v1/pullRequest/merge", json={"pull_request_id": pr["pull_request_id"]}
+    )
+    assert merge_resp.status_code == 200
+    assert set(await ReviewerLoad.all().values_list("open_reviews", flat=True)) == {0}
+
+
+@pytest.mark.asyncio
+async def test_parallel_reassigns_keep_reviewers_consistent(api_client: AsyncClient):
+    if get_dialect(connections.get("default")) == SQLITE:
+        pytest.skip("SQLite сериализует запись, гонка воспроизводится только в PostgreSQL")
+
+    author_id = str(uuid.uuid4())
+    members = [{"user_id": author_id, "username": "stress-author", "is_active": True}]
+    members += [
+        {"user_id": str(uuid.uuid4()), "username": f"stress-{i}", "is_active": True}
+        for i in range(10)
+    ]
+    await create_team(api_client, "stress", members)
+    prs = [await create_pull_request(api_client, author_id, f"PR {i}") for i in range(4)]
+
+    requests = [
+        api_client.post(
+            "/api/v1/pullRequest/reassign",
+            json={"pull_request_id": pr["pull_request_id"], "old_user_id": reviewer_id},
+        )
+        for _ in range(5)
+        for pr in prs
+        for reviewer_id in pr["assigned_reviewers"]
+    ]
+    requests.append(
+        api_client.post(
+            "/api/v1/pullRequest/merge", json={"pull_request_id": prs[0]["pull_request_id"]}
+        )
+    )
+    responses = await asyncio.gather(*requests)
+    assert {resp.status_code for resp in responses} <= {200, 409}
+
+    open_reviews: dict[uuid.UUID, int] = {}
+    for pr in prs:
+        pr_id = uuid.UUID(pr["pull_request_id"])
+        reviewer_ids = await PullRequestReviewer.filter(pr_id=pr_id).values_list(
+            "reviewer_id", flat=True
+        )
+        assert len(reviewer_ids) == 2
+        assert len(set(reviewer_ids)) == 2
+        assert uuid.UUID(author_id) not in reviewer_ids
+        if pr is not prs[0]:
+            for reviewer_id in reviewer_ids:
+                open_reviews[reviewer_id] = open_reviews.get(reviewer_id, 0) + 1
+
+    loads = {load.user_id: load.open_reviews for load in await ReviewerLoad.all()}
+    assert {user_id: count for user_id, count in loads.items() if count} == open_reviews
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_lock_reviewer_loads_in_order(api_client: AsyncClient, monkeypatch):
+    if get_dialect(connections.get("default")) == SQLITE:
+        pytest.skip("SQLite сериализует запись, взаимоблокировки возможны только в PostgreSQL")
+
+    # Случайный порядок кандидатов: одни и те же счётчики обновляются в разном порядке
+    monkeypatch.setenv("REVIEWER_SELECTION_STRATEGY", "weighted_random")
+    get_settings.cache_clear()
+
+    member_ids = [str(uuid.uuid4()) for _ in range(6)]
+    await create_team(
+        api_client,
+        "deadlocks",
+        [
+            {"user_id": member_id, "username": f"lock-{i}", "is_active": True}
+            for i, member_id in enumerate(member_ids)
+        ],
+    )
+    for _ in range(8):
+        prs = [await create_pull_request(api_client, member_ids[i % 6], "Seed") for i in range(12)]
+        requests = [
+            api_client.post(
+                "/api/v1/pullRequest/create",
+                json={
+                    "pull_request_id": str(uuid.uuid4()),
+                    "pull_request_name": "Concurrent",
+                    "author_id": member_ids[i % 6],
+                },
+            )
+            for i in range(24)
+        ]
+        requests += [
+            api_client.post(
+                "/api/v1/pullRequest/merge", json={"pull_request_id": pr["pull_request_id"]}
+            )
+            for pr in prs[:6]
+        ]
+        requests += [
+            api_client.post(
+                "/api/v1/pullRequest/reassign",
+                json={"pull_request_id": pr["pull_request_id"], "old_user_id": reviewer_id},
+            )
+            for pr in prs[6:]
+            for reviewer_id in pr["assigned_reviewers"]
+        ]
+        responses = await asyncio.gather(*requests)
+        assert {resp.status_code for resp in responses} <= {200, 201, 409}
+
+    open_reviews: dict[uuid.UUID, int] = {}
+    for reviewer_id in await PullRequestReviewer.filter(pr_status="OPEN").values_list(
+        "reviewer_id", flat=True
+    ):
+        open_reviews[reviewer_id] = open_reviews.get(reviewer_id, 0) + 1
+    loads = {load.user_id: load.open_reviews for load in await ReviewerLoad.all()}
+    assert {user_id: count for user_id, count in loads.items() if count} == open_reviews
+
+
+@pytest.mark.asyncio
+async def test_batch_create_merge_and_reassign_report_per_item_results(api_client: AsyncClient):
+    member_ids = [str(uuid.uuid4()) for _ in range(5)]
+    await create_team(
+        api_client,
+        "batch",
+        [
+            {"user_id": user_id, "username": f"batch-{index}", "is_active": True}
+            for index, user_id in enumerate(member_ids)
+        ],
+    )
+    author_id = member_ids[0]
+    pr_ids = [str(uuid.uuid4()) for _ in range(4)]
+
+    create_resp = await api_client.post(
+        "/api/v1/pullRequest/batchCreate",
+        json={
+            "items": [
+                *(
+                    {"pull_request_id": pr_id, "pull_request_name": "Batch", "author_id": author_id}
+                    for pr_id in pr_ids
+                ),
+                {"pull_request_id": pr_ids[0], "pull_request_name": "Dup", "author_id": author_id},
+                {
+                    "pull_request_id": str(uuid.uuid4()),
+                    "pull_request_name": "Ghost",
+                    "author_id": str(uuid.uuid4()),
+                },
+            ]
+        },
+    )
+    assert create_resp.status_code == 200
+    created = create_resp.json()["results"]
+    assert [item["status_code"] for item in created] == [201, 201, 201, 201, 409, 404]
+    assert created[4]["error"]["code"] == "PR_EXISTS"
+    assert created[5]["error"]["code"] == "NOT_FOUND"
+    for item in created[:4]:
+        reviewers = item["pr"]["assigned_reviewers"]
+        assert len(reviewers) == 2
+        assert author_id not in reviewers
+        stored = await PullRequestReviewer.filter(pr_id=item["pull_request_id"]).values_list(
+            "reviewer_id", flat=True
+        )
+        assert {str(reviewer_id) for reviewer_id in stored} == set(reviewers)
+
+    # Пакет распределяется как последовательные вызовы: 8 назначений на 4 кандидатов по 2
+    loads = await ReviewerLoad.all().values_list("open_reviews", flat=True)
+    assert sorted(loads) == [2, 2, 2, 2]
+
+    merge_resp = await api_client.post(
+        "/api/v1/pullRequest/batchMerge",
+        json={"items": [{"pull_request_id": pr_ids[0]}, {"pull_request_id": str(uuid.uuid4())}]},
+    )
+    merged = merge_resp.json()["results"]
+    assert [item["status_code"] for item in merged] == [200, 404]
+    assert merged[0]["pr"]["status"] == "MERGED"
+    assert sum(await ReviewerLoad.all().values_list("open_reviews", flat=True)) == 6
+
+    old_reviewer = created[1]["pr"]["assigned_reviewers"][0]
+    reassign_resp = await api_client.post(
+        "/api/v1/pullRequest/batchReassign",
+        json={
+            "items": [
+                {"pull_request_id": pr_ids[1], "old_user_id": old_reviewer},
+                {
+                    "pull_request_id": pr_ids[0],
+                    "old_user_id": created[0]["pr"]["assigned_reviewers"][0],
+                },
+                {"pull_request_id": pr_ids[2], "old_user_id": author_id},
+            ]
+        },
+    )
+    reassigned = reassign_resp.json()["results"]
+    assert [item["status_code"] for item in reassigned] == [200, 409, 409]
+    assert reassigned[1]["error"]["code"] == "PR_MERGED"
+    assert reassigned[2]["error"]["code"] == "NOT_ASSIGNED"
+
+    new_reviewer = reassigned[0]["replaced_by"]
+    assert new_reviewer not in (old_reviewer, author_id)
+    stored = await PullRequestReviewer.filter(pr_id=pr_ids[1]).values_list("reviewer_id", flat=True)
+    assert {str(reviewer_id) for reviewer_id in stored} == set(
+        reassigned[0]["pr"]["assigned_reviewers"]
+    )
+    assert new_reviewer in reassigned[0]["pr"]["assigned_reviewers"]
+    assert sum(await ReviewerLoad.all().values_list("open_reviews", flat=True)) == 6
@@ -0,0 +1,161 @@
+import logging
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.middleware import QueryLogMiddleware
+from app.db.instrumentation import (
+    QueryBudgetExceededError,
+    QueryStats,
+    assert_max_queries,
+    normalize_sql,
+)
+from app.models.users import User
+from app.services.dto_cache import get_dto_cache
+from tests.conftest import create_pull_request, create_team
+
+
+def members(count: int) -> list[dict]:
+    user_ids = [str(uuid.uuid4()) for _ in range(count)]
+    return [
+        {"user_id": user_id, "username": f"user-{user_id}", "is_active": True}
+        for user_id in user_ids
+    ]
+
+
+@pytest.mark.asyncio
+async def test_pull_request_endpoints_stay_within_query_budget(api_client: AsyncClient):
+    team_members = members(5)
+    await create_team(api_client, "budget", team_members)
+    author_id = team_members[0]["user_id"]
+
+    # Счётчики статистики добавляют по одному запросу в каждую операцию
+    with assert_max_queries(4):
+        pr = await create_pull_request(api_client, author_id)
+
+    with assert_max_queries(12):
+        resp = await api_client.post(
+            "/api/v1/pullRequest/reassign",
+            json={
+                "pull_request_id": pr["pull_request_id"],
+                "old_user_id": pr["assigned_reviewers"][0],
+            },
+        )
+    assert resp.status_code == 200
+
+    with assert_max_queries(7):
+        resp = await api_client.post(
+            "/api/v1/pullRequest/merge", json={"pull_request_id": pr["pull_request_id"]}
+        )
+    assert resp.status_code == 200
+
+    with assert_max_queries(2):
+        resp = await api_client.get(
+            "/api/v1/users/getReview", params={"user_id": team_members[1]["user_id"]}
+        )
+    assert resp.status_code == 200
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [2, 50])
+async def test_team_and_user_endpoints_do_not_scale_queries_with_members(
+    api_client: AsyncClient, size: int
+):
+    for index in range(3):
+        await create_team(api_client, f"team-{index}", members(size))
+    get_dto_cache().clear()
+
+    with assert_max_queries(6):
+        resp = await api_client.post(
+            "/api/v1/team/add", json={"team_name": "fresh", "members": members(size)}
+        )
+    assert resp.status_code == 201
+
+    with assert_max_queries(3):
+        resp = await api_client.get("/api/v1/team/get", params={"team_name": "team-0"})
+    assert resp.status_code == 200
+
+    with assert_max_queries(2):
+        resp = await api_client.get("/api/v1/team", params={"limit": 10})
+    assert resp.status_code == 200
+
+    with assert_max_queries(1):
+        resp = await api_client.get("/api/v1/users", params={"limit": 100})
+    assert resp.status_code == 200
+
+    user_id = resp.json()["items"][0]["user_id"]
+    with assert_max_queries(5):
+        resp = await api_client.post(
+            "/api/v1/users/setIsActive", json={"user_id": user_id, "is_active": False}
+        )
+    assert resp.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_query_budget_reports_executed_statements(api_client: AsyncClient):
+    with pytest.raises(QueryBudgetExceededError, match="2 запросов к БД при лимите 1"):
+        with assert_max_queries(1):
+            await User.all()
+            await User.filter(is_active=False).count()
+
+
+def test_repeated_statements_are_grouped_by_shape():
+    stats = QueryStats(
+        statements=[
+            'SELECT "id" FROM "users" WHERE "id"=\'a\' LIMIT 1',
+            'SELECT "id" FROM "users"  WHERE "id"=\'b\' LIMIT 1',
+            'SELECT "id" FROM "users" WHERE "id"=$1 LIMIT $2',
+            'SELECT "id" FROM "users" WHERE "id" IN (?, ?, ?)',
+        ]
+    )
+
+    assert stats.repeated(3) == {'SELECT "id" FROM "users" WHERE "id"=? LIMIT ?': 3}
+    assert normalize_sql("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)") == (
+        "INSERT INTO t (a, b) VALUES (...)"
+    )
+
+
+@pytest.mark.asyncio
+async def test_query_log_middleware_warns_about_repeated_queries(api_client: AsyncClient, caplog):
+    async def endpoint(scope, receive, send) -> None:
+        for _ in range(3):
+            await User.filter(is_active=True).first()
+
+    middleware = QueryLogMiddleware(endpoint, repeat_threshold=3)
+    with caplog.at_level(logging.WARNING, logger="app.core.middleware"):
+        await middleware({"type": "http", "method": "GET", "path": "/n-plus-one"}, None, None)
+
+    assert any("Возможный N+1 в GET /n-plus-one" in record.message for record in caplog.records)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pull_requests", [2, 40])
+async def test_deactivation_reassigns_reviews_in_constant_queries(
+    api_client: AsyncClient, pull_requests: int
+):
+    team_members = members(4)
+    await create_team(api_client, "deactivation", team_members)
+    author_id = team_members[0]["user_id"]
+    reviewer_id = team_members[1]["user_id"]
+    for _ in range(pull_requests):
+        await create_pull_request(api_client, author_id)
+
+    with assert_max_queries(11):
+        resp = await api_client.post(
+            "/api/v1/users/setIsActive", json={"user_id": reviewer_id, "is_active": False}
+        )
+    assert resp.status_code == 200
+
+    resp = await api_client.get("/api/v1/users/getReview", params={"user_id": reviewer_id})
+    assert resp.json()["pull_requests"] == []
+    assert resp.json()["summary"]["open_reviews"] == 0
+
+    open_reviews = 0
+    for member in team_members[2:]:
+        resp = await api_client.get(
+            "/api/v1/users/getReview", params={"user_id": member["user_id"], "limit": 100}
+        )
+        assert len(resp.json()["pull_requests"]) == resp.json()["summary"]["open_reviews"]
+        open_reviews += resp.json()["summary"]["open_reviews"]
+    assert open_reviews == 2 * pull_requests
@@ -0,0 +1,184 @@
+import json
+import re
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from tortoise import connections
+from tortoise.transactions import in_transaction
+
+from app.db.sql import SQLITE, get_dialect
+from app.models.pull_request_reviewers import PullRequestReviewer
+from app.models.pull_requests import PRStatus, PullRequest
+from app.models.team_members import TeamMember
+from app.models.teams import Team
+from app.models.users import User
+from app.services.pull_requests.pull_requests_service import PullRequestService
+from app.services.pull_requests.schemas import PullRequestCreate, PullRequestReassign
+from app.services.teams.teams_service import TeamService
+from app.services.users.users_service import UserService
+
+TEAMS = 40
+TEAM_SIZE = 25
+PRS_PER_AUTHOR = 3
+
+INDEXED_TABLES = {
+    "users",
+    "teams",
+    "team_members",
+    "pull_requests",
+    "pull_request_reviewers",
+    "reviewer_loads",
+}
+TABLE_REF_RE = re.compile(r'(?:FROM|JOIN|UPDATE|INTO)\s+"?(\w+)"?(?:\s+(?:AS\s+)?"?(\w+)"?)?', re.I)
+SQL_KEYWORDS = {"where", "on", "join", "left", "inner", "set", "values", "group", "order", "limit"}
+
+
+async def seed_dataset() -> tuple[list[Team], list[list[User]]]:
+    teams = [Team(name=f"plan-team-{i}") for i in range(TEAMS)]
+    await Team.bulk_create(teams)
+
+    members: list[list[User]] = []
+    for team in teams:
+        users = [User(username=f"plan-{uuid.uuid4().hex}") for _ in range(TEAM_SIZE)]
+        await User.bulk_create(users)
+        await TeamMember.bulk_create([TeamMember(team_id=team.id, user_id=u.id) for u in users])
+        members.append(users)
+
+    for users in members:
+        prs = [
+            PullRequest(title="seed", author_id=author.id, status=PRStatus.MERGED)
+            for author in users
+            for _ in range(PRS_PER_AUTHOR)
+        ]
+        await PullRequest.bulk_create(prs)
+        await PullRequestReviewer.bulk_create(
+            [
+                PullRequestReviewer(
+                    pr_id=pr.id,
+                    reviewer_id=users[(i + 1) % TEAM_SIZE].id,
+                    pr_status=PRStatus.MERGED,
+                )
+                for i, pr in enumerate(prs)
+            ]
+        )
+
+    conn = connections.get("default")
+    await conn.execute_script("ANALYZE")
+    return teams, members
+
+
+@pytest.fixture()
+def captured_queries(monkeypatch):
+    queries: list[tuple[str, list]] = []
+    client_class = type(connections.get("default"))
+    original = client_class.execute_query
+
+    async def execute_query(self, query, values=None):
+        if not query.startswith("EXPLAIN"):
+            queries.append((query, list(values or [])))
+        return await original(self, query, values)
+
+    monkeypatch.setattr(client_class, "execute_query", execute_query)
+    return queries
+
+
+def table_aliases(sql: str) -> dict[str, str]:
+    aliases = {}
+    for table, alias in TABLE_REF_RE.findall(sql):
+        if table not in INDEXED_TABLES:
+            continue
+        aliases[table] = table
+        if alias and alias.lower() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+async def sequential_scans(sql: str, values: list) -> list[str]:
+    conn = connections.get("default")
+    aliases = table_aliases(sql)
+
+    if get_dialect(conn) == SQLITE:
+        _, rows = await conn.execute_query(f"EXPLAIN QUERY PLAN {sql}", values)
+        scans = []
+        for row in rows:
+            match = re.fullmatch(r"SCAN (\w+)", row["detail"])
+            if match and match[1] in aliases:
+                scans.append(aliases[match[1]])
+        return scans
+
+    # На маленьких таблицах Postgres законно выбирает Seq Scan и hash/merge join,
+    # поэтому запрещаем их и проверяем, есть ли для запроса индексный план.
+    async with in_transaction() as tx:
+        await tx.execute_script(
+            "SET LOCAL enable_seqscan = off;"
+            "SET LOCAL enable_hashjoin = off;"
+            "SET LOCAL enable_mergejoin = off;"
+        )
+        _, rows = await tx.execute_query(f"EXPLAIN (FORMAT JSON) {sql}", values)
+    plan = rows[0]["QUERY PLAN"]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scans = []
+    stack = [(plan[0]["Plan"], False)]
+    while stack:
+        node, limited = stack.pop()
+        # Обход индекса по порядку под LIMIT (первая страница keyset-пагинации) допустим
+        full_index_scan = (
+            node["Node Type"] in ("Index Scan", "Index Only Scan")
+            and "Index Cond" not in node
+            and not limited
+        )
+        if node["Node Type"] == "Seq Scan" or full_index_scan:
+            if node.get("Relation Name") in INDEXED_TABLES:
+                scans.append(node["Relation Name"])
+        limited = limited or node["Node Type"] == "Limit"
+        stack.extend((child, limited) for child in node.get("Plans", []))
+    return scans
+
+
+@pytest.mark.asyncio
+async def test_hot_service_queries_use_indexes(api_client: AsyncClient, captured_queries):
+    teams, members = await seed_dataset()
+    captured_queries.clear()
+
+    author = members[0][0]
+    pr_id = uuid.uuid4()
+    created = await PullRequestService.create_pull_request(
+        PullRequestCreate(pull_request_id=pr_id, pull_request_name="Plan", author_id=author.id)
+    )
+    await PullRequestService.reassign_pull_request(
+        pr_id,
+        PullRequestReassign(pull_request_id=pr_id, old_user_id=created.assigned_reviewers[0]),
+    )
+    merged = await PullRequestService.merge_pull_request(pr_id)
+    await PullRequestService.to_dto(merged)
+
+    reviewer_id = members[1][1].id
+    await PullRequestService.get_reviewer_summary(reviewer_id)
+    _, cursor = await PullRequestService.get_pull_requests_for_reviewer(reviewer_id, limit=1)
+    await PullRequestService.get_pull_requests_for_reviewer(reviewer_id, limit=1, cursor=cursor)
+    await PullRequestService.get_pull_requests_for_reviewer(
+        reviewer_id, status=PRStatus.MERGED, limit=1, cursor=cursor
+    )
+
+    team = await TeamService.get_team_by_name(teams[1].name)
+    await TeamService.to_dto(team)
+    user = await UserService.get_user(members[2][3].id)
+    await UserService.to_dto(user)
+
+    _, cursor = await UserService.get_users_page(50)
+    await UserService.get_users_page(50, cursor)
+    teams_page, cursor = await TeamService.get_teams_page(10)
+    await TeamService.to_dtos(teams_page)
+    await TeamService.get_teams_page(10, cursor)
+
+    assert captured_queries
+    offenders = {}
+    for sql, values in list(captured_queries):
+        scans = await sequential_scans(sql, values)
+        if scans:
+            offenders[" ".join(sql.split())] = scans
+
+    assert offenders == {}
@@ -0,0 +1,110 @@
+import time
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from tortoise import connections
+from tortoise.exceptions import DBConnectionError
+from tortoise.utils import get_schema_sql
+
+from app.core.middleware import READ_YOUR_WRITES_COOKIE, READ_YOUR_WRITES_HEADER
+from app.db.sql import SQLITE, get_dialect
+from app.main import create_app
+
+
+@pytest.fixture()
+def replica_env(monkeypatch):
+    # Вторая in-memory база изображает реплику, которая ещё не получила изменения
+    monkeypatch.setenv("DB_REPLICA_DSNS", "sqlite://:memory:")
+    monkeypatch.setenv("DB_READ_YOUR_WRITES_SECONDS", "60")
+
+
+@pytest_asyncio.fixture()
+async def replica_client(replica_env, api_client: AsyncClient):
+    if get_dialect(connections.get("default")) != SQLITE:
+        pytest.skip("Схема реплики строится по primary, нужен один диалект")
+
+    # Модели привязаны к default, поэтому схему реплики строим по primary
+    schema = get_schema_sql(connections.get("default"), safe=True)
+    await connections.get("replica_0").execute_script(schema)
+    return api_client
+
+
+def written_until(resp) -> dict[str, str]:
+    return {"Cookie": f"{READ_YOUR_WRITES_COOKIE}={resp.cookies[READ_YOUR_WRITES_COOKIE]}"}
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_except_for_recent_writer(replica_client: AsyncClient):
+    created = await replica_client.post("/api/v1/users", json={"username": "alice"})
+    assert created.status_code == 201
+    writer = written_until(created)
+    # Клиент без cookie изображает другого пользователя
+    replica_client.cookies.clear()
+
+    reader_page = await replica_client.get("/api/v1/users")
+    assert reader_page.status_code == 200
+    assert reader_page.json()["items"] == []
+
+    writer_page = await replica_client.get("/api/v1/users", headers=writer)
+    assert [user["username"] for user in writer_page.json()["items"]] == ["alice"]
+
+    until = created.headers[READ_YOUR_WRITES_HEADER]
+    header_page = await replica_client.get(
+        "/api/v1/users", headers={READ_YOUR_WRITES_HEADER: until}
+    )
+    assert [user["username"] for user in header_page.json()["items"]] == ["alice"]
+
+    expired = {READ_YOUR_WRITES_HEADER: str(time.time() - 1)}
+    expired_page = await replica_client.get("/api/v1/users", headers=expired)
+    assert expired_page.json()["items"] == []
+
+    # Кэшируемые DTO всегда грузятся из primary
+    user_resp = await replica_client.get(f"/api/v1/users/{created.json()['user_id']}")
+    assert user_resp.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_holds_across_workers(replica_client: AsyncClient):
+    created = await replica_client.post("/api/v1/users", json={"username": "dave"})
+    assert created.status_code == 201
+
+    # Второй экземпляр приложения со своим middleware изображает другой воркер
+    transport = ASGITransport(app=create_app())
+    async with AsyncClient(transport=transport, base_url="http://test") as other_worker:
+        page = await other_worker.get("/api/v1/users", headers=written_until(created))
+        assert [user["username"] for user in page.json()["items"]] == ["dave"]
+
+        page = await other_worker.get("/api/v1/users")
+        assert page.json()["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_reads_fail_over_to_primary(replica_client: AsyncClient, monkeypatch):
+    await replica_client.post("/api/v1/users", json={"username": "bob"})
+    replica_client.cookies.clear()
+
+    async def unavailable(*args, **kwargs):
+        raise DBConnectionError("replica is down")
+
+    replica = connections.get("replica_0")
+    with monkeypatch.context() as patch:
+        patch.setattr(replica, "execute_query", unavailable)
+        patch.setattr(replica, "execute_query_dict", unavailable)
+
+        page = await replica_client.get("/api/v1/users")
+        assert page.status_code == 200
+        assert [user["username"] for user in page.json()["items"]] == ["bob"]
+
+        ready = await replica_client.get("/api/v1/health/ready")
+        assert ready.status_code == 200
+        assert ready.json()["status"] == "degraded"
+        assert ready.json()["dependencies"]["replica_0"] == "unavailable"
+
+    ready = await replica_client.get("/api/v1/health/ready")
+    assert ready.json() == {
+        "status": "ready",
+        "dependencies": {"database": "ready", "replica_0": "ready"},
+    }
+    page = await replica_client.get("/api/v1/users")
+    assert page.json()["items"] == []
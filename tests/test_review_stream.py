@@ -0,0 +1,116 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from app.common.pagination import Cursor
+from app.core.config import get_settings
+from app.services.review_stream.review_stream_service import (
+    ReviewStreamService,
+    get_review_broker,
+    handle_review_message,
+)
+from tests.conftest import create_pull_request, create_team
+
+
+def parse_frame(frame: bytes) -> dict[str, str]:
+    fields = {}
+    for line in frame.decode().strip().splitlines():
+        name, _, value = line.partition(": ")
+        fields[name] = value
+    return fields
+
+
+async def next_frame(stream) -> bytes:
+    return await asyncio.wait_for(anext(stream), 5.0)
+
+
+@pytest.mark.asyncio
+async def test_stream_pushes_assignments_and_resumes_from_event_id(api_client: AsyncClient):
+    author, reviewer, other = (str(uuid.uuid4()) for _ in range(3))
+    await create_team(api_client, "stream", [author, reviewer, other])
+
+    stream = ReviewStreamService.stream(uuid.UUID(reviewer), None)
+    assert await next_frame(stream) == b"retry: 3000\n\n"
+
+    first = await create_pull_request(api_client, author)
+    frame = parse_frame(await next_frame(stream))
+    await stream.aclose()
+
+    assert frame["event"] == "review.assigned"
+    event = json.loads(frame["data"])
+    assert event["pull_request"]["pull_request_id"] == first["pull_request_id"]
+    assert Cursor.decode(frame["id"]).id == uuid.UUID(event["assignment_id"])
+
+    # Переподключение с Last-Event-ID не повторяет доставленное
+    second = await create_pull_request(api_client, author)
+    resumed = ReviewStreamService.stream(uuid.UUID(reviewer), Cursor.decode(frame["id"]))
+    await next_frame(resumed)
+    event = json.loads(parse_frame(await next_frame(resumed))["data"])
+    await resumed.aclose()
+
+    assert event["pull_request"]["pull_request_id"] == second["pull_request_id"]
+    assert get_review_broker().stats().subscribers == 0
+
+
+@pytest.mark.asyncio
+async def test_reassignment_is_pushed_to_new_reviewer(api_client: AsyncClient):
+    members = [str(uuid.uuid4()) for _ in range(4)]
+    await create_team(api_client, "stream", members)
+    pr = await create_pull_request(api_client, members[0])
+    (replacement,) = set(members[1:]) - set(pr["assigned_reviewers"])
+
+    stream = ReviewStreamService.stream(uuid.UUID(replacement), None)
+    await next_frame(stream)
+    resp = await api_client.post(
+        "/api/v1/pullRequest/reassign",
+        json={"pull_request_id": pr["pull_request_id"], "old_user_id": pr["assigned_reviewers"][0]},
+    )
+    assert resp.json()["replaced_by"] == replacement
+
+    event = json.loads(parse_frame(await next_frame(stream))["data"])
+    await stream.aclose()
+    assert event["pull_request"]["pull_request_id"] == pr["pull_request_id"]
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_overflow_and_heartbeat(api_client: AsyncClient, monkeypatch):
+    monkeypatch.setenv("REVIEW_STREAM_QUEUE_SIZE", "1")
+    monkeypatch.setenv("REVIEW_STREAM_HEARTBEAT_SECONDS", "0.01")
+    get_settings.cache_clear()
+    get_review_broker.cache_clear()
+
+    author, reviewer, other = (str(uuid.uuid4()) for _ in range(3))
+    await create_team(api_client, "stream", [author, reviewer, other])
+    stream = ReviewStreamService.stream(uuid.UUID(reviewer), None)
+    await next_frame(stream)
+
+    # Поток не читается, пока создаются PR: лишние сигналы отбрасываются, а не копятся
+    prs = [await create_pull_request(api_client, author) for _ in range(3)]
+    assert get_review_broker().stats().dropped == 2
+
+    received = [json.loads(parse_frame(await next_frame(stream))["data"]) for _ in prs]
+    assert [event["pull_request"]["pull_request_id"] for event in received] == [
+        pr["pull_request_id"] for pr in prs
+    ]
+
+    assert await next_frame(stream) == b": heartbeat\n\n"
+    # Сигнал из другого воркера приходит через LISTEN и будит поток без событий
+    handle_review_message(reviewer)
+    assert await next_frame(stream) == b": heartbeat\n\n"
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_validates_user_and_event_id(api_client: AsyncClient):
+    missing = await api_client.get(f"/api/v1/users/{uuid.uuid4()}/reviews/stream")
+    assert missing.status_code == 404
+
+    user = await api_client.post("/api/v1/users", json={"username": "streamer"})
+    bad_cursor = await api_client.get(
+        f"/api/v1/users/{user.json()['user_id']}/reviews/stream",
+        headers={"Last-Event-ID": "not-a-cursor"},
+    )
+    assert bad_cursor.status_code == 400
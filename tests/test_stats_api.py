@@ -0,0 +1,142 @@
+import asyncio
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from tortoise import connections
+
+from app.db.instrumentation import assert_max_queries
+from app.services.stats import stats_service
+from app.services.stats.stats_service import StatsService
+from tests.conftest import create_pull_request, create_team
+
+
+def pull_request(author_id: str) -> dict:
+    return {
+        "pull_request_id": str(uuid.uuid4()),
+        "pull_request_name": "Stats",
+        "author_id": author_id,
+    }
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_pull_request_lifecycle(api_client: AsyncClient):
+    members = [str(uuid.uuid4()) for _ in range(4)]
+    team_id = await create_team(api_client, "stats", members)
+    author = members[0]
+
+    first = await create_pull_request(api_client, author)
+    second = await create_pull_request(api_client, author)
+    await api_client.post(
+        "/api/v1/pullRequest/merge", json={"pull_request_id": first["pull_request_id"]}
+    )
+    reassign = await api_client.post(
+        "/api/v1/pullRequest/reassign",
+        json={
+            "pull_request_id": second["pull_request_id"],
+            "old_user_id": second["assigned_reviewers"][0],
+        },
+    )
+    assert reassign.status_code == 200
+
+    with assert_max_queries(2):
+        stats = (await api_client.get("/api/v1/stats")).json()
+    assert stats["pull_requests"] == {"open": 1, "merged": 1, "merged_ratio": 0.5}
+    assert stats["reviews"] == {"open": 2, "total": 4}
+    assert sum(bucket["users"] for bucket in stats["load_distribution"]) == 4
+    assert sum(b["open_reviews"] * b["users"] for b in stats["load_distribution"]) == 2
+
+    team = (await api_client.get(f"/api/v1/stats/teams/{team_id}")).json()
+    assert team["pull_requests"] == stats["pull_requests"]
+    assert team["reviews"] == stats["reviews"]
+
+    replaced_by = reassign.json()["replaced_by"]
+    user = (await api_client.get(f"/api/v1/stats/users/{replaced_by}")).json()
+    assert user["reviews"]["open"] >= 1
+    author_stats = (await api_client.get(f"/api/v1/stats/users/{author}")).json()
+    assert author_stats["pull_requests"]["open"] == 1
+    assert author_stats["reviews"] == {"open": 0, "total": 0}
+
+    pr_stats = await api_client.get(f"/api/v1/stats/pullRequests/{second['pull_request_id']}")
+    assert pr_stats.json()["reviewers"] == 2
+
+    # Инкрементальные счётчики совпадают с пересчётом с нуля
+    assert await StatsService.reconcile() == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_and_deactivation_paths_keep_counters_exact(api_client: AsyncClient):
+    members = [str(uuid.uuid4()) for _ in range(5)]
+    await create_team(api_client, "batch-stats", members)
+
+    created = await api_client.post(
+        "/api/v1/pullRequest/batchCreate",
+        json={"items": [pull_request(members[index % 2]) for index in range(6)]},
+    )
+    prs = [result["pr"] for result in created.json()["results"]]
+    await api_client.post(
+        "/api/v1/pullRequest/batchMerge",
+        json={"items": [{"pull_request_id": pr["pull_request_id"]} for pr in prs[:2]]},
+    )
+    await api_client.post(
+        "/api/v1/pullRequest/batchReassign",
+        json={
+            "items": [
+                {
+                    "pull_request_id": pr["pull_request_id"],
+                    "old_user_id": pr["assigned_reviewers"][0],
+                }
+                for pr in prs[2:4]
+            ]
+        },
+    )
+    await api_client.post(
+        "/api/v1/users/setIsActive", json={"user_id": members[4], "is_active": False}
+    )
+
+    assert await StatsService.reconcile() == 0
+    stats = (await api_client.get("/api/v1/stats")).json()
+    assert stats["pull_requests"]["merged"] == 2
+
+
+@pytest.mark.asyncio
+async def test_reconcile_fixes_drift(api_client: AsyncClient):
+    members = [str(uuid.uuid4()) for _ in range(3)]
+    await create_team(api_client, "drift", members)
+    await create_pull_request(api_client, members[0])
+
+    await connections.get("default").execute_query("UPDATE stat_counters SET value = value + 5")
+    drifted = (await api_client.get("/api/v1/stats")).json()
+    assert drifted["pull_requests"]["open"] > 1
+
+    assert await StatsService.reconcile() > 0
+    stats = (await api_client.get("/api/v1/stats")).json()
+    assert stats["pull_requests"] == {"open": 1, "merged": 0, "merged_ratio": 0.0}
+    assert stats["reviews"] == {"open": 2, "total": 2}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_in_batches_alongside_writes(api_client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(stats_service, "RECONCILE_BATCH_SIZE", 2)
+    members = [str(uuid.uuid4()) for _ in range(5)]
+    team_id = await create_team(api_client, "reconcile-batches", members)
+    await connections.get("default").execute_query("DELETE FROM stat_counters")
+
+    # Пересчёт идёт пачками по два субъекта, пока параллельно создаются PR
+    results = await asyncio.gather(
+        StatsService.reconcile(),
+        *(create_pull_request(api_client, members[index % 5]) for index in range(6)),
+    )
+    assert results[0] >= 0
+
+    assert await StatsService.reconcile() == 0
+    team = (await api_client.get(f"/api/v1/stats/teams/{team_id}")).json()
+    assert team["pull_requests"]["open"] == 6
+    assert team["reviews"] == {"open": 12, "total": 12}
+
+
+@pytest.mark.asyncio
+async def test_stats_not_found(api_client: AsyncClient):
+    for path in ("teams", "users", "pullRequests"):
+        resp = await api_client.get(f"/api/v1/stats/{path}/{uuid.uuid4()}")
+        assert resp.status_code == 404
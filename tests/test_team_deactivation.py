@@ -0,0 +1,116 @@
+import uuid
+from collections import Counter
+
+import pytest
+from httpx import AsyncClient
+
+from app.db.instrumentation import assert_max_queries
+from app.services.stats.stats_service import StatsService
+from app.services.teams.schemas import TeamDeactivationResult
+from benchmarks.bench_team_deactivation import QUERY_BUDGET, budget_violations, deactivate, seed
+from tests.conftest import create_pull_request, create_team
+
+
+@pytest.mark.asyncio
+async def test_team_deactivation_moves_reviews_to_author_teams(api_client: AsyncClient):
+    core = [str(uuid.uuid4()) for _ in range(4)]
+    platform = [str(uuid.uuid4()) for _ in range(3)]
+    core_id = await create_team(api_client, "core", core)
+    platform_id = await create_team(api_client, "platform", platform)
+
+    author = core[0]
+    prs = []
+    for _ in range(3):
+        resp = await api_client.post(
+            "/api/v1/pullRequest/create",
+            json={
+                "pull_request_id": str(uuid.uuid4()),
+                "pull_request_name": "Offboarding",
+                "author_id": author,
+            },
+        )
+        prs.append(resp.json()["pr"])
+    # Автор переходит в другую команду, его PR остаются на ревью у прежней
+    resp = await api_client.delete(f"/api/v1/team/{core_id}/members/{author}")
+    assert resp.status_code == 204
+    resp = await api_client.post(f"/api/v1/team/{platform_id}/members", json={"user_ids": [author]})
+    assert resp.status_code == 200
+    # Счётчики команд после перехода автора выравниваются пересчётом
+    await StatsService.reconcile()
+
+    resp = await api_client.post(f"/api/v1/team/{core_id}/deactivate")
+    assert resp.status_code == 200
+    result = resp.json()
+    TeamDeactivationResult.model_validate(result)
+    assert result["team_name"] == "core"
+    assert result["deactivated_users"] == 3
+    assert result["reassigned"] == 6
+    assert result["unassigned"] == 0
+    assert {item["pull_request_id"] for item in result["pull_requests"]} == {
+        pr["pull_request_id"] for pr in prs
+    }
+
+    new_reviewers = Counter()
+    for item in result["pull_requests"]:
+        for replacement in item["replacements"]:
+            assert replacement["old_reviewer_id"] in core[1:]
+            assert replacement["new_reviewer_id"] in platform
+            new_reviewers[replacement["new_reviewer_id"]] += 1
+    # Кандидат получает следующее ревью, только когда очередь дошла до остальных
+    assert sorted(new_reviewers.values()) == [2, 2, 2]
+
+    team = (await api_client.get("/api/v1/team/get", params={"team_name": "core"})).json()
+    assert [member["is_active"] for member in team["members"]] == [False] * 3
+    for reviewer_id in core[1:]:
+        resp = await api_client.get("/api/v1/users/getReview", params={"user_id": reviewer_id})
+        assert resp.json()["pull_requests"] == []
+    assert await StatsService.reconcile() == 0
+
+    # Повторная деактивация ничего не меняет
+    resp = await api_client.post("/api/v1/team/deactivate", json={"team_name": "core"})
+    assert resp.json()["deactivated_users"] == 0
+    assert resp.json()["pull_requests"] == []
+
+
+@pytest.mark.asyncio
+async def test_team_deactivation_not_found(api_client: AsyncClient):
+    resp = await api_client.post(f"/api/v1/team/{uuid.uuid4()}/deactivate")
+    assert resp.status_code == 404
+    resp = await api_client.post("/api/v1/team/deactivate", json={"team_name": "missing"})
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pull_requests", [2, 40])
+async def test_team_deactivation_does_not_scale_queries_with_reviews(
+    api_client: AsyncClient, pull_requests: int
+):
+    leaving = [str(uuid.uuid4()) for _ in range(5)]
+    staying = [str(uuid.uuid4()) for _ in range(3)]
+    leaving_id = await create_team(api_client, "leaving", leaving)
+    staying_id = await create_team(api_client, "staying", staying)
+    author_id = leaving[0]
+    for _ in range(pull_requests):
+        await create_pull_request(api_client, author_id)
+    resp = await api_client.delete(f"/api/v1/team/{leaving_id}/members/{author_id}")
+    assert resp.status_code == 204
+    resp = await api_client.post(
+        f"/api/v1/team/{staying_id}/members", json={"user_ids": [author_id]}
+    )
+    assert resp.status_code == 200
+
+    with assert_max_queries(QUERY_BUDGET):
+        resp = await api_client.post(f"/api/v1/team/{leaving_id}/deactivate")
+    assert resp.status_code == 200
+    assert resp.json()["reassigned"] == 2 * pull_requests
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_team_deactivation_stays_within_budget(api_client: AsyncClient):
+    team_id = await seed(api_client)
+
+    resp, elapsed, queries = await deactivate(api_client, team_id)
+
+    assert resp.json()["unassigned"] == 0
+    assert budget_violations(elapsed, queries) == []
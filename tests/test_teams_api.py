@@ -1,7 +1,9 @@
+import json
 import uuid
 
 import pytest
 from httpx import AsyncClient
+from tortoise import connections
 
 from app.models.teams import Team
 
@@ -76,3 +78,143 @@ async def test_delete_unknown_team_member_returns_not_found(api_client: AsyncCli
 
     assert delete_resp.status_code == 404
     assert delete_resp.json()["error"]["code"] == "NOT_FOUND"
+
+
+@pytest.mark.asyncio
+async def test_list_teams_paginates_and_streams(api_client: AsyncClient):
+    names = {f"team-{i}" for i in range(3)}
+    for name in sorted(names):
+        payload = {
+            "team_name": name,
+            "members": [{"user_id": str(uuid.uuid4()), "username": f"{name}-u", "is_active": True}],
+        }
+        assert (await api_client.post("/api/v1/team/add", json=payload)).status_code == 201
+
+    first = (await api_client.get("/api/v1/team", params={"limit": 2})).json()
+    assert len(first["items"]) == 2
+    assert first["next_cursor"]
+
+    second = (
+        await api_client.get("/api/v1/team", params={"limit": 2, "cursor": first["next_cursor"]})
+    ).json()
+    assert second["next_cursor"] is None
+    assert {t["team_name"] for t in first["items"] + second["items"]} == names
+
+    stream_resp = await api_client.get("/api/v1/team", params={"format": "ndjson"})
+    teams = [json.loads(line) for line in stream_resp.text.splitlines()]
+    assert {t["team_name"] for t in teams} == names
+    assert all(len(t["members"]) == 1 for t in teams)
+
+
+@pytest.mark.asyncio
+async def test_cached_team_reflects_member_changes(api_client: AsyncClient):
+    alice_id = str(uuid.uuid4())
+    payload = {
+        "team_name": "cached",
+        "members": [{"user_id": alice_id, "username": "alice", "is_active": True}],
+    }
+    assert (await api_client.post("/api/v1/team/add", json=payload)).status_code == 201
+
+    first = await api_client.get("/api/v1/team/get", params={"team_name": "cached"})
+    assert first.json()["members"][0]["is_active"] is True
+
+    resp = await api_client.post(
+        "/api/v1/users/setIsActive", json={"user_id": alice_id, "is_active": False}
+    )
+    assert resp.status_code == 200
+
+    second = await api_client.get("/api/v1/team/get", params={"team_name": "cached"})
+    assert second.json()["members"][0]["is_active"] is False
+
+    team = await Team.filter(name="cached").first()
+    resp = await api_client.delete(f"/api/v1/team/{team.id}/members/{alice_id}")
+    assert resp.status_code == 204
+
+    third = await api_client.get("/api/v1/team/get", params={"team_name": "cached"})
+    assert third.json()["members"] == []
+
+    stats = (await api_client.get("/api/v1/health/cache")).json()
+    assert stats["teams"]["hits"] == 0
+    assert stats["teams"]["invalidations"] >= 2
+
+
+def team_payload(name: str, size: int) -> dict:
+    return {
+        "team_name": name,
+        "members": [
+            {"user_id": str(uuid.uuid4()), "username": f"{name}-{i}", "is_active": True}
+            for i in range(size)
+        ],
+    }
+
+
+@pytest.mark.asyncio
+async def test_team_add_query_count_does_not_grow_with_members(
+    api_client: AsyncClient, monkeypatch
+):
+    client_class = type(connections.get("default"))
+    queries = []
+    for method in ("execute_query", "execute_insert", "execute_many"):
+        original = getattr(client_class, method)
+
+        async def record(self, query, values=None, _original=original):
+            queries.append(query)
+            return await _original(self, query, values)
+
+        monkeypatch.setattr(client_class, method, record)
+
+    counts = []
+    for name, size in (("small", 5), ("large", 500)):
+        queries.clear()
+        resp = await api_client.post("/api/v1/team/add", json=team_payload(name, size))
+        assert resp.status_code == 201
+        assert len(resp.json()["team"]["members"]) == size
+        counts.append(len(queries))
+
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.asyncio
+async def test_team_import_syncs_memberships(api_client: AsyncClient):
+    existing = team_payload("payments", 2)
+    assert (await api_client.post("/api/v1/team/add", json=existing)).status_code == 201
+    other = team_payload("search", 1)
+    assert (await api_client.post("/api/v1/team/add", json=other)).status_code == 201
+    await api_client.get("/api/v1/team/get", params={"team_name": "search"})
+
+    moved = other["members"][0]
+    kept = existing["members"][0] | {"username": "payments-renamed"}
+    fresh = team_payload("growth", 3)
+    body = "\n".join(
+        json.dumps(team)
+        for team in (
+            {"team_name": "payments", "members": [kept, moved]},
+            fresh,
+        )
+    )
+
+    resp = await api_client.post(
+        "/api/v1/team/import",
+        content=body.encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"teams": 2, "teams_created": 1, "members": 5}
+
+    payments = (await api_client.get("/api/v1/team/get", params={"team_name": "payments"})).json()
+    assert {m["username"] for m in payments["members"]} == {"payments-renamed", moved["username"]}
+    search = (await api_client.get("/api/v1/team/get", params={"team_name": "search"})).json()
+    assert search["members"] == []
+    growth = (await api_client.get("/api/v1/team/get", params={"team_name": "growth"})).json()
+    assert len(growth["members"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_team_import_rejects_invalid_line(api_client: AsyncClient):
+    body = json.dumps(team_payload("valid", 1)) + '\n{"team_name": "x"}\n'
+    resp = await api_client.post("/api/v1/team/import", content=body.encode())
+
+    assert resp.status_code == 400
+    assert resp.json()["error"]["code"] == "INVALID_NDJSON"
+    assert resp.json()["error"]["extra"]["line"] == 2
+    assert await Team.filter(name="valid").count() == 0
@@ -1,6 +1,17 @@
+import asyncio
+import json
+import uuid
+
 import pytest
 from httpx import AsyncClient
 
+from app.common.pagination import DEFAULT_PAGE_SIZE
+from app.core.config import get_settings
+from app.models.pull_request_reviewers import PullRequestReviewer
+from app.models.reviewer_loads import ReviewerLoad
+from app.services.users.users_service import get_activity_buffer
+from tests.conftest import create_pull_request
+
 
 @pytest.mark.asyncio
 async def test_create_user_and_toggle_active(api_client: AsyncClient):
@@ -43,3 +54,285 @@ async def test_get_reviews_for_user_without_assignments_returns_empty(api_client
     body = reviews_resp.json()
     assert body["user_id"] == user_id
     assert body["pull_requests"] == []
+
+
+@pytest.mark.asyncio
+async def test_list_users_paginates_with_cursor(api_client: AsyncClient):
+    created = set()
+    for i in range(5):
+        resp = await api_client.post("/api/v1/users", json={"username": f"paged-{i}"})
+        created.add(resp.json()["user_id"])
+
+    seen: list[str] = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        resp = await api_client.get("/api/v1/users", params=params)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert len(body["items"]) <= 2
+        seen.extend(item["user_id"] for item in body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen))
+    assert set(seen) == created
+
+
+@pytest.mark.asyncio
+async def test_list_users_rejects_invalid_cursor(api_client: AsyncClient):
+    resp = await api_client.get("/api/v1/users", params={"cursor": "not-a-cursor"})
+    assert resp.status_code == 400
+    assert resp.json()["error"]["code"] == "INVALID_CURSOR"
+
+
+@pytest.mark.asyncio
+async def test_list_users_streams_ndjson(api_client: AsyncClient):
+    for i in range(3):
+        await api_client.post("/api/v1/users", json={"username": f"streamed-{i}"})
+
+    resp = await api_client.get("/api/v1/users", params={"format": "ndjson"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert {line["username"] for line in lines} == {f"streamed-{i}" for i in range(3)}
+
+
+@pytest.mark.asyncio
+async def test_get_reviews_filters_by_status_and_paginates(api_client: AsyncClient):
+    author_id, reviewer_id, other_id = (str(uuid.uuid4()) for _ in range(3))
+    team_resp = await api_client.post(
+        "/api/v1/team/add",
+        json={
+            "team_name": "review-queue",
+            "members": [
+                {"user_id": author_id, "username": "queue-author", "is_active": True},
+                {"user_id": reviewer_id, "username": "queue-reviewer", "is_active": True},
+                {"user_id": other_id, "username": "queue-other", "is_active": True},
+            ],
+        },
+    )
+    assert team_resp.status_code == 201
+
+    pr_ids = [str(uuid.uuid4()) for _ in range(5)]
+    for index, pr_id in enumerate(pr_ids):
+        resp = await api_client.post(
+            "/api/v1/pullRequest/create",
+            json={
+                "pull_request_id": pr_id,
+                "pull_request_name": f"PR {index}",
+                "author_id": author_id,
+            },
+        )
+        assert resp.status_code == 201
+    for pr_id in pr_ids[:2]:
+        resp = await api_client.post("/api/v1/pullRequest/merge", json={"pull_request_id": pr_id})
+        assert resp.status_code == 200
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params = {"user_id": reviewer_id, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        resp = await api_client.get("/api/v1/users/getReview", params=params)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert len(body["pull_requests"]) <= 2
+        seen.extend(pr["pull_request_id"] for pr in body["pull_requests"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == pr_ids
+    assert body["summary"]["open_reviews"] == 3
+    assert body["summary"]["last_assigned_at"] is not None
+
+    for status, expected in (("OPEN", pr_ids[2:]), ("MERGED", pr_ids[:2])):
+        resp = await api_client.get(
+            "/api/v1/users/getReview", params={"user_id": reviewer_id, "status": status}
+        )
+        assert resp.status_code == 200
+        prs = resp.json()["pull_requests"]
+        assert [pr["pull_request_id"] for pr in prs] == expected
+        assert {pr["status"] for pr in prs} == {status}
+
+
+@pytest.mark.asyncio
+async def test_get_reviews_without_limit_returns_all_reviews(api_client: AsyncClient):
+    author_id, reviewer_id = str(uuid.uuid4()), str(uuid.uuid4())
+    team_resp = await api_client.post(
+        "/api/v1/team/add",
+        json={
+            "team_name": "legacy-clients",
+            "members": [
+                {"user_id": author_id, "username": "legacy-author", "is_active": True},
+                {"user_id": reviewer_id, "username": "legacy-reviewer", "is_active": True},
+            ],
+        },
+    )
+    assert team_resp.status_code == 201
+
+    pr_ids = {str(uuid.uuid4()) for _ in range(DEFAULT_PAGE_SIZE + 5)}
+    resp = await api_client.post(
+        "/api/v1/pullRequest/batchCreate",
+        json={
+            "items": [
+                {"pull_request_id": pr_id, "pull_request_name": "Legacy", "author_id": author_id}
+                for pr_id in pr_ids
+            ]
+        },
+    )
+    assert resp.status_code == 200
+
+    resp = await api_client.get("/api/v1/users/getReview", params={"user_id": reviewer_id})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert {pr["pull_request_id"] for pr in body["pull_requests"]} == pr_ids
+    assert len(body["pull_requests"]) == len(pr_ids)
+    assert body["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_reviews_for_unknown_user_returns_not_found(api_client: AsyncClient):
+    resp = await api_client.get("/api/v1/users/getReview", params={"user_id": str(uuid.uuid4())})
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_batch_set_is_active_reports_missing_users(api_client: AsyncClient):
+    user_ids = []
+    for name in ("hr-sync-1", "hr-sync-2"):
+        resp = await api_client.post("/api/v1/users", json={"username": name})
+        user_ids.append(resp.json()["user_id"])
+    missing_id = str(uuid.uuid4())
+
+    resp = await api_client.post(
+        "/api/v1/users/batchSetIsActive",
+        json={
+            "items": [
+                {"user_id": user_ids[0], "is_active": False},
+                {"user_id": missing_id, "is_active": False},
+                {"user_id": user_ids[1], "is_active": False},
+                {"user_id": user_ids[1], "is_active": True},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [result["status_code"] for result in results] == [200, 404, 200, 200]
+    assert results[1]["error"]["code"] == "NOT_FOUND"
+    assert results[0]["user"]["is_active"] is False
+    assert results[2]["user"]["is_active"] is True
+
+    first = await api_client.get(f"/api/v1/users/{user_ids[0]}")
+    second = await api_client.get(f"/api/v1/users/{user_ids[1]}")
+    assert first.json()["is_active"] is False
+    assert second.json()["is_active"] is True
+
+
+@pytest.mark.asyncio
+async def test_deferred_deactivation_reaches_reviewer_selection_after_flush(
+    api_client: AsyncClient, monkeypatch
+):
+    monkeypatch.setenv("USER_ACTIVITY_WRITE_MODE", "deferred")
+    get_settings.cache_clear()
+
+    members = [
+        {"user_id": str(uuid.uuid4()), "username": f"deferred-{i}", "is_active": True}
+        for i in range(3)
+    ]
+    await api_client.post("/api/v1/team/add", json={"team_name": "deferred", "members": members})
+    author_id, inactive_id, active_id = (member["user_id"] for member in members)
+
+    resp = await api_client.post(
+        "/api/v1/users/setIsActive", json={"user_id": inactive_id, "is_active": False}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["user"]["is_active"] is False
+    assert len(get_activity_buffer()) == 1
+
+    await asyncio.sleep(get_settings().user_activity_flush_delay_seconds * 2)
+    assert len(get_activity_buffer()) == 0
+
+    pr_resp = await api_client.post(
+        "/api/v1/pullRequest/create",
+        json={
+            "pull_request_id": str(uuid.uuid4()),
+            "pull_request_name": "deferred",
+            "author_id": author_id,
+        },
+    )
+    assert pr_resp.json()["pr"]["assigned_reviewers"] == [active_id]
+
+
+async def get_reviewer_ids(pr: dict) -> set[str]:
+    reviewer_ids = await PullRequestReviewer.filter(pr_id=pr["pull_request_id"]).values_list(
+        "reviewer_id", flat=True
+    )
+    return {str(reviewer_id) for reviewer_id in reviewer_ids}
+
+
+@pytest.mark.asyncio
+async def test_deactivation_replaces_reviewer_from_same_team(api_client: AsyncClient):
+    members = [
+        {"user_id": str(uuid.uuid4()), "username": f"replaced-{i}", "is_active": True}
+        for i in range(4)
+    ]
+    other_team = [{"user_id": str(uuid.uuid4()), "username": "outsider", "is_active": True}]
+    await api_client.post("/api/v1/team/add", json={"team_name": "replaced", "members": members})
+    await api_client.post("/api/v1/team/add", json={"team_name": "other", "members": other_team})
+    author_id = members[0]["user_id"]
+
+    pr = await create_pull_request(api_client, author_id)
+    inactive_id, kept_id = pr["assigned_reviewers"]
+    merged = await create_pull_request(api_client, author_id)
+    resp = await api_client.post(
+        "/api/v1/pullRequest/merge", json={"pull_request_id": merged["pull_request_id"]}
+    )
+    assert resp.status_code == 200
+
+    resp = await api_client.post(
+        "/api/v1/users/setIsActive", json={"user_id": inactive_id, "is_active": False}
+    )
+    assert resp.status_code == 200
+
+    # Единственный подходящий кандидат: не автор, не текущий ревьювер и из той же команды
+    (candidate_id,) = {member["user_id"] for member in members} - {
+        author_id,
+        inactive_id,
+        kept_id,
+    }
+    assert await get_reviewer_ids(pr) == {kept_id, candidate_id}
+    assert await get_reviewer_ids(merged) == set(merged["assigned_reviewers"])
+
+    loads = dict(await ReviewerLoad.all().values_list("user_id", "open_reviews"))
+    assert loads[uuid.UUID(inactive_id)] == 0
+    assert loads[uuid.UUID(candidate_id)] == 1
+
+
+@pytest.mark.asyncio
+async def test_deactivation_without_candidate_removes_reviewer(api_client: AsyncClient):
+    members = [
+        {"user_id": str(uuid.uuid4()), "username": f"shrinking-{i}", "is_active": True}
+        for i in range(3)
+    ]
+    await api_client.post("/api/v1/team/add", json={"team_name": "shrinking", "members": members})
+    pr = await create_pull_request(api_client, members[0]["user_id"])
+    inactive_id, kept_id = pr["assigned_reviewers"]
+
+    resp = await api_client.post(
+        "/api/v1/users/setIsActive", json={"user_id": inactive_id, "is_active": False}
+    )
+    assert resp.status_code == 200
+
+    assert await get_reviewer_ids(pr) == {kept_id}
+    resp = await api_client.get("/api/v1/users/getReview", params={"user_id": inactive_id})
+    assert resp.json()["pull_requests"] == []
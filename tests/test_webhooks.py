@@ -0,0 +1,241 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from httpx import AsyncClient
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.common.webhooks import WebhookDispatcher
+from app.core.config import get_settings
+from app.models.outbox_events import OutboxEvent, OutboxStatus
+from app.services.outbox.outbox_service import OutboxService
+from tests.conftest import create_pull_request, create_team
+
+TARGET = "http://hooks.test/events"
+
+
+class WebhookReceiver:
+    # Локальная заглушка получателя: отвечает 503 первые fail_times раз
+    def __init__(self, fail_times: int = 0, delay: float = 0.0) -> None:
+        self.fail_times = fail_times
+        self.delay = delay
+        self.batches: list[list[dict]] = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, scope, receive, send) -> None:
+        request = Request(scope, receive)
+        body = await request.json()
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+
+        if self.fail_times:
+            self.fail_times -= 1
+            await Response(status_code=503)(scope, receive, send)
+            return
+        self.batches.append(body["events"])
+        await Response(status_code=204)(scope, receive, send)
+
+    @property
+    def events(self) -> list[dict]:
+        return [event for batch in self.batches for event in batch]
+
+
+def make_dispatcher(receiver: WebhookReceiver, **overrides) -> WebhookDispatcher:
+    options = {
+        "targets": [TARGET],
+        "batch_size": 100,
+        "concurrency_per_target": 2,
+        "timeout_seconds": 5.0,
+        "poll_interval_seconds": 0.01,
+        "lease_seconds": 30.0,
+        "retry_base_seconds": 0.001,
+        "retry_max_seconds": 0.01,
+        "max_attempts": 5,
+        "retention_seconds": 3600.0,
+        **overrides,
+    }
+    return WebhookDispatcher(OutboxService, transport=httpx.ASGITransport(app=receiver), **options)
+
+
+async def wait_for(condition, timeout: float = 5.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture()
+def webhook_env(monkeypatch):
+    monkeypatch.setenv("WEBHOOK_URLS", TARGET)
+    get_settings.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_lifecycle_events_are_delivered_in_batches(webhook_env, api_client: AsyncClient):
+    members = [str(uuid.uuid4()) for _ in range(4)]
+    await create_team(api_client, "hooks", members)
+    pr = await create_pull_request(api_client, members[0])
+    reassign = await api_client.post(
+        "/api/v1/pullRequest/reassign",
+        json={"pull_request_id": pr["pull_request_id"], "old_user_id": pr["assigned_reviewers"][0]},
+    )
+    assert reassign.status_code == 200
+    merge = await api_client.post(
+        "/api/v1/pullRequest/merge", json={"pull_request_id": pr["pull_request_id"]}
+    )
+    assert merge.status_code == 200
+    # Неудачная операция откатывает и событие
+    missing = await api_client.post(
+        "/api/v1/pullRequest/merge", json={"pull_request_id": str(uuid.uuid4())}
+    )
+    assert missing.status_code == 404
+
+    receiver = WebhookReceiver()
+    dispatcher = make_dispatcher(receiver)
+    dispatcher.start()
+    try:
+        await wait_for(lambda: dispatcher.stats().delivered == 3)
+    finally:
+        await dispatcher.stop()
+
+    assert len(receiver.batches) == 1
+    assert [event["event_type"] for event in receiver.events] == [
+        "pull_request.created",
+        "pull_request.reassigned",
+        "pull_request.merged",
+    ]
+    created, reassigned, _ = receiver.events
+    assert created["data"]["assigned_reviewers"] == pr["assigned_reviewers"]
+    assert reassigned["data"]["new_reviewer_id"] == reassign.json()["replaced_by"]
+
+    rows = await OutboxEvent.all().values("event_id", "status")
+    assert {str(row["event_id"]) for row in rows} == {
+        event["event_id"] for event in receiver.events
+    }
+    assert {row["status"] for row in rows} == {OutboxStatus.DELIVERED}
+
+
+@pytest.mark.asyncio
+async def test_failed_delivery_is_retried_with_same_event_id(webhook_env, api_client: AsyncClient):
+    members = [str(uuid.uuid4()) for _ in range(3)]
+    await create_team(api_client, "hooks", members)
+    await create_pull_request(api_client, members[0])
+
+    receiver = WebhookReceiver(fail_times=2)
+    dispatcher = make_dispatcher(receiver)
+    dispatcher.start()
+    try:
+        await wait_for(lambda: dispatcher.stats().delivered == 1)
+    finally:
+        await dispatcher.stop()
+
+    row = await OutboxEvent.get()
+    assert row.status == OutboxStatus.DELIVERED
+    assert row.attempts == 3
+    assert receiver.events[0]["event_id"] == str(row.event_id)
+    stats = dispatcher.stats()
+    assert (stats.retried, stats.delivered, stats.failed) == (2, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_delivery_stops_after_max_attempts(webhook_env, api_client: AsyncClient):
+    members = [str(uuid.uuid4()) for _ in range(3)]
+    await create_team(api_client, "hooks", members)
+    await create_pull_request(api_client, members[0])
+
+    dispatcher = make_dispatcher(WebhookReceiver(fail_times=10), max_attempts=2)
+    for _ in range(2):
+        await asyncio.sleep(0.02)
+        assert await dispatcher.deliver_once(TARGET) == 1
+    await asyncio.sleep(0.02)
+    assert await dispatcher.deliver_once(TARGET) == 0
+    await dispatcher.stop()
+
+    row = await OutboxEvent.get()
+    assert row.status == OutboxStatus.FAILED
+    assert row.last_error == "HTTP 503"
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_limited_per_target(webhook_env, api_client: AsyncClient):
+    members = [str(uuid.uuid4()) for _ in range(3)]
+    await create_team(api_client, "hooks", members)
+    for _ in range(6):
+        await create_pull_request(api_client, members[0])
+
+    receiver = WebhookReceiver(delay=0.05)
+    dispatcher = make_dispatcher(receiver, batch_size=1, concurrency_per_target=2)
+    dispatcher.start()
+    try:
+        await wait_for(lambda: dispatcher.stats().delivered == 6)
+    finally:
+        await dispatcher.stop()
+
+    assert receiver.max_active == 2
+    assert len({event["event_id"] for event in receiver.events}) == 6
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_is_shared_between_workers(webhook_env, api_client: AsyncClient):
+    members = [str(uuid.uuid4()) for _ in range(3)]
+    await create_team(api_client, "hooks", members)
+    for _ in range(8):
+        await create_pull_request(api_client, members[0])
+
+    receiver = WebhookReceiver(delay=0.05)
+    dispatchers = [
+        make_dispatcher(receiver, batch_size=1, concurrency_per_target=2) for _ in range(2)
+    ]
+    for dispatcher in dispatchers:
+        dispatcher.start()
+    try:
+        await wait_for(lambda: sum(d.stats().delivered for d in dispatchers) == 8)
+    finally:
+        for dispatcher in dispatchers:
+            await dispatcher.stop()
+
+    assert receiver.max_active == 2
+    assert len({event["event_id"] for event in receiver.events}) == 8
+
+
+@pytest.mark.asyncio
+async def test_no_outbox_rows_without_targets(api_client: AsyncClient):
+    members = [str(uuid.uuid4()) for _ in range(3)]
+    await create_team(api_client, "hooks", members)
+    await create_pull_request(api_client, members[0])
+
+    assert await OutboxEvent.all().count() == 0
+
+
+@pytest.mark.asyncio
+async def test_deactivation_emits_reassigned_without_replacement(
+    webhook_env, api_client: AsyncClient
+):
+    members = [str(uuid.uuid4()) for _ in range(3)]
+    await create_team(api_client, "hooks", members)
+    pr = await create_pull_request(api_client, members[0])
+    reviewer_id = pr["assigned_reviewers"][0]
+
+    resp = await api_client.post(
+        "/api/v1/users/setIsActive", json={"user_id": reviewer_id, "is_active": False}
+    )
+    assert resp.status_code == 200
+
+    receiver = WebhookReceiver()
+    dispatcher = make_dispatcher(receiver)
+    await dispatcher.deliver_once(TARGET)
+    await dispatcher.stop()
+
+    reassigned = receiver.events[-1]
+    assert reassigned["event_type"] == "pull_request.reassigned"
+    assert reassigned["data"] == {
+        "pull_request_id": pr["pull_request_id"],
+        "old_reviewer_id": reviewer_id,
+        "new_reviewer_id": None,
+    }
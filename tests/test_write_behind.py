@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.common.write_behind import WriteBehindBuffer
+
+
+@pytest.mark.asyncio
+async def test_repeated_writes_coalesce_into_one_batch():
+    batches: list[dict[str, bool]] = []
+
+    async def write(values: dict[str, bool]) -> None:
+        batches.append(values)
+
+    buffer: WriteBehindBuffer[str, bool] = WriteBehindBuffer(write, delay=0.01, max_pending=100)
+    written = [buffer.put("alice", False), buffer.put("bob", False), buffer.put("alice", True)]
+
+    await asyncio.gather(*written)
+
+    assert batches == [{"alice": True, "bob": False}]
+    stats = buffer.stats()
+    assert (stats.queued, stats.coalesced, stats.flushes, stats.written) == (3, 1, 1, 2)
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_flushes_without_waiting_for_delay():
+    batches: list[dict[int, bool]] = []
+
+    async def write(values: dict[int, bool]) -> None:
+        batches.append(values)
+
+    buffer: WriteBehindBuffer[int, bool] = WriteBehindBuffer(write, delay=60, max_pending=3)
+    await asyncio.wait_for(buffer.put_many({1: True, 2: True, 3: False}), timeout=1)
+
+    assert batches == [{1: True, 2: True, 3: False}]
+    assert len(buffer) == 0
+
+
+@pytest.mark.asyncio
+async def test_close_writes_pending_changes():
+    batches: list[dict[int, bool]] = []
+
+    async def write(values: dict[int, bool]) -> None:
+        batches.append(values)
+
+    buffer: WriteBehindBuffer[int, bool] = WriteBehindBuffer(write, delay=60, max_pending=100)
+    buffer.put(1, False)
+
+    await buffer.close()
+
+    assert batches == [{1: False}]
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_reported_to_waiters():
+    async def write(values: dict[int, bool]) -> None:
+        raise RuntimeError("db is down")
+
+    buffer: WriteBehindBuffer[int, bool] = WriteBehindBuffer(write, delay=0.01, max_pending=100)
+
+    with pytest.raises(RuntimeError):
+        await buffer.put(1, True)
+    assert buffer.stats().failed == 1